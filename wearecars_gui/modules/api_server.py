@@ -0,0 +1,298 @@
+"""
+API Server Module - HTTP/JSON Interface to the Booking Service
+WeAreCars Car Rental System
+
+A small asyncio HTTP/1.1 server so kiosks, scripts and other terminals can
+share one bookings database. Connections are handled on the event loop;
+every SQLite call runs on a thread pool so slow queries and commits never
+stall other clients.
+
+    GET  /health
+    GET  /quote?car_type=&fuel_type=&days=&unlimited_mileage=&breakdown_cover=
+    GET  /bookings?before_id=&limit=
+    POST /bookings                      (JSON booking details)
+    GET  /bookings/search?q=&limit=
+    GET  /bookings/export.csv
+    GET  /stats
+"""
+
+import asyncio
+import csv
+import io
+import json
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs, urlsplit
+
+from modules.booking_service import BookingService, BookingValidationError, parse_int
+from modules.database import BOOKING_PAGE_SIZE, Database, VehicleUnavailableError
+
+logger = logging.getLogger(__name__)
+
+# Threads running blocking database calls
+API_WORKERS = 8
+
+# Largest request body accepted (bytes)
+MAX_BODY_BYTES = 64 * 1024
+
+REASONS = {
+    200: 'OK', 201: 'Created', 400: 'Bad Request', 404: 'Not Found',
+    405: 'Method Not Allowed', 409: 'Conflict', 413: 'Payload Too Large',
+    500: 'Internal Server Error',
+}
+
+
+class HTTPError(Exception):
+    """An error response with a status code and a message for the client."""
+
+    def __init__(self, status, message):
+        self.status = status
+        self.message = message
+        super().__init__(message)
+
+
+class BookingAPIServer:
+    """Serves BookingService over HTTP/1.1 with keep-alive and JSON bodies."""
+
+    def __init__(self, service, workers=API_WORKERS):
+        self.service = service
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='api')
+        self.server = None
+        self.routes = {
+            ('GET', '/health'): self.health,
+            ('GET', '/quote'): self.quote,
+            ('GET', '/bookings'): self.list_bookings,
+            ('POST', '/bookings'): self.create_booking,
+            ('GET', '/bookings/search'): self.search,
+            ('GET', '/stats'): self.stats,
+        }
+
+    async def start(self, host='127.0.0.1', port=8080):
+        """Start listening; returns the asyncio server."""
+        self.server = await asyncio.start_server(self.handle_connection, host, port)
+        return self.server
+
+    async def close(self):
+        """Stop accepting connections and shut down the worker threads."""
+        if self.server:
+            self.server.close()
+            await self.server.wait_closed()
+        self.executor.shutdown(wait=True)
+
+    def run_blocking(self, function, *args):
+        """Run a blocking database call on the worker threads."""
+        return asyncio.get_running_loop().run_in_executor(self.executor, function, *args)
+
+    async def handle_connection(self, reader, writer):
+        """Serve requests on one connection until the client closes it."""
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = headers.get('connection', '').lower() != 'close'
+
+                if method == 'GET' and urlsplit(target).path == '/bookings/export.csv':
+                    await self.export_csv(writer)
+                    break
+
+                status, payload = await self.dispatch(method, target, body)
+                self.write_response(writer, status, payload, keep_alive)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except HTTPError as e:
+            # The request could not be read; answer it and drop the connection
+            self.write_response(writer, e.status, {'error': e.message}, False)
+            await writer.drain()
+        finally:
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def read_request(self, reader):
+        """Read one request; returns (method, target, headers, body) or None at EOF."""
+        line = await reader.readline()
+        if not line.strip():
+            return None
+        try:
+            method, target, _ = line.decode('latin-1').split(' ', 2)
+        except ValueError:
+            raise HTTPError(400, "Malformed request line") from None
+
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b'\r\n', b'\n', b''):
+                break
+            name, _, value = line.decode('latin-1').partition(':')
+            headers[name.strip().lower()] = value.strip()
+
+        try:
+            length = int(headers.get('content-length') or 0)
+        except ValueError:
+            raise HTTPError(400, "Bad Content-Length") from None
+        if length < 0 or length > MAX_BODY_BYTES:
+            raise HTTPError(413, "Request body too large")
+        body = await reader.readexactly(length) if length else b''
+        return method.upper(), target, headers, body
+
+    async def dispatch(self, method, target, body):
+        """Route a request to its handler; returns (status, JSON payload)."""
+        url = urlsplit(target)
+        handler = self.routes.get((method, url.path))
+        if handler is None:
+            if any(path == url.path for _, path in self.routes):
+                return 405, {'error': f"{method} not allowed on {url.path}"}
+            return 404, {'error': f"No such resource: {url.path}"}
+
+        params = {name: values[-1] for name, values in parse_qs(url.query).items()}
+        try:
+            return await handler(params, body)
+        except BookingValidationError as e:
+            return 400, {'error': str(e), 'fields': [{'field': f, 'message': m} for f, m in e.errors]}
+        except VehicleUnavailableError as e:
+            return 409, {'error': str(e), 'next_free_date': e.next_free_date}
+        except HTTPError as e:
+            return e.status, {'error': e.message}
+        except Exception:
+            # Details stay in the server log; clients only learn that it failed
+            logger.exception("Unhandled error in %s %s", method, url.path)
+            return 500, {'error': "Internal server error"}
+
+    def write_response(self, writer, status, payload, keep_alive):
+        """Write a complete JSON response."""
+        body = json.dumps(payload).encode('utf-8')
+        writer.write(
+            f"HTTP/1.1 {status} {REASONS.get(status, '')}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(body)}\r\n"
+            f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+            f"\r\n".encode('latin-1') + body
+        )
+
+    async def health(self, params, body):
+        return 200, {'status': 'ok'}
+
+    async def quote(self, params, body):
+        quote = await self.run_blocking(
+            self.service.quote,
+            params.get('car_type'),
+            params.get('fuel_type'),
+            params.get('days'),
+            params.get('unlimited_mileage'),
+            params.get('breakdown_cover')
+        )
+        return 200, quote
+
+    async def list_bookings(self, params, body):
+        bookings = await self.run_blocking(
+            self.service.list_bookings,
+            parse_int(params.get('before_id'), 'before_id'),
+            parse_int(params.get('limit'), 'limit', BOOKING_PAGE_SIZE)
+        )
+        return 200, {'bookings': bookings}
+
+    async def create_booking(self, params, body):
+        try:
+            details = json.loads(body or b'{}')
+        except ValueError:
+            raise HTTPError(400, "Body must be JSON") from None
+        if not isinstance(details, dict):
+            raise HTTPError(400, "Body must be a JSON object")
+        result = await self.run_blocking(self.service.create_booking, details)
+        return 201, result
+
+    async def search(self, params, body):
+        bookings = await self.run_blocking(
+            self.service.search,
+            params.get('q', ''),
+            parse_int(params.get('limit'), 'limit', BOOKING_PAGE_SIZE)
+        )
+        return 200, {'bookings': bookings}
+
+    async def stats(self, params, body):
+        return 200, await self.run_blocking(self.service.stats)
+
+    async def export_csv(self, writer):
+        """Stream every booking as CSV, one page per chunk, then close the connection.
+
+        The header row and first page are read before the 200 is sent, so
+        early failures get a proper 500. A failure after that aborts the
+        connection, so the client sees a broken download rather than a
+        complete-looking but truncated file.
+        """
+        pages = self.service.iter_export_rows()
+        done = object()
+        try:
+            first = [await self.run_blocking(next, pages, done) for _ in range(2)]
+        except Exception:
+            logger.exception("CSV export failed before sending")
+            self.write_response(writer, 500, {'error': "Internal server error"}, False)
+            await writer.drain()
+            return
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\n"
+            b"Content-Type: text/csv; charset=utf-8\r\n"
+            b"Content-Disposition: attachment; filename=\"wearecars_bookings.csv\"\r\n"
+            b"Connection: close\r\n"
+            b"\r\n"
+        )
+        try:
+            for rows in first:
+                if rows is done:
+                    return
+                self.write_csv_rows(writer, rows)
+            await writer.drain()
+            while True:
+                rows = await self.run_blocking(next, pages, done)
+                if rows is done:
+                    break
+                self.write_csv_rows(writer, rows)
+                await writer.drain()
+        except ConnectionError:
+            raise
+        except Exception:
+            logger.exception("CSV export failed mid-stream; aborting the connection")
+            writer.transport.abort()
+
+    def write_csv_rows(self, writer, rows):
+        buffer = io.StringIO()
+        csv.writer(buffer).writerows(rows)
+        writer.write(buffer.getvalue().encode('utf-8'))
+
+
+async def serve(db_path, host, port, workers=API_WORKERS):
+    """Open the database and serve the API until cancelled."""
+    database = Database(db_path)
+    server = BookingAPIServer(BookingService(database), workers)
+    try:
+        await server.start(host, port)
+        print(f"WeAreCars API listening on http://{host}:{port}")
+        await asyncio.Event().wait()
+    finally:
+        await server.close()
+        database.close()
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="WeAreCars booking API server")
+    parser.add_argument('--db', default='data/bookings.db', help="path to bookings.db")
+    parser.add_argument('--host', default='127.0.0.1', help="address to listen on")
+    parser.add_argument('--port', type=int, default=8080, help="port to listen on")
+    parser.add_argument('--workers', type=int, default=API_WORKERS, help="threads for database calls")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s %(levelname)s %(name)s: %(message)s')
+    try:
+        asyncio.run(serve(args.db, args.host, args.port, args.workers))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,117 @@
+"""
+Availability Module - Interval Index over Active Rentals
+WeAreCars Car Rental System
+"""
+
+import threading
+from bisect import bisect_right, insort
+
+from modules.storage import EPOCH_ORDINAL, day_to_text, text_to_day
+
+
+def to_day(value):
+    """Convert a 'YYYY-MM-DD' string or date into days since the epoch."""
+    if isinstance(value, str):
+        return text_to_day(value)
+    return value.toordinal() - EPOCH_ORDINAL
+
+
+def from_day(day):
+    """Convert days since the epoch back into a 'YYYY-MM-DD' string."""
+    return day_to_text(day)
+
+
+class AvailabilityIndex:
+    """Sorted rental endpoints per car type.
+
+    A rental occupies a car on the days [start, end). The number of cars of
+    a type out on day d is the count of starts <= d minus the count of
+    ends <= d, so each day costs two binary searches however many
+    rentals overlap it.
+    """
+
+    def __init__(self):
+        self._starts = {}
+        self._ends = {}
+        self._lock = threading.Lock()
+        # Sync state, owned by the Database that feeds this index
+        self.last_booking_id = 0
+        self.change_revision = None
+
+    def clear(self):
+        """Forget every rental."""
+        with self._lock:
+            self._starts.clear()
+            self._ends.clear()
+            self.last_booking_id = 0
+            self.change_revision = None
+
+    def load(self, rentals):
+        """Replace the index with (car_type, start_day, end_day) rentals."""
+        starts = {}
+        ends = {}
+        for car_type, start, end in rentals:
+            starts.setdefault(car_type, []).append(start)
+            ends.setdefault(car_type, []).append(end)
+        for values in starts.values():
+            values.sort()
+        for values in ends.values():
+            values.sort()
+        with self._lock:
+            self._starts = starts
+            self._ends = ends
+
+    def add(self, car_type, start, end):
+        """Record one rental of car_type over [start, end)."""
+        with self._lock:
+            insort(self._starts.setdefault(car_type, []), start)
+            insort(self._ends.setdefault(car_type, []), end)
+
+    def occupancy(self, car_type, day):
+        """Return how many cars of car_type are out on the given day."""
+        with self._lock:
+            return self._occupancy(car_type, day)
+
+    def _occupancy(self, car_type, day):
+        starts = self._starts.get(car_type)
+        if not starts:
+            return 0
+        return bisect_right(starts, day) - bisect_right(self._ends[car_type], day)
+
+    def peak(self, car_type, start, end):
+        """Return the most cars of car_type out on any day in [start, end)."""
+        with self._lock:
+            return max((self._occupancy(car_type, day) for day in range(start, end)), default=0)
+
+    def busiest(self, car_type):
+        """Return the most cars of car_type out on any one day."""
+        with self._lock:
+            starts = self._starts.get(car_type, [])
+            ends = self._ends.get(car_type, [])
+            most = ended = 0
+            # Occupancy only rises on a start day, so those are the days to check
+            for started, day in enumerate(starts, 1):
+                while ended < len(ends) and ends[ended] <= day:
+                    ended += 1
+                most = max(most, started - ended)
+            return most
+
+    def first_free_day(self, car_type, fleet_size, days, from_day, horizon=365):
+        """Return the first day at or after from_day with a car free for days in a row.
+
+        Looks at most horizon days ahead and returns None if nothing is free.
+        """
+        with self._lock:
+            occupied = [self._occupancy(car_type, day) for day in range(from_day, from_day + horizon + days)]
+
+        # Slide a window of length days, tracking how many of its days are full
+        full = 0
+        for offset, count in enumerate(occupied):
+            if count >= fleet_size:
+                full += 1
+            if offset >= days and occupied[offset - days] >= fleet_size:
+                full -= 1
+            if offset >= days - 1 and full == 0:
+                return from_day + offset - days + 1
+        return None
+
@@ -0,0 +1,403 @@
+"""
+Benchmark Module - Timing the Database at Production Scale
+WeAreCars Car Rental System
+
+Builds databases of synthetic bookings (see the workload module) at each
+requested scale, times every public Database method against them and
+writes the results as JSON. Two result files can be compared to catch
+regressions between runs.
+
+Databases are cached by scale and seed, so only the first run at a scale
+pays for the import. Each run works on a fresh copy: read methods are
+timed first, then the methods that write.
+"""
+
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta, timezone
+
+from modules.database import DEFAULT_DURABILITY, EXPORT_COLUMNS, Database
+from modules.pricing import np
+from modules.workload import STANDARD_SCALES, WorkloadGenerator, parse_scale, populate_database, write_workload_csv
+
+# Version of the results file layout
+RESULTS_FORMAT = 1
+
+# Fixed date the workload is generated around, so cached databases and results stay comparable
+BENCHMARK_AS_OF = date(2025, 6, 30)
+
+# Timed calls per case
+DEFAULT_REPEAT = 5
+
+# Methods that return every booking at once are skipped above this many rows
+FULL_RESULT_LIMIT = 1_000_000
+
+# Rows per bulk import case
+IMPORT_SAMPLE_ROWS = 1000
+
+# A case regresses when its median grows by more than this fraction...
+REGRESSION_THRESHOLD = 0.25
+
+# ...and by more than this many milliseconds
+REGRESSION_MIN_MS = 0.5
+
+
+class BenchmarkCase:
+    """One timed call of a Database method.
+
+    run(i) makes the call for iteration i; setup, when given, runs untimed
+    before each call. With counts, run returns how many rows it handled.
+    Cases with max_rows are skipped on larger databases.
+    """
+
+    def __init__(self, name, method, run, setup=None, counts=False, max_rows=None, reason=None):
+        self.name = name
+        self.method = method
+        self.run = run
+        self.setup = setup
+        self.counts = counts
+        self.max_rows = max_rows
+        self.reason = reason
+
+
+def percentile(values, fraction):
+    """Return the value at fraction (0-1) of sorted values."""
+    return values[min(len(values) - 1, int(len(values) * fraction))]
+
+
+def result_size(case, result):
+    """Return the number of rows a case returned or handled, where it has one."""
+    if case.counts:
+        return result
+    if isinstance(result, list):
+        return len(result)
+    return None
+
+
+def benchmark_database_path(rows, seed, db_dir):
+    """Return the cache path of the benchmark database for a scale and seed."""
+    return os.path.join(db_dir, f'bench_{rows}_{seed}.db')
+
+
+def build_benchmark_database(rows, seed, db_dir, progress=None):
+    """Create the cached benchmark database for a scale unless it exists.
+
+    Returns (path, seconds spent building, or None when it was cached).
+    """
+    path = benchmark_database_path(rows, seed, db_dir)
+    if os.path.exists(path):
+        return path, None
+
+    partial = path + '.partial'
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(partial + suffix):
+            os.remove(partial + suffix)
+
+    started = time.perf_counter()
+    db = Database(partial)
+    try:
+        populate_database(db, rows, seed, BENCHMARK_AS_OF, progress)
+        db.checkpoint('TRUNCATE')
+    finally:
+        db.close()
+    # Only a finished build is ever reused
+    os.replace(partial, path)
+    return path, time.perf_counter() - started
+
+
+def benchmark_cases(db, seed, scratch):
+    """Return the cases for every public Database method, reads before writes."""
+    first_page = db.get_bookings_page(page_size=1)
+    newest_id = first_page[0][0] if first_page else 1
+    car_type = 'City Car'
+    # Rentals for the write cases start after the whole workload, so cars are free
+    future = BENCHMARK_AS_OF + timedelta(days=365)
+    sample = WorkloadGenerator(seed, BENCHMARK_AS_OF).row()
+    csv_path = os.path.join(scratch, 'import_sample.csv')
+    write_workload_csv(csv_path, IMPORT_SAMPLE_ROWS, seed + 1, BENCHMARK_AS_OF)
+
+    def start_date(i, offset):
+        return (future + timedelta(days=offset + 4 * i)).isoformat()
+
+    def booking(i, offset):
+        days = 3
+        quote = db.get_pricing().quote(car_type, 'Petrol', days)
+        return (car_type, 'Petrol', days, 0, 0, quote['base_cost'], quote['car_surcharge'],
+                quote['fuel_surcharge'], quote['extras_cost'], quote['total_cost'],
+                start_date(i, offset))
+
+    def customer(i, label):
+        return ('Bench', f'{label}{i}', f'{i} Benchmark Road, Leeds', 30, 1)
+
+    def reopen(i):
+        Database(db.db_path).close()
+
+    def count_pages(pages):
+        return sum(len(page) for page in pages)
+
+    def reset_availability():
+        db.availability.clear()
+
+    def import_rows(i, defer_indexes):
+        generator = WorkloadGenerator(seed + 100 + i, BENCHMARK_AS_OF)
+        return db.import_bookings(generator.rows(IMPORT_SAMPLE_ROWS),
+                                  defer_indexes=defer_indexes)['imported']
+
+    full = f"returns every booking; skipped above {FULL_RESULT_LIMIT:,} rows"
+    return [
+        # Reads
+        BenchmarkCase('open', '__init__', reopen),
+        BenchmarkCase('get_schema_version', 'get_schema_version', lambda i: db.get_schema_version()),
+        BenchmarkCase('load_categories', 'load_categories', lambda i: db.load_categories()),
+        BenchmarkCase('get_pricing', 'get_pricing', lambda i: db.get_pricing(refresh=True)),
+        BenchmarkCase('find_customer', 'find_customer',
+                      lambda i: db.find_customer(sample['first_name'], sample['surname'], sample['address'])),
+        BenchmarkCase('get_booking_stats', 'get_booking_stats', lambda i: db.get_booking_stats()),
+        BenchmarkCase('get_bookings_page:first', 'get_bookings_page', lambda i: db.get_bookings_page()),
+        BenchmarkCase('get_bookings_page:deep', 'get_bookings_page',
+                      lambda i: db.get_bookings_page(max(newest_id // 2, 1))),
+        BenchmarkCase('iter_bookings', 'iter_bookings', lambda i: count_pages(db.iter_bookings()),
+                      counts=True),
+        BenchmarkCase('get_all_bookings', 'get_all_bookings', lambda i: db.get_all_bookings(),
+                      max_rows=FULL_RESULT_LIMIT, reason=full),
+        BenchmarkCase('iter_export_bookings', 'iter_export_bookings',
+                      lambda i: count_pages(db.iter_export_bookings()), counts=True),
+        BenchmarkCase('iter_export_bookings:all_columns', 'iter_export_bookings',
+                      lambda i: count_pages(db.iter_export_bookings(tuple(EXPORT_COLUMNS))), counts=True),
+        BenchmarkCase('iter_export_bookings:json', 'iter_export_bookings',
+                      lambda i: count_pages(db.iter_export_bookings(tuple(EXPORT_COLUMNS), as_json=True)),
+                      counts=True),
+        BenchmarkCase('iter_export_bookings:since_id', 'iter_export_bookings',
+                      lambda i: count_pages(db.iter_export_bookings(after_id=newest_id - 1000, oldest_first=True)),
+                      counts=True),
+        BenchmarkCase('count_bookings', 'count_bookings', lambda i: db.count_bookings(), counts=True),
+        BenchmarkCase('count_bookings:filtered', 'count_bookings',
+                      lambda i: db.count_bookings({'car_type': car_type}), counts=True),
+        BenchmarkCase('get_bookings_slice:deep', 'get_bookings_slice',
+                      lambda i: db.get_bookings_slice(newest_id // 2, 25)),
+        BenchmarkCase('get_bookings_sorted:total', 'get_bookings_sorted',
+                      lambda i: db.get_bookings_sorted(0, 25, 'total', False)),
+        BenchmarkCase('get_bookings_sorted:filtered', 'get_bookings_sorted',
+                      lambda i: db.get_bookings_sorted(0, 25, 'days', True, {'car_type': car_type})),
+        BenchmarkCase('get_bookings_sorted:anchored', 'get_bookings_sorted',
+                      lambda i: db.get_bookings_sorted(-25, 25, 'start_date', True, anchor_id=newest_id // 2)),
+        BenchmarkCase('get_change_watermark', 'get_change_watermark', lambda i: db.get_change_watermark()),
+        BenchmarkCase('get_booking_changes:unchanged', 'get_booking_changes',
+                      lambda i: db.get_booking_changes(db.get_change_watermark())),
+        BenchmarkCase('search_bookings:surname', 'search_bookings',
+                      lambda i: db.search_bookings(sample['surname'], limit=500)),
+        BenchmarkCase('search_bookings:prefix', 'search_bookings',
+                      lambda i: db.search_bookings(sample['surname'][:2], limit=500)),
+        BenchmarkCase('search_bookings:booking_id', 'search_bookings',
+                      lambda i: db.search_bookings(str(newest_id // 2), limit=500)),
+        BenchmarkCase('search_bookings:miss', 'search_bookings', lambda i: db.search_bookings('Zzyzx')),
+        BenchmarkCase('search_bookings:all_matches', 'search_bookings',
+                      lambda i: db.search_bookings(sample['surname'], limit=None),
+                      max_rows=FULL_RESULT_LIMIT, reason=full),
+        BenchmarkCase('search_bookings_page', 'search_bookings_page',
+                      lambda i: db.search_bookings_page(sample['surname'])),
+        BenchmarkCase('iter_search_bookings', 'iter_search_bookings',
+                      lambda i: count_pages(db.iter_search_bookings(sample['surname'])),
+                      counts=True),
+        BenchmarkCase('sync_availability:cold', 'sync_availability', lambda i: db.sync_availability(),
+                      setup=reset_availability),
+        BenchmarkCase('sync_availability:warm', 'sync_availability', lambda i: db.sync_availability()),
+        BenchmarkCase('count_available', 'count_available',
+                      lambda i: db.count_available(car_type, BENCHMARK_AS_OF.isoformat(),
+                                                   (BENCHMARK_AS_OF + timedelta(days=7)).isoformat())),
+        BenchmarkCase('first_available_date', 'first_available_date',
+                      lambda i: db.first_available_date(car_type, 7, BENCHMARK_AS_OF)),
+        BenchmarkCase('storage_report', 'storage_report', lambda i: db.storage_report()),
+        # Writes
+        BenchmarkCase('create_tables', 'create_tables', lambda i: db.create_tables()),
+        BenchmarkCase('migrate', 'migrate', lambda i: db.migrate()),
+        BenchmarkCase('seed_demo_data', 'seed_demo_data', lambda i: db.seed_demo_data(seed)),
+        BenchmarkCase('add_customer:new', 'add_customer', lambda i: db.add_customer(*customer(i, 'Customer'))),
+        BenchmarkCase('add_customer:returning', 'add_customer',
+                      lambda i: db.add_customer(sample['first_name'], sample['surname'],
+                                                sample['address'], 40, 1)),
+        BenchmarkCase('add_booking', 'add_booking',
+                      lambda i: db.add_booking(1, 'Bench Booking', *booking(i, 0))),
+        BenchmarkCase('create_booking', 'create_booking',
+                      lambda i: db.create_booking(*customer(i, 'Create'), *booking(i, 1))),
+        BenchmarkCase('submit_write:create_booking', 'submit_write',
+                      lambda i: db.submit_write('create_booking', *customer(i, 'Queued'),
+                                                *booking(i, 2)).result()),
+        BenchmarkCase('import_bookings', 'import_bookings', lambda i: import_rows(i, False), counts=True),
+        BenchmarkCase('import_bookings:deferred', 'import_bookings', lambda i: import_rows(i, True),
+                      counts=True),
+        BenchmarkCase('import_bookings_csv', 'import_bookings_csv',
+                      lambda i: db.import_bookings_csv(csv_path)['imported'], counts=True),
+        BenchmarkCase('merge_duplicate_customers', 'merge_duplicate_customers',
+                      lambda i: db.merge_duplicate_customers()),
+        BenchmarkCase('rebuild_booking_stats', 'rebuild_booking_stats', lambda i: db.rebuild_booking_stats()),
+        BenchmarkCase('checkpoint', 'checkpoint', lambda i: db.checkpoint()),
+    ]
+
+
+def time_case(case, repeat):
+    """Time repeat calls of a case; returns its result entry."""
+    timings = []
+    rows = None
+    for i in range(repeat):
+        if case.setup:
+            case.setup()
+        started = time.perf_counter()
+        result = case.run(i)
+        timings.append((time.perf_counter() - started) * 1000)
+        rows = result_size(case, result)
+
+    timings.sort()
+    return {
+        'case': case.name,
+        'method': case.method,
+        'runs': len(timings),
+        'rows': rows,
+        'min_ms': timings[0],
+        'median_ms': percentile(timings, 0.5),
+        'p95_ms': percentile(timings, 0.95),
+        'max_ms': timings[-1],
+    }
+
+
+def benchmark_scale(rows, seed=0, repeat=DEFAULT_REPEAT, db_dir=None, progress=None):
+    """Time every case on a copy of the benchmark database with rows bookings."""
+    db_dir = db_dir or os.path.join(tempfile.gettempdir(), 'wearecars_bench')
+    os.makedirs(db_dir, exist_ok=True)
+    path, build_seconds = build_benchmark_database(rows, seed, db_dir, progress)
+
+    results = []
+    with tempfile.TemporaryDirectory(dir=db_dir) as scratch:
+        work_path = os.path.join(scratch, 'bookings.db')
+        shutil.copyfile(path, work_path)
+        db = Database(work_path)
+        try:
+            for case in benchmark_cases(db, seed, scratch):
+                if case.max_rows is not None and rows > case.max_rows:
+                    results.append({'case': case.name, 'method': case.method, 'skipped': case.reason})
+                    continue
+                results.append(time_case(case, repeat))
+        finally:
+            db.close()
+
+    return {
+        'rows': rows,
+        'file_bytes': os.path.getsize(path),
+        'build_seconds': build_seconds,
+        'results': results,
+    }
+
+
+def run_benchmarks(scales, seed=0, repeat=DEFAULT_REPEAT, db_dir=None, progress=None):
+    """Benchmark each scale (a row count) in turn; returns the results document."""
+    started = datetime.now(timezone.utc)
+    document = {
+        'format': RESULTS_FORMAT,
+        'meta': {
+            'started': started.isoformat(timespec='seconds'),
+            'python': platform.python_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'cpus': os.cpu_count(),
+            'numpy': np.__version__ if np is not None else None,
+            'durability': DEFAULT_DURABILITY,
+            'seed': seed,
+            'repeat': repeat,
+            'as_of': BENCHMARK_AS_OF.isoformat(),
+        },
+        'scales': {},
+    }
+    for rows in scales:
+        document['scales'][str(rows)] = benchmark_scale(rows, seed, repeat, db_dir, progress)
+    document['meta']['elapsed_seconds'] = (datetime.now(timezone.utc) - started).total_seconds()
+    return document
+
+
+def compare_results(previous, current, threshold=REGRESSION_THRESHOLD, min_ms=REGRESSION_MIN_MS):
+    """List the cases whose median got slower between two results documents.
+
+    A case regresses when its median grows by more than threshold (a
+    fraction) and by more than min_ms. Only cases timed in both documents
+    at the same scale are compared.
+    """
+    regressions = []
+    for scale, after in current['scales'].items():
+        before = previous.get('scales', {}).get(scale)
+        if not before:
+            continue
+        earlier = {r['case']: r for r in before['results'] if 'median_ms' in r}
+        for result in after['results']:
+            old = earlier.get(result['case'])
+            if old is None or 'median_ms' not in result:
+                continue
+            delta = result['median_ms'] - old['median_ms']
+            if delta > min_ms and delta > old['median_ms'] * threshold:
+                regressions.append({
+                    'scale': scale,
+                    'case': result['case'],
+                    'before_ms': old['median_ms'],
+                    'after_ms': result['median_ms'],
+                    'change': delta / old['median_ms'] if old['median_ms'] else None,
+                })
+    return regressions
+
+
+def print_results(document):
+    """Print a results document as one table per scale."""
+    for scale, entry in document['scales'].items():
+        built = f", built in {entry['build_seconds']:.1f}s" if entry['build_seconds'] is not None else ''
+        print(f"\n{int(scale):,} bookings ({entry['file_bytes'] / 1e6:.1f} MB{built})")
+        print(f"{'case':<32} {'median ms':>11} {'p95 ms':>11} {'max ms':>11} {'rows':>9}")
+        for result in entry['results']:
+            if 'skipped' in result:
+                print(f"{result['case']:<32} skipped: {result['skipped']}")
+                continue
+            rows = '' if result['rows'] is None else result['rows']
+            print(f"{result['case']:<32} {result['median_ms']:>11.3f} {result['p95_ms']:>11.3f} "
+                  f"{result['max_ms']:>11.3f} {rows:>9}")
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Benchmark every Database method on synthetic bookings")
+    parser.add_argument('--scales', default='10k,1m',
+                        help=f"comma-separated row counts ({', '.join(STANDARD_SCALES)} or a number)")
+    parser.add_argument('--seed', type=int, default=0, help="workload random seed")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT, help="timed calls per case")
+    parser.add_argument('--dir', default=None, help="directory for cached benchmark databases")
+    parser.add_argument('--out', default=None, help="write the results as JSON to this file")
+    parser.add_argument('--compare', default=None, help="earlier results JSON to check for regressions")
+    parser.add_argument('--threshold', type=float, default=REGRESSION_THRESHOLD,
+                        help="median slowdown (fraction) counted as a regression")
+    args = parser.parse_args()
+
+    def report_progress(rows_read, imported, rejected):
+        print(f"  building: {imported:,} bookings", end='\r', flush=True)
+
+    scales = [parse_scale(scale) for scale in args.scales.split(',')]
+    document = run_benchmarks(scales, args.seed, args.repeat, args.dir, report_progress)
+    print_results(document)
+
+    if args.out:
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(document, f, indent=2)
+        print(f"\nResults written to {args.out}")
+
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as f:
+            previous = json.load(f)
+        regressions = compare_results(previous, document, args.threshold)
+        for r in regressions:
+            print(f"REGRESSION {int(r['scale']):,} rows {r['case']}: "
+                  f"{r['before_ms']:.3f} ms -> {r['after_ms']:.3f} ms")
+        if regressions:
+            sys.exit(1)
+        print("No regressions")
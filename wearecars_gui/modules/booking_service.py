@@ -0,0 +1,208 @@
+"""
+Booking Service Module - Headless Booking Operations
+WeAreCars Car Rental System
+
+Everything the booking screens do, without Tk: validation, pricing,
+creating bookings, listing, search, statistics and export. Used by the
+HTTP API and by scripts; results are plain dicts and lists ready for JSON.
+"""
+
+import csv
+from datetime import date
+
+from modules.database import BOOKING_PAGE_SIZE
+from modules.validation import validate_customer_details, validate_rental_details
+
+# Field names for the booking list rows returned by Database
+BOOKING_FIELDS = (
+    'id', 'customer_name', 'car_type', 'fuel_type', 'days', 'total_cost',
+    'booking_date', 'start_date', 'end_date', 'status',
+)
+
+# Header row of exported CSV files, one column per BOOKING_FIELDS entry
+EXPORT_HEADER = ('ID', 'Customer Name', 'Car Type', 'Fuel Type', 'Days',
+                 'Total Cost', 'Booking Date', 'Start Date', 'End Date', 'Status')
+
+# Largest page a caller may ask for
+MAX_PAGE_SIZE = 5000
+
+
+class BookingValidationError(ValueError):
+    """Raised when booking details break the booking rules.
+
+    errors holds the (field, message) pairs from the validation module.
+    """
+
+    def __init__(self, errors):
+        self.errors = errors
+        super().__init__('; '.join(message for _, message in errors))
+
+
+def booking_to_dict(row):
+    """Turn a booking list row into a dict keyed by BOOKING_FIELDS."""
+    return dict(zip(BOOKING_FIELDS, row))
+
+
+def parse_int(value, field, default=None):
+    """Parse an optional integer parameter, reporting bad input as a validation error.
+
+    Floats are accepted only when integral, so 3.7 is rejected rather
+    than truncated to 3; booleans are never taken as numbers.
+    """
+    if value is None or value == '':
+        return default
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if not isinstance(value, (bool, float)):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            pass
+    raise BookingValidationError([(field, f"{field} must be a whole number.")])
+
+
+def parse_bool(value, field, default=False):
+    """Parse an optional flag strictly: true/false, 1/0 or their text forms.
+
+    Anything else is a validation error, so e.g. the string "false" is
+    never taken as true.
+    """
+    if value is None or value == '':
+        return default
+    if isinstance(value, str):
+        text = value.strip().lower()
+        if text in ('true', '1'):
+            return True
+        if text in ('false', '0'):
+            return False
+    elif isinstance(value, (bool, int)) and value in (0, 1):
+        return bool(value)
+    raise BookingValidationError([(field, f"{field} must be true or false.")])
+
+
+class BookingService:
+    """Booking operations on top of a Database, safe to call from any thread."""
+
+    def __init__(self, database):
+        self.database = database
+
+    @staticmethod
+    def normalise(details):
+        """Coerce JSON or form values to the types the booking rules expect."""
+        clean = dict(details)
+        for field in ('first_name', 'surname', 'address', 'car_type', 'fuel_type', 'start_date'):
+            value = clean.get(field)
+            clean[field] = '' if value is None else str(value).strip()
+        for field in ('age', 'days'):
+            clean[field] = parse_int(clean.get(field), field)
+        for field in ('license_valid', 'unlimited_mileage', 'breakdown_cover'):
+            clean[field] = parse_bool(clean.get(field), field)
+        clean['start_date'] = clean['start_date'] or date.today().isoformat()
+        return clean
+
+    def validate(self, details):
+        """Check a booking request; returns a list of (field, message) pairs."""
+        details = self.normalise(details)
+        errors = validate_customer_details(
+            details['first_name'],
+            details['surname'],
+            details['address'],
+            details['age'],
+            details['license_valid']
+        )
+        errors += validate_rental_details(
+            details['car_type'],
+            details['fuel_type'],
+            details['days'],
+            details['start_date']
+        )
+        return errors
+
+    def quote(self, car_type, fuel_type, days, unlimited_mileage=False, breakdown_cover=False):
+        """Price a rental at the current rates."""
+        days = parse_int(days, 'days')
+        errors = validate_rental_details(car_type, fuel_type, days, date.today().isoformat())
+        if errors:
+            raise BookingValidationError(errors)
+        return self.database.get_pricing().quote(
+            car_type, fuel_type, days,
+            parse_bool(unlimited_mileage, 'unlimited_mileage'),
+            parse_bool(breakdown_cover, 'breakdown_cover')
+        )
+
+    def create_booking(self, details):
+        """Validate, price and save a new customer and booking.
+
+        details holds the customer and rental fields of the booking wizard,
+        with start_date defaulting to today. Prices always come from the
+        rate tables. The write goes through the write-behind queue, so
+        concurrent callers share group commits. Returns the new ids and
+        the quote; raises BookingValidationError or VehicleUnavailableError.
+        """
+        details = self.normalise(details)
+        errors = self.validate(details)
+        if errors:
+            raise BookingValidationError(errors)
+
+        days = details['days']
+        unlimited_mileage = 1 if details['unlimited_mileage'] else 0
+        breakdown_cover = 1 if details['breakdown_cover'] else 0
+        quote = self.database.get_pricing().quote(
+            details['car_type'], details['fuel_type'], days, unlimited_mileage, breakdown_cover
+        )
+
+        customer_id, booking_id = self.database.submit_write(
+            'create_booking',
+            details['first_name'],
+            details['surname'],
+            details['address'],
+            details['age'],
+            1 if details['license_valid'] else 0,
+            details['car_type'],
+            details['fuel_type'],
+            days,
+            unlimited_mileage,
+            breakdown_cover,
+            quote['base_cost'],
+            quote['car_surcharge'],
+            quote['fuel_surcharge'],
+            quote['extras_cost'],
+            quote['total_cost'],
+            details['start_date']
+        ).result()
+
+        return {'booking_id': booking_id, 'customer_id': customer_id, 'quote': quote}
+
+    def list_bookings(self, before_id=None, limit=BOOKING_PAGE_SIZE):
+        """Return one page of bookings, newest first, with ID below before_id."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        return [booking_to_dict(row) for row in self.database.get_bookings_page(before_id, limit)]
+
+    def search(self, term, limit=BOOKING_PAGE_SIZE):
+        """Return the best matches for a search term, most relevant first."""
+        limit = max(1, min(limit, MAX_PAGE_SIZE))
+        return [booking_to_dict(row) for row in self.database.search_bookings(term, limit)]
+
+    def stats(self):
+        """Return the dashboard statistics."""
+        return self.database.get_booking_stats()
+
+    def iter_export_rows(self):
+        """Yield CSV rows for every booking, header first, a page at a time."""
+        yield [EXPORT_HEADER]
+        yield from self.database.iter_bookings()
+
+    def export_csv(self, outfile):
+        """Write every booking as CSV to a path or an open text file; returns the row count."""
+        owns_file = isinstance(outfile, str)
+        f = open(outfile, 'w', newline='', encoding='utf-8') if owns_file else outfile
+        try:
+            writer = csv.writer(f)
+            count = -1
+            for rows in self.iter_export_rows():
+                writer.writerows(rows)
+                count += len(rows)
+        finally:
+            if owns_file:
+                f.close()
+        return count
@@ -5,8 +5,23 @@ WeAreCars Car Rental System
 
 import tkinter as tk
 from tkinter import ttk, messagebox
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from modules.styling import COLORS, FONTS, PADDING
+from modules.database import VehicleUnavailableError
+from modules.validation import validate_customer_details
+
+# Delay before the summary refreshes after a field changes (ms)
+SUMMARY_DEBOUNCE_MS = 150
+
+# Delay before availability is rechecked after the car type or days change (ms)
+AVAILABILITY_DEBOUNCE_MS = 150
+
+# How often a confirmed booking is checked for its commit (ms)
+CONFIRM_POLL_MS = 20
+
+# How often a running availability check is polled for its result (ms)
+AVAILABILITY_POLL_MS = 20
 
 class BookingWizard:
     def __init__(self, parent, database, on_complete):
@@ -50,20 +65,20 @@ class BookingWizard:
             'breakdown_cover': tk.BooleanVar(value=False),
         }
         
-        # Pricing information
-        self.base_rate = 25.0
-        self.car_surcharges = {
-            'City Car': 0,
-            'Family Car': 50,
-            'Sports Car': 75,
-            'SUV': 65
-        }
-        self.fuel_surcharges = {
-            'Petrol': 0,
-            'Diesel': 0,
-            'Hybrid': 30,
-            'Electric': 50
-        }
+        # Pricing information, from the rate tables
+        self.pricing = database.get_pricing()
+        
+        # Pending debounced summary and availability refreshes (after() ids)
+        self._summary_job = None
+        self._availability_job = None
+        
+        # Availability checks run off the Tk thread: the first loads the whole
+        # availability index. Only the newest check's result is shown.
+        self.availability_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='availability')
+        self._availability_generation = 0
+        
+        # True while a confirmed booking waits for the writer to commit it
+        self._saving = False
         
         self.setup_ui()
     
@@ -121,7 +136,10 @@ class BookingWizard:
         self.notebook.add(self.tab4, text="4. Summary & Confirm")
         self.create_summary_tab()
         
-        # Bind tab change to update summary
+        # Keep the summary live as the booking data changes
+        self.watch_booking_data()
+        
+        # Bind tab change to update navigation
         self.notebook.bind('<<NotebookTabChanged>>', self.on_tab_changed)
         
         # Navigation Buttons (already created above)
@@ -154,7 +172,7 @@ class BookingWizard:
         )
         self.next_btn.pack(side='right')
         
-        cancel_btn = tk.Button(
+        self.cancel_btn = tk.Button(
             nav_frame,
             text="Cancel",
             command=self.cancel_booking,
@@ -166,7 +184,7 @@ class BookingWizard:
             padx=20,
             pady=8
         )
-        cancel_btn.pack(side='right', padx=10)
+        self.cancel_btn.pack(side='right', padx=10)
     
     def create_customer_tab(self):
         """Create customer details tab."""
@@ -296,6 +314,13 @@ class BookingWizard:
             )
             rb.grid(row=i//2, column=i%2, sticky='w', padx=10, pady=5)
         
+        # Availability for the selected car type and period
+        self.availability_label = tk.Label(frame, text="Checking availability...", font=FONTS['small'], bg=COLORS['card'], fg=COLORS['disabled'])
+        self.availability_label.pack(anchor='w', pady=(5, 0))
+        self.booking_data['car_type'].trace_add('write', lambda *args: self.schedule_availability_update())
+        self.booking_data['days'].trace_add('write', lambda *args: self.schedule_availability_update())
+        self.update_availability()
+        
         # Fuel Type
         tk.Label(frame, text="Fuel Type: *", font=FONTS['label'], bg=COLORS['card'], fg=COLORS['text']).pack(anchor='w', pady=(20, 10))
         
@@ -356,7 +381,7 @@ class BookingWizard:
         
         mileage_check = tk.Checkbutton(
             mileage_inner,
-            text="🌍 Unlimited Mileage (+£10/day)",
+            text=f"🌍 Unlimited Mileage (+£{self.pricing.extra_rate('unlimited_mileage'):g}/day)",
             variable=self.booking_data['unlimited_mileage'],
             font=FONTS['normal'],
             bg=COLORS['card'],
@@ -384,7 +409,7 @@ class BookingWizard:
         
         breakdown_check = tk.Checkbutton(
             breakdown_inner,
-            text="🛡️ Breakdown Cover (+£2/day)",
+            text=f"🛡️ Breakdown Cover (+£{self.pricing.extra_rate('breakdown_cover'):g}/day)",
             variable=self.booking_data['breakdown_cover'],
             font=FONTS['normal'],
             bg=COLORS['card'],
@@ -414,7 +439,7 @@ class BookingWizard:
         note.pack(anchor='w', pady=(20, 0))
     
     def create_summary_tab(self):
-        """Create summary and confirmation tab."""
+        """Create summary and confirmation tab, bound to the summary variables."""
         # Create scrollable frame
         canvas = tk.Canvas(self.tab4, bg=COLORS['card'], highlightthickness=0)
         scrollbar = tk.Scrollbar(self.tab4, orient='vertical', command=canvas.yview)
@@ -431,14 +456,13 @@ class BookingWizard:
         canvas.pack(side='left', fill='both', expand=True)
         scrollbar.pack(side='right', fill='y')
         
-        # Will be populated in update_summary
-        self.price_label = None
-    
-    def update_summary(self):
-        """Update the summary tab with current booking data."""
-        # Clear existing content
-        for widget in self.summary_frame.winfo_children():
-            widget.destroy()
+        # Every changing piece of text is a variable; update_summary only sets them
+        self.summary_vars = {name: tk.StringVar() for name in (
+            'name', 'address', 'age', 'license', 'days', 'car_type', 'fuel_type',
+            'start_date', 'extras', 'base_label', 'base_cost', 'car_label', 'car_surcharge',
+            'fuel_label', 'fuel_surcharge', 'mileage_cost', 'breakdown_cost', 'total',
+        )}
+        v = self.summary_vars
         
         frame = tk.Frame(self.summary_frame, bg=COLORS['card'])
         frame.pack(fill='both', expand=True, padx=PADDING['xlarge'], pady=PADDING['large'])
@@ -454,43 +478,13 @@ class BookingWizard:
         title.pack(anchor='w', pady=(0, PADDING['large']))
         
         # Customer Details Section
-        self.add_summary_section(frame, "👤 Customer Details", [
-            f"Name: {self.booking_data['first_name'].get()} {self.booking_data['surname'].get()}",
-            f"Address: {self.address_text.get('1.0', 'end-1c')}",
-            f"Age: {self.booking_data['age'].get()} years",
-            f"Valid License: {'✓ Yes' if self.booking_data['license_valid'].get() else '✗ No'}"
-        ])
+        self.add_summary_section(frame, "👤 Customer Details", [v['name'], v['address'], v['age'], v['license']])
         
         # Rental Details Section
-        self.add_summary_section(frame, "🚗 Rental Details", [
-            f"Duration: {self.booking_data['days'].get()} days",
-            f"Car Type: {self.booking_data['car_type'].get()}",
-            f"Fuel Type: {self.booking_data['fuel_type'].get()}",
-            f"Start Date: {datetime.now().strftime('%Y-%m-%d')}"
-        ])
+        self.add_summary_section(frame, "🚗 Rental Details", [v['days'], v['car_type'], v['fuel_type'], v['start_date']])
         
         # Extras Section
-        extras = []
-        if self.booking_data['unlimited_mileage'].get():
-            extras.append("✓ Unlimited Mileage")
-        if self.booking_data['breakdown_cover'].get():
-            extras.append("✓ Breakdown Cover")
-        if not extras:
-            extras.append("No extras selected")
-        
-        self.add_summary_section(frame, "🎁 Optional Extras", extras)
-        
-        # Price Calculation
-        days = self.booking_data['days'].get()
-        base_cost = self.base_rate * days
-        car_surcharge = self.car_surcharges[self.booking_data['car_type'].get()]
-        fuel_surcharge = self.fuel_surcharges[self.booking_data['fuel_type'].get()]
-        
-        mileage_cost = (10 * days) if self.booking_data['unlimited_mileage'].get() else 0
-        breakdown_cost = (2 * days) if self.booking_data['breakdown_cover'].get() else 0
-        extras_cost = mileage_cost + breakdown_cost
-        
-        total_cost = base_cost + car_surcharge + fuel_surcharge + extras_cost
+        self.add_summary_section(frame, "🎁 Optional Extras", [v['extras']])
         
         # Price Breakdown
         price_frame = tk.Frame(frame, bg=COLORS['background'], relief='solid', bd=2)
@@ -507,23 +501,24 @@ class BookingWizard:
             fg=COLORS['text']
         ).pack(anchor='w', padx=15, pady=(15, 10))
         
-        # Cost items
-        costs = [
-            (f"Base Cost: £{self.base_rate:.2f} × {days} days", f"£{base_cost:.2f}"),
-            (f"Car Surcharge ({self.booking_data['car_type'].get()})", f"+£{car_surcharge:.2f}"),
-            (f"Fuel Surcharge ({self.booking_data['fuel_type'].get()})", f"+£{fuel_surcharge:.2f}"),
-        ]
-        
-        if mileage_cost > 0:
-            costs.append((f"Unlimited Mileage", f"+£{mileage_cost:.2f}"))
-        if breakdown_cost > 0:
-            costs.append((f"Breakdown Cover", f"+£{breakdown_cost:.2f}"))
-        
-        for label, value in costs:
-            item_frame = tk.Frame(price_inner, bg=COLORS['card'])
-            item_frame.pack(fill='x', padx=30, pady=2)
-            tk.Label(item_frame, text=label, font=FONTS['normal'], bg=COLORS['card'], fg=COLORS['text'], anchor='w').pack(side='left')
-            tk.Label(item_frame, text=value, font=FONTS['normal'], bg=COLORS['card'], fg=COLORS['text'], anchor='e').pack(side='right')
+        # Cost items, on a grid so the extras rows can hide in place
+        costs_frame = tk.Frame(price_inner, bg=COLORS['card'])
+        costs_frame.pack(fill='x', padx=30)
+        costs_frame.columnconfigure(0, weight=1)
+        
+        self.cost_rows = {}
+        for row, (key, label) in enumerate((
+            ('base_cost', v['base_label']),
+            ('car_surcharge', v['car_label']),
+            ('fuel_surcharge', v['fuel_label']),
+            ('mileage_cost', tk.StringVar(value="Unlimited Mileage")),
+            ('breakdown_cost', tk.StringVar(value="Breakdown Cover")),
+        )):
+            label_widget = tk.Label(costs_frame, textvariable=label, font=FONTS['normal'], bg=COLORS['card'], fg=COLORS['text'], anchor='w')
+            value_widget = tk.Label(costs_frame, textvariable=v[key], font=FONTS['normal'], bg=COLORS['card'], fg=COLORS['text'], anchor='e')
+            label_widget.grid(row=row, column=0, sticky='w', pady=2)
+            value_widget.grid(row=row, column=1, sticky='e', pady=2)
+            self.cost_rows[key] = (label_widget, value_widget)
         
         # Separator
         tk.Frame(price_inner, bg=COLORS['border'], height=2).pack(fill='x', padx=30, pady=10)
@@ -532,11 +527,11 @@ class BookingWizard:
         total_frame = tk.Frame(price_inner, bg=COLORS['card'])
         total_frame.pack(fill='x', padx=30, pady=(0, 15))
         tk.Label(total_frame, text="TOTAL:", font=FONTS['subheader'], bg=COLORS['card'], fg=COLORS['text'], anchor='w').pack(side='left')
-        self.price_label = tk.Label(total_frame, text=f"£{total_cost:.2f}", font=('Segoe UI', 20, 'bold'), bg=COLORS['card'], fg=COLORS['success'], anchor='e')
+        self.price_label = tk.Label(total_frame, textvariable=v['total'], font=('Segoe UI', 20, 'bold'), bg=COLORS['card'], fg=COLORS['success'], anchor='e')
         self.price_label.pack(side='right')
         
         # Confirm Button
-        confirm_btn = tk.Button(
+        self.confirm_btn = confirm_btn = tk.Button(
             frame,
             text="✓ Confirm Booking",
             command=self.confirm_booking,
@@ -551,9 +546,106 @@ class BookingWizard:
         confirm_btn.pack(pady=(PADDING['large'], 0))
         confirm_btn.bind('<Enter>', lambda e: confirm_btn.config(bg='#229954'))
         confirm_btn.bind('<Leave>', lambda e: confirm_btn.config(bg=COLORS['success']))
+        
+        self.update_summary()
+    
+    def watch_booking_data(self):
+        """Refresh the summary whenever any booking field changes."""
+        for variable in self.booking_data.values():
+            variable.trace_add('write', lambda *args: self.schedule_summary_update())
+        self.address_text.bind('<<Modified>>', self.on_address_modified)
+    
+    def on_address_modified(self, event):
+        """Refresh the summary after the address text changes."""
+        # Clear the flag so the next edit fires <<Modified>> again
+        self.address_text.edit_modified(False)
+        self.schedule_summary_update()
+    
+    def schedule_summary_update(self):
+        """Update the summary once input settles, however many fields changed."""
+        if self._summary_job is not None:
+            self.window.after_cancel(self._summary_job)
+        self._summary_job = self.window.after(SUMMARY_DEBOUNCE_MS, self.update_summary)
+    
+    def cancel_summary_update(self):
+        """Drop a pending summary update, e.g. before the window closes."""
+        if self._summary_job is not None:
+            self.window.after_cancel(self._summary_job)
+            self._summary_job = None
+    
+    def update_summary(self):
+        """Update the summary variables and price from the current booking data."""
+        self._summary_job = None
+        v = self.summary_vars
+        data = self.booking_data
+        
+        try:
+            age = f"{data['age'].get()} years"
+        except tk.TclError:
+            age = "—"
+        try:
+            days = data['days'].get()
+        except tk.TclError:
+            days = None
+        
+        # Customer Details
+        v['name'].set(f"  • Name: {data['first_name'].get()} {data['surname'].get()}")
+        v['address'].set(f"  • Address: {self.address_text.get('1.0', 'end-1c')}")
+        v['age'].set(f"  • Age: {age}")
+        v['license'].set(f"  • Valid License: {'✓ Yes' if data['license_valid'].get() else '✗ No'}")
+        
+        # Rental Details
+        v['days'].set(f"  • Duration: {days if days is not None else '—'} days")
+        v['car_type'].set(f"  • Car Type: {data['car_type'].get()}")
+        v['fuel_type'].set(f"  • Fuel Type: {data['fuel_type'].get()}")
+        v['start_date'].set(f"  • Start Date: {datetime.now().strftime('%Y-%m-%d')}")
+        
+        # Extras
+        extras = []
+        if data['unlimited_mileage'].get():
+            extras.append("✓ Unlimited Mileage")
+        if data['breakdown_cover'].get():
+            extras.append("✓ Breakdown Cover")
+        v['extras'].set('\n'.join(f"  • {item}" for item in extras or ["No extras selected"]))
+        
+        # Price Breakdown
+        v['car_label'].set(f"Car Surcharge ({data['car_type'].get()})")
+        v['fuel_label'].set(f"Fuel Surcharge ({data['fuel_type'].get()})")
+        try:
+            quote = self.get_quote() if days is not None else None
+        except ValueError:
+            quote = None
+        if quote is None:
+            v['base_label'].set("Base Cost")
+            for key in ('base_cost', 'car_surcharge', 'fuel_surcharge', 'mileage_cost', 'breakdown_cost', 'total'):
+                v[key].set("—")
+            return
+        
+        v['base_label'].set(f"Base Cost: £{quote['daily_rate']:.2f} × {days} days")
+        v['base_cost'].set(f"£{quote['base_cost']:.2f}")
+        v['car_surcharge'].set(f"+£{quote['car_surcharge']:.2f}")
+        v['fuel_surcharge'].set(f"+£{quote['fuel_surcharge']:.2f}")
+        for key in ('mileage_cost', 'breakdown_cost'):
+            v[key].set(f"+£{quote[key]:.2f}")
+            for widget in self.cost_rows[key]:
+                if quote[key] > 0:
+                    widget.grid()
+                else:
+                    widget.grid_remove()
+        v['total'].set(f"£{quote['total_cost']:.2f}")
     
-    def add_summary_section(self, parent, title, items):
-        """Add a section to the summary."""
+    def get_quote(self):
+        """Price the rental currently entered in the wizard."""
+        return self.pricing.quote(
+            self.booking_data['car_type'].get(),
+            self.booking_data['fuel_type'].get(),
+            self.booking_data['days'].get(),
+            self.booking_data['unlimited_mileage'].get(),
+            self.booking_data['breakdown_cover'].get()
+        )
+    
+    def add_summary_section(self, parent, title, variables):
+        """Add a section to the summary with one line per text variable."""
         section = tk.Frame(parent, bg=COLORS['card'])
         section.pack(fill='x', pady=(0, PADDING['medium']))
         
@@ -565,13 +657,14 @@ class BookingWizard:
             fg=COLORS['text']
         ).pack(anchor='w', pady=(0, 5))
         
-        for item in items:
+        for variable in variables:
             tk.Label(
                 section,
-                text=f"  • {item}",
+                textvariable=variable,
                 font=FONTS['normal'],
                 bg=COLORS['card'],
-                fg=COLORS['disabled']
+                fg=COLORS['disabled'],
+                justify='left'
             ).pack(anchor='w', pady=2)
     
     def update_days_label(self):
@@ -579,32 +672,98 @@ class BookingWizard:
         days = self.booking_data['days'].get()
         self.days_value_label.config(text=f"{days} day{'s' if days > 1 else ''}")
     
+    def schedule_availability_update(self):
+        """Recheck availability once the slider or car choice settles."""
+        if self._availability_job is not None:
+            self.window.after_cancel(self._availability_job)
+        self._availability_job = self.window.after(AVAILABILITY_DEBOUNCE_MS, self.update_availability)
+    
+    def cancel_availability_update(self):
+        """Drop a pending availability check and ignore a running one, e.g. on close."""
+        if self._availability_job is not None:
+            self.window.after_cancel(self._availability_job)
+            self._availability_job = None
+        self._availability_generation += 1
+    
+    def update_availability(self):
+        """Check the selected car type for the rental period on the availability thread."""
+        self._availability_job = None
+        try:
+            days = self.booking_data['days'].get()
+        except tk.TclError:
+            return
+        car_type = self.booking_data['car_type'].get()
+        
+        self._availability_generation += 1
+        future = self.availability_executor.submit(self.check_availability, car_type, days, datetime.now())
+        self.window.after(AVAILABILITY_POLL_MS, self.show_availability, future, self._availability_generation)
+    
+    def check_availability(self, car_type, days, start):
+        """Return the availability text and colour for a rental; runs on the availability thread."""
+        try:
+            free = self.database.count_available(
+                car_type,
+                start.strftime('%Y-%m-%d'),
+                (start + timedelta(days=days)).strftime('%Y-%m-%d')
+            )
+            if free > 0:
+                text = f"✓ {free} {car_type}{'s' if free != 1 else ''} available for these dates"
+                color = COLORS['success']
+            else:
+                next_date = self.database.first_available_date(car_type, days, start.strftime('%Y-%m-%d'))
+                text = f"✗ No {car_type} available for these dates"
+                if next_date:
+                    text += f" (next free from {next_date})"
+                color = COLORS['error']
+        except Exception as e:
+            text = f"Availability unknown: {e}"
+            color = COLORS['disabled']
+        return text, color
+    
+    def show_availability(self, future, generation):
+        """Poll a running availability check and show its result if it is still the newest."""
+        if generation != self._availability_generation:
+            return
+        if not future.done():
+            self.window.after(AVAILABILITY_POLL_MS, self.show_availability, future, generation)
+            return
+        text, color = future.result()
+        self.availability_label.config(text=text, fg=color)
+    
     def validate_customer_details(self):
         """Validate customer details before proceeding."""
-        if not self.booking_data['first_name'].get().strip():
-            messagebox.showerror("Validation Error", "Please enter first name.", parent=self.window)
-            self.first_name_entry.config(bg='#ffcccc')
-            return False
-        
-        if not self.booking_data['surname'].get().strip():
-            messagebox.showerror("Validation Error", "Please enter surname.", parent=self.window)
-            self.surname_entry.config(bg='#ffcccc')
-            return False
-        
         address = self.address_text.get('1.0', 'end-1c').strip()
-        if not address:
-            messagebox.showerror("Validation Error", "Please enter address.", parent=self.window)
-            self.address_text.config(bg='#ffcccc')
-            return False
+        try:
+            age = self.booking_data['age'].get()
+        except tk.TclError:
+            age = None
+        
+        errors = validate_customer_details(
+            self.booking_data['first_name'].get(),
+            self.booking_data['surname'].get(),
+            address,
+            age,
+            self.booking_data['license_valid'].get()
+        )
         
-        if not self.booking_data['license_valid'].get():
-            messagebox.showerror("Validation Error", "Customer must have a valid driving license.", parent=self.window)
+        if errors:
+            field, message = errors[0]
+            messagebox.showerror("Validation Error", message, parent=self.window)
+            widget = {
+                'first_name': self.first_name_entry,
+                'surname': self.surname_entry,
+                'address': self.address_text,
+                'age': self.age_spinbox,
+            }.get(field)
+            if widget is not None:
+                widget.config(bg='#ffcccc')
             return False
         
         # Reset backgrounds if validation passes
         self.first_name_entry.config(bg='white')
         self.surname_entry.config(bg='white')
         self.address_text.config(bg='white')
+        self.age_spinbox.config(bg='white')
         
         # Store address in booking data
         self.booking_data['address'].set(address)
@@ -633,7 +792,9 @@ class BookingWizard:
     def on_tab_changed(self, event):
         """Handle tab change event."""
         current = self.notebook.index(self.notebook.select())
-        if current == 3:  # Summary tab
+        if current == 3 and self._summary_job is not None:  # Summary tab
+            # Show any change still waiting out the debounce straight away
+            self.cancel_summary_update()
             self.update_summary()
         self.update_navigation_buttons()
     
@@ -654,64 +815,85 @@ class BookingWizard:
             self.next_btn.config(state='normal')
     
     def confirm_booking(self):
-        """Confirm and save the booking."""
+        """Queue the booking for saving and wait for it without blocking the UI."""
         # Validate all data
         if not self.validate_customer_details():
             self.notebook.select(0)
             return
         
         try:
-            # Add customer to database
-            customer_id = self.database.add_customer(
+            # Calculate costs
+            days = self.booking_data['days'].get()
+            quote = self.get_quote()
+            
+            # Add customer and booking in one transaction on the writer thread
+            future = self.database.submit_write(
+                'create_booking',
                 self.booking_data['first_name'].get(),
                 self.booking_data['surname'].get(),
                 self.booking_data['address'].get(),
                 self.booking_data['age'].get(),
-                1 if self.booking_data['license_valid'].get() else 0
-            )
-            
-            # Calculate costs
-            days = self.booking_data['days'].get()
-            base_cost = self.base_rate * days
-            car_surcharge = self.car_surcharges[self.booking_data['car_type'].get()]
-            fuel_surcharge = self.fuel_surcharges[self.booking_data['fuel_type'].get()]
-            
-            mileage_cost = (10 * days) if self.booking_data['unlimited_mileage'].get() else 0
-            breakdown_cost = (2 * days) if self.booking_data['breakdown_cover'].get() else 0
-            extras_cost = mileage_cost + breakdown_cost
-            
-            total_cost = base_cost + car_surcharge + fuel_surcharge + extras_cost
-            
-            # Add booking to database
-            booking_id = self.database.add_booking(
-                customer_id,
-                f"{self.booking_data['first_name'].get()} {self.booking_data['surname'].get()}",
+                1 if self.booking_data['license_valid'].get() else 0,
                 self.booking_data['car_type'].get(),
                 self.booking_data['fuel_type'].get(),
                 days,
                 1 if self.booking_data['unlimited_mileage'].get() else 0,
                 1 if self.booking_data['breakdown_cover'].get() else 0,
-                base_cost,
-                car_surcharge,
-                fuel_surcharge,
-                extras_cost,
-                total_cost,
+                quote['base_cost'],
+                quote['car_surcharge'],
+                quote['fuel_surcharge'],
+                quote['extras_cost'],
+                quote['total_cost'],
                 datetime.now().strftime('%Y-%m-%d')
             )
+        except Exception as e:
+            messagebox.showerror(
+                "Error",
+                f"Failed to create booking: {str(e)}",
+                parent=self.window
+            )
+            return
+        
+        # The booking commits whatever happens now, so the window stays open to report it
+        self._saving = True
+        self.confirm_btn.config(state='disabled', text="Saving...")
+        self.cancel_btn.config(state='disabled')
+        self.window.after(CONFIRM_POLL_MS, self.check_confirmation, future, quote, days)
+    
+    def check_confirmation(self, future, quote, days):
+        """Poll the queued booking and report the outcome once it has committed."""
+        if not self.window.winfo_exists():
+            return
+        if not future.done():
+            self.window.after(CONFIRM_POLL_MS, self.check_confirmation, future, quote, days)
+            return
+        
+        self._saving = False
+        self.confirm_btn.config(state='normal', text="✓ Confirm Booking")
+        self.cancel_btn.config(state='normal')
+        try:
+            customer_id, booking_id = future.result()
             
             # Success message
             messagebox.showinfo(
                 "Booking Confirmed!",
                 f"Booking #{booking_id} has been successfully created!\n\n"
                 f"Customer: {self.booking_data['first_name'].get()} {self.booking_data['surname'].get()}\n"
-                f"Total Cost: £{total_cost:.2f}\n"
+                f"Total Cost: £{quote['total_cost']:.2f}\n"
                 f"Duration: {days} days",
                 parent=self.window
             )
             
+            self.cancel_summary_update()
+            self.cancel_availability_update()
+            self.availability_executor.shutdown(wait=False)
             self.window.destroy()
             self.on_complete()
             
+        except VehicleUnavailableError as e:
+            messagebox.showerror("Car Unavailable", str(e), parent=self.window)
+            self.notebook.select(1)
+            
         except Exception as e:
             messagebox.showerror(
                 "Error",
@@ -721,5 +903,10 @@ class BookingWizard:
     
     def cancel_booking(self):
         """Cancel the booking process."""
+        if self._saving:
+            return
         if messagebox.askyesno("Cancel Booking", "Are you sure you want to cancel this booking?", parent=self.window):
+            self.cancel_summary_update()
+            self.cancel_availability_update()
+            self.availability_executor.shutdown(wait=False)
             self.window.destroy()
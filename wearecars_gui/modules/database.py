@@ -4,98 +4,1316 @@ WeAreCars Car Rental System
 """
 
 import sqlite3
+import csv
 import os
-from datetime import datetime, timedelta
+import queue
+import re
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta
 import random
+from modules.availability import AvailabilityIndex, from_day, to_day
+from modules.pricing import PricingEngine
+from modules.storage import (
+    ACTIVE, CAR_TYPE_CODES, FUEL_TYPE_CODES, STATUS_CODES, CategoryCodes,
+    day_to_text, decode_booking_row, pence_to_text, text_to_day, text_to_seconds, to_pence
+)
+from modules.tracing import SLOW_QUERY_MS, SQLTracer, TracedConnection
+from modules.validation import validate_customer_details, validate_rental_details
+
+# Schema version recorded in PRAGMA user_version once every migration is applied
+SCHEMA_VERSION = 10
+
+# Rows fetched per keyset page when streaming bookings
+BOOKING_PAGE_SIZE = 500
+
+# Newest full-text matches ranked by relevance in search_bookings; broad terms
+# like 'London' match tens of thousands of bookings, and ranking every one
+# of them costs hundreds of milliseconds
+SEARCH_RANK_CANDIDATES = 5000
+
+# Largest SQLite rowid, used as the open upper bound of the first page
+MAX_ROWID = 2 ** 63 - 1
+
+# Sortable booking columns: sort key -> stored column, each led by an index.
+# Ties are broken by id; categories sort in catalogue (code) order.
+BOOKING_SORT_COLUMNS = {
+    'id': 'id',
+    'customer': 'customer_name',
+    'car_type': 'car_type_code',
+    'fuel_type': 'fuel_type_code',
+    'days': 'days',
+    'total': 'total_pence',
+    'booking_date': 'booked_at',
+    'start_date': 'start_day',
+    'end_date': 'end_day',
+    'status': 'status_code',
+}
+
+# Sorts that follow a filtered column, so walking them past that filter finds
+# no matches for long stretches (prices follow car and fuel type); the
+# planner serves these through the filter's index or a composite one
+CORRELATED_SORTS = {
+    'car_type': ('total',),
+    'fuel_type': ('total',),
+    'start_from': ('id', 'booking_date', 'start_date', 'end_date'),
+    'start_to': ('id', 'booking_date', 'start_date', 'end_date'),
+}
+
+# Most sort index rows walked looking for filter matches before the filter's
+# own index is used instead
+SORT_WALK_ROWS = 5000
+
+# Columns a booking export can choose from: key -> (CSV heading, SQL over
+# bookings b and customers c, decoder). Decoders turn stored values into
+# text in Python ('day', 'pence', or the category names); None means SQL
+# already did.
+EXPORT_COLUMNS = {
+    'id': ('ID', 'b.id', None),
+    'customer_id': ('Customer ID', 'b.customer_id', None),
+    'customer_name': ('Customer Name', 'b.customer_name', None),
+    'first_name': ('First Name', 'c.first_name', None),
+    'surname': ('Surname', 'c.surname', None),
+    'address': ('Address', 'c.address', None),
+    'age': ('Age', 'c.age', None),
+    'license_valid': ('License Valid', 'c.license_valid', None),
+    'car_type': ('Car Type', 'b.car_type_code', 'car_type'),
+    'fuel_type': ('Fuel Type', 'b.fuel_type_code', 'fuel_type'),
+    'days': ('Days', 'b.days', None),
+    'unlimited_mileage': ('Unlimited Mileage', 'b.unlimited_mileage', None),
+    'breakdown_cover': ('Breakdown Cover', 'b.breakdown_cover', None),
+    'base_cost': ('Base Cost', 'b.base_pence', 'pence'),
+    'car_surcharge': ('Car Surcharge', 'b.car_surcharge_pence', 'pence'),
+    'fuel_surcharge': ('Fuel Surcharge', 'b.fuel_surcharge_pence', 'pence'),
+    'extras_cost': ('Extras Cost', 'b.extras_pence', 'pence'),
+    'total_cost': ('Total Cost', 'b.total_pence', 'pence'),
+    'booking_date': ('Booking Date', "datetime(b.booked_at, 'unixepoch')", None),
+    'start_date': ('Start Date', 'b.start_day', 'day'),
+    'end_date': ('End Date', 'b.end_day', 'day'),
+    'status': ('Status', 'b.status_code', 'status'),
+}
+
+# The same decoders in SQL, for exports SQLite renders as JSON itself
+EXPORT_SQL_DECODERS = {
+    'day': "date({} * 86400, 'unixepoch')",
+    'pence': "printf('%.2f', {} / 100.0)",
+    'car_type': '(SELECT name FROM car_types WHERE code = {})',
+    'fuel_type': '(SELECT name FROM fuel_types WHERE code = {})',
+    'status': '(SELECT name FROM booking_statuses WHERE code = {})',
+}
+
+# The list columns, exported when no columns are chosen
+DEFAULT_EXPORT_COLUMNS = (
+    'id', 'customer_name', 'car_type', 'fuel_type', 'days', 'total_cost',
+    'booking_date', 'start_date', 'end_date', 'status',
+)
+
+# Rows per fetchmany call while streaming an export
+EXPORT_CHUNK_SIZE = 5000
+
+# Durability profiles: journal mode, fsync level and WAL checkpoint policy.
+# 'safe' survives power loss, 'balanced' survives application crashes,
+# 'fast' trades crash safety for throughput (bulk loads, scratch copies).
+DURABILITY_PROFILES = {
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'wal_autocheckpoint': 1000,
+        'checkpoint_on_close': 'TRUNCATE',
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'wal_autocheckpoint': 1000,
+        'checkpoint_on_close': 'PASSIVE',
+    },
+    'fast': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'wal_autocheckpoint': 10000,
+        'checkpoint_on_close': 'PASSIVE',
+    },
+}
+DEFAULT_DURABILITY = 'balanced'
+
+# Rows per executemany batch during a bulk import
+IMPORT_BATCH_SIZE = 20000
+
+# CSV columns a bulk import file must provide; booking_date and status are optional
+IMPORT_COLUMNS = (
+    'first_name', 'surname', 'address', 'age', 'license_valid',
+    'car_type', 'fuel_type', 'days', 'unlimited_mileage', 'breakdown_cover',
+    'start_date',
+)
+
+# Optional CSV cost columns; rows that leave them all blank are priced at current rates
+IMPORT_COST_COLUMNS = ('base_cost', 'car_surcharge', 'fuel_surcharge', 'extras_cost', 'total_cost')
+
+
+def recompute_booking_stats(cursor):
+    """Recompute the statistics summary tables from the bookings table."""
+    cursor.execute('DELETE FROM booking_stats')
+    cursor.execute(f'''
+        INSERT INTO booking_stats (id, total_bookings, total_revenue_pence, active_bookings)
+        SELECT 1, COUNT(*), COALESCE(SUM(total_pence), 0),
+               COUNT(CASE WHEN status_code = {ACTIVE} THEN 1 END)
+        FROM bookings
+    ''')
+    cursor.execute('DELETE FROM car_type_stats')
+    cursor.execute('''
+        INSERT INTO car_type_stats (car_type_code, bookings)
+        SELECT car_type_code, COUNT(*)
+        FROM bookings
+        GROUP BY car_type_code
+    ''')
+
+
+# Write-behind group commit: most writes per transaction, and how long the
+# writer thread waits for more once it has one (seconds)
+WRITE_BATCH_SIZE = 64
+WRITE_BATCH_WAIT = 0.0
+
+# Cars of each type in the fleet unless the cars table says otherwise
+DEFAULT_FLEET_SIZE = 10
+
+# How far ahead to look for the next free date (days)
+AVAILABILITY_HORIZON = 365
+
+# Default cars catalogue: (car_type, daily_rate, surcharge, available, description)
+CARS_CATALOGUE = (
+    ('City Car', 25.0, 0.0, 1, 'Perfect for urban driving'),
+    ('Family Car', 25.0, 50.0, 1, 'Spacious and comfortable'),
+    ('Sports Car', 25.0, 75.0, 1, 'High performance vehicle'),
+    ('SUV', 25.0, 65.0, 1, 'All-terrain capability'),
+)
+
+# Default fuel surcharges (per rental) and extras (per day)
+FUEL_SURCHARGES = {'Petrol': 0.0, 'Diesel': 0.0, 'Hybrid': 30.0, 'Electric': 50.0}
+EXTRAS_CATALOGUE = (
+    ('unlimited_mileage', 10.0, 'Unlimited Mileage'),
+    ('breakdown_cover', 2.0, 'Breakdown Cover'),
+)
+
+# Time allowed to open the database and load the first bookings page (ms)
+STARTUP_BUDGET_MS = 250
+
+# Environment variable that turns on SQL tracing; its value is the slow-query threshold in ms
+SQL_TRACE_ENV = 'WEARECARS_SQL_TRACE'
+
+# Public Database methods that are plumbing rather than operations, so never timed
+UNTRACED_METHODS = ('connect', 'read_session', 'write_session', 'trace_report', 'format_trace_report')
+
+
+# Booking updates and deletes remembered for incremental refresh; older ones are pruned
+BOOKING_CHANGE_LOG_SIZE = 10000
+
+
+class VehicleUnavailableError(Exception):
+    """Raised when no car of the requested type is free for the whole rental."""
+    
+    def __init__(self, car_type, start_date, end_date, next_free_date=None):
+        self.car_type = car_type
+        self.start_date = start_date
+        self.end_date = end_date
+        self.next_free_date = next_free_date
+        message = f"No {car_type} is available from {start_date} to {end_date}."
+        if next_free_date:
+            message += f" The next {car_type} is free from {next_free_date}."
+        super().__init__(message)
+
+
+class QueryCancelledError(Exception):
+    """Raised when a read is abandoned because its cancel event was set."""
+
+
+# SQLite virtual machine steps between checks of a read's cancel event
+CANCEL_CHECK_STEPS = 1000
+
+
+# Bookings in the compact layout: epoch days and seconds, pence, category codes
+COMPACT_BOOKINGS_TABLE = '''
+    CREATE TABLE IF NOT EXISTS {name} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        customer_id INTEGER NOT NULL,
+        customer_name TEXT NOT NULL,
+        car_type_code INTEGER NOT NULL REFERENCES car_types (code),
+        fuel_type_code INTEGER NOT NULL REFERENCES fuel_types (code),
+        days INTEGER NOT NULL,
+        unlimited_mileage INTEGER NOT NULL DEFAULT 0,
+        breakdown_cover INTEGER NOT NULL DEFAULT 0,
+        base_pence INTEGER NOT NULL,
+        car_surcharge_pence INTEGER NOT NULL,
+        fuel_surcharge_pence INTEGER NOT NULL,
+        extras_pence INTEGER NOT NULL,
+        total_pence INTEGER NOT NULL,
+        booked_at INTEGER NOT NULL,
+        start_day INTEGER NOT NULL,
+        end_day INTEGER NOT NULL,
+        status_code INTEGER NOT NULL DEFAULT {active} REFERENCES booking_statuses (code),
+        FOREIGN KEY (customer_id) REFERENCES customers (id)
+    )
+'''
+
+# Indexes, triggers and summary tables that depend on the compact bookings layout
+COMPACT_BOOKINGS_SCHEMA = (
+    'CREATE INDEX IF NOT EXISTS idx_bookings_customer_name ON bookings (customer_name)',
+    'CREATE INDEX IF NOT EXISTS idx_bookings_status ON bookings (status_code)',
+    'CREATE INDEX IF NOT EXISTS idx_bookings_car_type ON bookings (car_type_code)',
+    'CREATE INDEX IF NOT EXISTS idx_bookings_dates ON bookings (start_day, end_day)',
+    'CREATE INDEX IF NOT EXISTS idx_bookings_customer_id ON bookings (customer_id)',
+    f'CREATE INDEX IF NOT EXISTS idx_bookings_active ON bookings (id) WHERE status_code = {ACTIVE}',
+    f'''
+        CREATE INDEX IF NOT EXISTS idx_bookings_active_periods
+        ON bookings (car_type_code, start_day, end_day) WHERE status_code = {ACTIVE}
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS bookings_fts_insert AFTER INSERT ON bookings
+        BEGIN
+            INSERT INTO bookings_fts (rowid, customer_name, address, car_type, fuel_type)
+            VALUES (new.id, new.customer_name,
+                    COALESCE((SELECT address FROM customers WHERE id = new.customer_id), ''),
+                    (SELECT name FROM car_types WHERE code = new.car_type_code),
+                    (SELECT name FROM fuel_types WHERE code = new.fuel_type_code));
+        END
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS bookings_fts_update
+        AFTER UPDATE OF id, customer_id, customer_name, car_type_code, fuel_type_code ON bookings
+        BEGIN
+            DELETE FROM bookings_fts WHERE rowid = old.id;
+            INSERT INTO bookings_fts (rowid, customer_name, address, car_type, fuel_type)
+            VALUES (new.id, new.customer_name,
+                    COALESCE((SELECT address FROM customers WHERE id = new.customer_id), ''),
+                    (SELECT name FROM car_types WHERE code = new.car_type_code),
+                    (SELECT name FROM fuel_types WHERE code = new.fuel_type_code));
+        END
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS bookings_fts_delete AFTER DELETE ON bookings
+        BEGIN
+            DELETE FROM bookings_fts WHERE rowid = old.id;
+        END
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE OF address ON customers
+        BEGIN
+            UPDATE bookings_fts SET address = new.address
+            WHERE rowid IN (SELECT id FROM bookings WHERE customer_id = new.id);
+        END
+    ''',
+    '''
+        CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers
+        BEGIN
+            UPDATE bookings_fts SET address = ''
+            WHERE rowid IN (SELECT id FROM bookings WHERE customer_id = old.id);
+        END
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS booking_stats (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            total_bookings INTEGER NOT NULL DEFAULT 0,
+            total_revenue_pence INTEGER NOT NULL DEFAULT 0,
+            active_bookings INTEGER NOT NULL DEFAULT 0
+        )
+    ''',
+    '''
+        CREATE TABLE IF NOT EXISTS car_type_stats (
+            car_type_code INTEGER PRIMARY KEY,
+            bookings INTEGER NOT NULL DEFAULT 0
+        )
+    ''',
+    f'''
+        CREATE TRIGGER IF NOT EXISTS booking_stats_insert AFTER INSERT ON bookings
+        BEGIN
+            UPDATE booking_stats
+            SET total_bookings = total_bookings + 1,
+                total_revenue_pence = total_revenue_pence + new.total_pence,
+                active_bookings = active_bookings + (new.status_code = {ACTIVE})
+            WHERE id = 1;
+            INSERT INTO car_type_stats (car_type_code, bookings) VALUES (new.car_type_code, 1)
+            ON CONFLICT (car_type_code) DO UPDATE SET bookings = bookings + 1;
+        END
+    ''',
+    f'''
+        CREATE TRIGGER IF NOT EXISTS booking_stats_update
+        AFTER UPDATE OF total_pence, status_code, car_type_code ON bookings
+        BEGIN
+            UPDATE booking_stats
+            SET total_revenue_pence = total_revenue_pence - old.total_pence + new.total_pence,
+                active_bookings = active_bookings - (old.status_code = {ACTIVE}) + (new.status_code = {ACTIVE})
+            WHERE id = 1;
+            UPDATE car_type_stats SET bookings = bookings - 1 WHERE car_type_code = old.car_type_code;
+            INSERT INTO car_type_stats (car_type_code, bookings) VALUES (new.car_type_code, 1)
+            ON CONFLICT (car_type_code) DO UPDATE SET bookings = bookings + 1;
+        END
+    ''',
+    f'''
+        CREATE TRIGGER IF NOT EXISTS booking_stats_delete AFTER DELETE ON bookings
+        BEGIN
+            UPDATE booking_stats
+            SET total_bookings = total_bookings - 1,
+                total_revenue_pence = total_revenue_pence - old.total_pence,
+                active_bookings = active_bookings - (old.status_code = {ACTIVE})
+            WHERE id = 1;
+            UPDATE car_type_stats SET bookings = bookings - 1 WHERE car_type_code = old.car_type_code;
+        END
+    ''',
+)
+
+
+def compact_bookings_storage(cursor):
+    """Rebuild bookings in the compact layout, keeping every id (migration 5)."""
+    # Category lookup tables, seeded with the canonical codes plus any
+    # names already present in the data
+    for table, codes, column, default in (
+        ('car_types', CAR_TYPE_CODES, 'car_type', None),
+        ('fuel_types', FUEL_TYPE_CODES, 'fuel_type', None),
+        ('booking_statuses', STATUS_CODES, 'status', 'Active'),
+    ):
+        cursor.execute(f'CREATE TABLE IF NOT EXISTS {table} (code INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE)')
+        cursor.executemany(
+            f'INSERT OR IGNORE INTO {table} (code, name) VALUES (?, ?)',
+            [(code, name) for name, code in codes.items()]
+        )
+        source = f"COALESCE({column}, '{default}')" if default else column
+        cursor.execute(f'INSERT OR IGNORE INTO {table} (name) SELECT DISTINCT {source} FROM bookings')
+    
+    cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'bookings'")
+    row = cursor.fetchone()
+    last_booking_id = row[0] if row else 0
+    
+    # Every trigger and bookings index is recreated for the new layout
+    cursor.execute('''
+        SELECT type, name FROM sqlite_master
+        WHERE (type = 'trigger' OR (type = 'index' AND tbl_name = 'bookings')) AND sql IS NOT NULL
+    ''')
+    for kind, name in cursor.fetchall():
+        cursor.execute(f'DROP {kind.upper()} "{name}"')
+    
+    cursor.execute(COMPACT_BOOKINGS_TABLE.format(name='bookings_compact', active=ACTIVE))
+    cursor.execute('''
+        INSERT INTO bookings_compact (id, customer_id, customer_name, car_type_code, fuel_type_code,
+                                      days, unlimited_mileage, breakdown_cover, base_pence,
+                                      car_surcharge_pence, fuel_surcharge_pence, extras_pence,
+                                      total_pence, booked_at, start_day, end_day, status_code)
+        SELECT b.id, b.customer_id, b.customer_name, ct.code, ft.code,
+               b.days, COALESCE(b.unlimited_mileage, 0), COALESCE(b.breakdown_cover, 0),
+               CAST(ROUND(b.base_cost * 100) AS INTEGER),
+               CAST(ROUND(b.car_surcharge * 100) AS INTEGER),
+               CAST(ROUND(b.fuel_surcharge * 100) AS INTEGER),
+               CAST(ROUND(b.extras_cost * 100) AS INTEGER),
+               CAST(ROUND(b.total_cost * 100) AS INTEGER),
+               CAST(strftime('%s', b.booking_date) AS INTEGER),
+               CAST(julianday(b.start_date) - 2440587.5 AS INTEGER),
+               CAST(julianday(b.end_date) - 2440587.5 AS INTEGER),
+               st.code
+        FROM bookings b
+        JOIN car_types ct ON ct.name = b.car_type
+        JOIN fuel_types ft ON ft.name = b.fuel_type
+        JOIN booking_statuses st ON st.name = COALESCE(b.status, 'Active')
+        ORDER BY b.id
+    ''')
+    cursor.execute('DROP TABLE bookings')
+    cursor.execute('ALTER TABLE bookings_compact RENAME TO bookings')
+    cursor.execute(
+        "UPDATE sqlite_sequence SET seq = MAX(seq, ?) WHERE name = 'bookings'",
+        (last_booking_id,)
+    )
+    
+    cursor.execute('DROP TABLE IF EXISTS booking_stats')
+    cursor.execute('DROP TABLE IF EXISTS car_type_stats')
+    for statement in COMPACT_BOOKINGS_SCHEMA:
+        cursor.execute(statement)
+    recompute_booking_stats(cursor)
+
+
+def seed_cars_catalogue(cursor):
+    """Add the default cars catalogue to a file that has no cars yet (migration 6)."""
+    cursor.execute('SELECT COUNT(*) FROM cars')
+    if cursor.fetchone()[0] == 0:
+        cursor.executemany(
+            'INSERT INTO cars (car_type, daily_rate, surcharge, available, description) VALUES (?, ?, ?, ?, ?)',
+            CARS_CATALOGUE
+        )
+
+
+def seed_rate_tables(cursor):
+    """Give fuel types a surcharge and add the extras price list (migration 7)."""
+    cursor.execute('ALTER TABLE fuel_types ADD COLUMN surcharge REAL NOT NULL DEFAULT 0')
+    cursor.executemany(
+        'UPDATE fuel_types SET surcharge = ? WHERE name = ?',
+        [(surcharge, name) for name, surcharge in FUEL_SURCHARGES.items()]
+    )
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS extras (
+            name TEXT PRIMARY KEY,
+            daily_rate REAL NOT NULL,
+            description TEXT
+        )
+    ''')
+    cursor.executemany(
+        'INSERT OR IGNORE INTO extras (name, daily_rate, description) VALUES (?, ?, ?)',
+        EXTRAS_CATALOGUE
+    )
+
+
+def customer_identity_key(first_name, surname, address):
+    """Return the key that identifies a customer: name and address, case- and whitespace-folded."""
+    return '|'.join(' '.join((part or '').split()).casefold() for part in (first_name, surname, address))
+
+
+def merge_duplicate_customers(cursor):
+    """Fold customers sharing an identity key into the oldest of them.
+    
+    Fills in missing identity keys first. Each survivor keeps its id and
+    created_date and takes the latest age and licence status; bookings of
+    the merged rows move to the survivor. Returns how many rows were merged.
+    """
+    cursor.execute('SELECT id, first_name, surname, address FROM customers WHERE identity_key IS NULL')
+    cursor.executemany(
+        'UPDATE customers SET identity_key = ? WHERE id = ?',
+        [(customer_identity_key(first, last, address), customer_id)
+         for customer_id, first, last, address in cursor.fetchall()]
+    )
+    
+    cursor.execute('DROP TABLE IF EXISTS temp.customer_merge')
+    cursor.execute('''
+        CREATE TEMP TABLE customer_merge (
+            id INTEGER PRIMARY KEY,
+            survivor INTEGER NOT NULL
+        )
+    ''')
+    cursor.execute('''
+        INSERT INTO customer_merge (id, survivor)
+        SELECT c.id, g.survivor
+        FROM customers c
+        JOIN (SELECT identity_key, MIN(id) AS survivor
+              FROM customers
+              GROUP BY identity_key
+              HAVING COUNT(*) > 1) g ON g.identity_key = c.identity_key
+        WHERE c.id <> g.survivor
+    ''')
+    merged = cursor.rowcount
+    
+    if merged:
+        cursor.execute('''
+            UPDATE customers
+            SET (age, license_valid) = (SELECT d.age, d.license_valid FROM customers d
+                                        WHERE d.identity_key = customers.identity_key
+                                        ORDER BY d.id DESC LIMIT 1)
+            WHERE id IN (SELECT survivor FROM customer_merge)
+        ''')
+        cursor.execute('''
+            UPDATE bookings
+            SET customer_id = (SELECT survivor FROM customer_merge m WHERE m.id = bookings.customer_id)
+            WHERE customer_id IN (SELECT id FROM customer_merge)
+        ''')
+        cursor.execute('DELETE FROM customers WHERE id IN (SELECT id FROM customer_merge)')
+    
+    cursor.execute('DROP TABLE temp.customer_merge')
+    return merged
+
+
+def index_customer_identity(cursor):
+    """Key customers by identity and merge the duplicates already stored (migration 8)."""
+    cursor.execute('ALTER TABLE customers ADD COLUMN identity_key TEXT')
+    merge_duplicate_customers(cursor)
+    cursor.execute('CREATE UNIQUE INDEX IF NOT EXISTS idx_customers_identity ON customers (identity_key)')
+
+
+# Ordered schema migrations: (version, description, steps).
+# Each step is either a SQL statement or a callable taking the cursor.
+MIGRATIONS = [
+    (1, 'Secondary indexes on bookings', (
+        'CREATE INDEX IF NOT EXISTS idx_bookings_customer_name ON bookings (customer_name)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_status ON bookings (status)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_car_type ON bookings (car_type)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_dates ON bookings (start_date, end_date)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_customer_id ON bookings (customer_id)',
+        "CREATE INDEX IF NOT EXISTS idx_bookings_active ON bookings (id) WHERE status = 'Active'",
+    )),
+    (2, 'Full-text search index over booking and customer text', (
+        '''
+            CREATE VIRTUAL TABLE IF NOT EXISTS bookings_fts USING fts5 (
+                customer_name, address, car_type, fuel_type,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS bookings_fts_insert AFTER INSERT ON bookings
+            BEGIN
+                INSERT INTO bookings_fts (rowid, customer_name, address, car_type, fuel_type)
+                VALUES (new.id, new.customer_name,
+                        COALESCE((SELECT address FROM customers WHERE id = new.customer_id), ''),
+                        new.car_type, new.fuel_type);
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS bookings_fts_update
+            AFTER UPDATE OF id, customer_id, customer_name, car_type, fuel_type ON bookings
+            BEGIN
+                DELETE FROM bookings_fts WHERE rowid = old.id;
+                INSERT INTO bookings_fts (rowid, customer_name, address, car_type, fuel_type)
+                VALUES (new.id, new.customer_name,
+                        COALESCE((SELECT address FROM customers WHERE id = new.customer_id), ''),
+                        new.car_type, new.fuel_type);
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS bookings_fts_delete AFTER DELETE ON bookings
+            BEGIN
+                DELETE FROM bookings_fts WHERE rowid = old.id;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE OF address ON customers
+            BEGIN
+                UPDATE bookings_fts SET address = new.address
+                WHERE rowid IN (SELECT id FROM bookings WHERE customer_id = new.id);
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers
+            BEGIN
+                UPDATE bookings_fts SET address = ''
+                WHERE rowid IN (SELECT id FROM bookings WHERE customer_id = old.id);
+            END
+        ''',
+        'DELETE FROM bookings_fts',
+        '''
+            INSERT INTO bookings_fts (rowid, customer_name, address, car_type, fuel_type)
+            SELECT b.id, b.customer_name, COALESCE(c.address, ''), b.car_type, b.fuel_type
+            FROM bookings b
+            LEFT JOIN customers c ON c.id = b.customer_id
+        ''',
+    )),
+    (3, 'Trigger-maintained booking statistics', (
+        '''
+            CREATE TABLE IF NOT EXISTS booking_stats (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total_bookings INTEGER NOT NULL DEFAULT 0,
+                total_revenue REAL NOT NULL DEFAULT 0,
+                active_bookings INTEGER NOT NULL DEFAULT 0
+            )
+        ''',
+        '''
+            CREATE TABLE IF NOT EXISTS car_type_stats (
+                car_type TEXT PRIMARY KEY,
+                bookings INTEGER NOT NULL DEFAULT 0
+            )
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS booking_stats_insert AFTER INSERT ON bookings
+            BEGIN
+                UPDATE booking_stats
+                SET total_bookings = total_bookings + 1,
+                    total_revenue = total_revenue + new.total_cost,
+                    active_bookings = active_bookings + (new.status = 'Active')
+                WHERE id = 1;
+                INSERT INTO car_type_stats (car_type, bookings) VALUES (new.car_type, 1)
+                ON CONFLICT (car_type) DO UPDATE SET bookings = bookings + 1;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS booking_stats_update
+            AFTER UPDATE OF total_cost, status, car_type ON bookings
+            BEGIN
+                UPDATE booking_stats
+                SET total_revenue = total_revenue - old.total_cost + new.total_cost,
+                    active_bookings = active_bookings - (old.status = 'Active') + (new.status = 'Active')
+                WHERE id = 1;
+                UPDATE car_type_stats SET bookings = bookings - 1 WHERE car_type = old.car_type;
+                INSERT INTO car_type_stats (car_type, bookings) VALUES (new.car_type, 1)
+                ON CONFLICT (car_type) DO UPDATE SET bookings = bookings + 1;
+            END
+        ''',
+        '''
+            CREATE TRIGGER IF NOT EXISTS booking_stats_delete AFTER DELETE ON bookings
+            BEGIN
+                UPDATE booking_stats
+                SET total_bookings = total_bookings - 1,
+                    total_revenue = total_revenue - old.total_cost,
+                    active_bookings = active_bookings - (old.status = 'Active')
+                WHERE id = 1;
+                UPDATE car_type_stats SET bookings = bookings - 1 WHERE car_type = old.car_type;
+            END
+        ''',
+        'DELETE FROM booking_stats',
+        '''
+            INSERT INTO booking_stats (id, total_bookings, total_revenue, active_bookings)
+            SELECT 1, COUNT(*), TOTAL(total_cost), COUNT(CASE WHEN status = 'Active' THEN 1 END)
+            FROM bookings
+        ''',
+        'DELETE FROM car_type_stats',
+        '''
+            INSERT INTO car_type_stats (car_type, bookings)
+            SELECT car_type, COUNT(*)
+            FROM bookings
+            GROUP BY car_type
+        ''',
+    )),
+    (4, 'Fleet sizes and an index over active rental periods', (
+        f'ALTER TABLE cars ADD COLUMN fleet_size INTEGER NOT NULL DEFAULT {DEFAULT_FLEET_SIZE}',
+        '''
+            CREATE INDEX IF NOT EXISTS idx_bookings_active_periods
+            ON bookings (car_type, start_date, end_date) WHERE status = 'Active'
+        ''',
+    )),
+    (5, 'Compact bookings storage: epoch days, pence and category codes', (
+        compact_bookings_storage,
+    )),
+    (6, 'Default cars catalogue', (
+        seed_cars_catalogue,
+    )),
+    (7, 'Fuel surcharges and extras price list', (
+        seed_rate_tables,
+    )),
+    (8, 'Customer identity keys, merging duplicate customers', (
+        index_customer_identity,
+    )),
+    (9, 'Booking change log for incremental refresh', (
+        '''
+            CREATE TABLE IF NOT EXISTS booking_changes (
+                revision INTEGER PRIMARY KEY,
+                booking_id INTEGER NOT NULL
+            )
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS booking_changes_update AFTER UPDATE ON bookings
+            BEGIN
+                INSERT INTO booking_changes (booking_id) SELECT old.id WHERE old.id <> new.id;
+                INSERT INTO booking_changes (booking_id) VALUES (new.id);
+                DELETE FROM booking_changes WHERE revision <= last_insert_rowid() - {BOOKING_CHANGE_LOG_SIZE};
+            END
+        ''',
+        f'''
+            CREATE TRIGGER IF NOT EXISTS booking_changes_delete AFTER DELETE ON bookings
+            BEGIN
+                INSERT INTO booking_changes (booking_id) VALUES (old.id);
+                DELETE FROM booking_changes WHERE revision <= last_insert_rowid() - {BOOKING_CHANGE_LOG_SIZE};
+            END
+        ''',
+    )),
+    (10, 'Indexes for sorting and filtering bookings', (
+        'CREATE INDEX IF NOT EXISTS idx_bookings_total ON bookings (total_pence)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_days ON bookings (days)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_end_day ON bookings (end_day)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_booked_at ON bookings (booked_at)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_fuel_type ON bookings (fuel_type_code)',
+        # Car type and date range filters, with fuel checked inside the index
+        'CREATE INDEX IF NOT EXISTS idx_bookings_categories ON bookings (car_type_code, start_day, fuel_type_code)',
+        # Price follows car and fuel type, so those filters get their own price order
+        'CREATE INDEX IF NOT EXISTS idx_bookings_car_total ON bookings (car_type_code, total_pence)',
+        'CREATE INDEX IF NOT EXISTS idx_bookings_fuel_total ON bookings (fuel_type_code, total_pence)',
+        # Row counts per index let the planner choose between filter and sort indexes
+        'ANALYZE bookings',
+    )),
+]
+
+
+def build_match_query(search_term):
+    """Turn free text into an FTS5 query: every word must match as a prefix."""
+    # Mirror the unicode61 tokenizer so punctuation never reaches the parser
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', search_term))
+
+
+def search_booking_id(search_term):
+    """Return the booking ID a search term names, or None if it cannot be one.
+    
+    Only ASCII digits within SQLite's integer range count, so terms such
+    as '²' or a 30-digit number simply match no ID.
+    """
+    if search_term.isascii() and search_term.isdigit() and int(search_term) <= MAX_ROWID:
+        return int(search_term)
+    return None
+
+
+def booking_filter_clause(filters, car_types, fuel_types):
+    """Turn a bookings filter dict into a WHERE clause and its parameters.
+    
+    Keys: car_type and fuel_type (names), start_from and start_to
+    ('YYYY-MM-DD', inclusive bounds on the start date). Empty values are
+    ignored; unknown names and bad dates raise ValueError.
+    """
+    conditions = []
+    params = []
+    filters = filters or {}
+    if filters.get('car_type'):
+        conditions.append('car_type_code = ?')
+        params.append(car_types.encode(filters['car_type']))
+    if filters.get('fuel_type'):
+        conditions.append('fuel_type_code = ?')
+        params.append(fuel_types.encode(filters['fuel_type']))
+    if filters.get('start_from'):
+        conditions.append('start_day >= ?')
+        params.append(text_to_day(filters['start_from']))
+    if filters.get('start_to'):
+        conditions.append('start_day <= ?')
+        params.append(text_to_day(filters['start_to']))
+    return ('WHERE ' + ' AND '.join(conditions) if conditions else ''), params
+
+
+def parse_flag(value):
+    """Parse a CSV yes/no style flag into 1 or 0."""
+    value = (value or '').strip().lower()
+    if value in ('1', 'true', 'yes', 'y'):
+        return 1
+    if value in ('', '0', 'false', 'no', 'n'):
+        return 0
+    raise ValueError(f"not a yes/no value: {value!r}")
+
+
+def parse_import_row(row, car_types, fuel_types, statuses):
+    """Validate one bulk import row and convert it to database values.
+    
+    Applies the same customer rules as the booking wizard and encodes the
+    booking into the compact storage layout. Returns (customer, booking)
+    tuples, or raises ValueError listing every problem. When every cost
+    column is blank the booking's five pence values are None, for the
+    caller to price.
+    """
+    problems = []
+    
+    def number(field, kind):
+        try:
+            return kind((row.get(field) or '').strip())
+        except ValueError:
+            problems.append(f"{field}: not a valid number")
+            return None
+    
+    def flag(field):
+        try:
+            return parse_flag(row.get(field))
+        except ValueError as e:
+            problems.append(f"{field}: {e}")
+            return 0
+    
+    first_name = (row.get('first_name') or '').strip()
+    surname = (row.get('surname') or '').strip()
+    address = (row.get('address') or '').strip()
+    age = number('age', int)
+    license_valid = flag('license_valid')
+    car_type = (row.get('car_type') or '').strip()
+    fuel_type = (row.get('fuel_type') or '').strip()
+    days = number('days', int)
+    unlimited_mileage = flag('unlimited_mileage')
+    breakdown_cover = flag('breakdown_cover')
+    start_date = (row.get('start_date') or '').strip()
+    if any((row.get(field) or '').strip() for field in IMPORT_COST_COLUMNS):
+        costs = [number(field, float) for field in IMPORT_COST_COLUMNS]
+    else:
+        costs = None
+    
+    problems.extend(message for _, message in validate_customer_details(
+        first_name, surname, address, age, license_valid))
+    problems.extend(message for _, message in validate_rental_details(
+        car_type, fuel_type, days, start_date))
+    if problems:
+        raise ValueError('; '.join(problems))
+    
+    booking_date = (row.get('booking_date') or '').strip() or f"{start_date} 00:00:00"
+    status = (row.get('status') or '').strip() or 'Active'
+    try:
+        status_code = statuses.encode(status)
+        booked_at = text_to_seconds(booking_date)
+    except ValueError as e:
+        raise ValueError(f"status or booking_date: {e}") from None
+    start_day = text_to_day(start_date)
+    pence = [to_pence(cost) for cost in costs] if costs else [None] * len(IMPORT_COST_COLUMNS)
+    
+    customer = (first_name, surname, address, age, license_valid, booking_date)
+    booking = (
+        f"{first_name} {surname}", car_types.encode(car_type), fuel_types.encode(fuel_type),
+        days, unlimited_mileage, breakdown_cover,
+        *pence,
+        booked_at, start_day, start_day + days, status_code
+    )
+    return customer, booking
+
+
+def tracer_from_environment(db_path):
+    """Return an SQLTracer when SQL_TRACE_ENV is set, else None.
+    
+    Slow statements are logged to slow_queries.log beside the database.
+    """
+    value = os.environ.get(SQL_TRACE_ENV, '').strip()
+    if not value:
+        return None
+    try:
+        slow_ms = float(value)
+    except ValueError:
+        slow_ms = SLOW_QUERY_MS
+    log_path = os.path.join(os.path.dirname(os.path.abspath(db_path)), 'slow_queries.log')
+    return SQLTracer(slow_ms, log_path)
+
+
+class ReaderHandle:
+    """One thread's read connection, closed when the thread exits.
+    
+    Kept in the pool's threading.local, which Python clears as its thread
+    finishes, so worker and request threads do not leave connections and
+    WAL read marks behind for the life of the process.
+    """
+    
+    def __init__(self, pool, conn):
+        self.pool = pool
+        self.conn = conn
+    
+    def __del__(self):
+        self.pool._release_reader(self.conn)
+
+
+class ConnectionPool:
+    """Per-thread read connections plus one serialized writer connection.
+    
+    Readers run in WAL mode, so reports and searches on worker threads never
+    block, and are never blocked by, the single writer.
+    """
+    
+    def __init__(self, db_path, profile, tracer=None):
+        self.db_path = db_path
+        self.profile = profile
+        self.tracer = tracer
+        self._local = threading.local()
+        self._readers = []
+        self._readers_lock = threading.Lock()
+        self._write_lock = threading.RLock()
+        self._closed = False
+        
+        # The writer switches the file to WAL before any reader opens it
+        self._writer = self._open()
+        self._writer.execute(f"PRAGMA journal_mode = {profile['journal_mode']}")
+        self._writer.execute(f"PRAGMA wal_autocheckpoint = {int(profile['wal_autocheckpoint'])}")
+    
+    def _open(self):
+        """Open a connection with explicit transaction control."""
+        conn = sqlite3.connect(
+            self.db_path,
+            timeout=30,
+            isolation_level=None,
+            check_same_thread=False,
+            factory=TracedConnection if self.tracer else sqlite3.Connection
+        )
+        if self.tracer:
+            conn.tracer = self.tracer
+            conn.set_trace_callback(self.tracer.trace_callback)
+        conn.execute(f"PRAGMA synchronous = {self.profile['synchronous']}")
+        return conn
+    
+    def _reader(self):
+        """Return the calling thread's read connection, opening it on first use."""
+        handle = getattr(self._local, 'reader', None)
+        if handle is None:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            conn = self._open()
+            conn.execute('PRAGMA query_only = 1')
+            handle = self._local.reader = ReaderHandle(self, conn)
+            with self._readers_lock:
+                self._readers.append(conn)
+        return handle.conn
+    
+    def _release_reader(self, conn):
+        """Close a read connection whose thread has exited."""
+        with self._readers_lock:
+            if conn in self._readers:
+                self._readers.remove(conn)
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+    
+    @contextmanager
+    def read(self, cancel=None):
+        """Yield a cursor reading from one consistent snapshot.
+        
+        Inside a write session on the same thread the writer's connection is
+        used, so the session sees its own uncommitted rows.
+        
+        cancel is an optional threading.Event: once it is set, the running
+        statement is interrupted through SQLite's progress handler and
+        QueryCancelledError is raised.
+        """
+        if getattr(self._local, 'write_depth', 0):
+            cursor = self._writer.cursor()
+            try:
+                yield cursor
+            finally:
+                cursor.close()
+            return
+        
+        conn = self._reader()
+        depth = getattr(self._local, 'read_depth', 0)
+        cursor = conn.cursor()
+        if cancel is not None:
+            conn.set_progress_handler(cancel.is_set, CANCEL_CHECK_STEPS)
+        if depth == 0:
+            cursor.execute('BEGIN')
+        self._local.read_depth = depth + 1
+        try:
+            yield cursor
+        except sqlite3.OperationalError:
+            if cancel is not None and cancel.is_set():
+                raise QueryCancelledError("Query cancelled") from None
+            raise
+        finally:
+            self._local.read_depth = depth
+            if cancel is not None:
+                conn.set_progress_handler(None, 0)
+            if depth == 0 and conn.in_transaction:
+                conn.execute('COMMIT')
+            cursor.close()
+    
+    @contextmanager
+    def write(self, transaction=True):
+        """Yield the writer's cursor, holding the write lock for the session.
+        
+        The outermost session commits on success and rolls back on error;
+        nested sessions join it. With transaction=False no BEGIN is issued,
+        for statements such as checkpoints that must run outside one.
+        """
+        with self._write_lock:
+            if self._closed:
+                raise sqlite3.ProgrammingError("Cannot operate on a closed database.")
+            depth = getattr(self._local, 'write_depth', 0)
+            cursor = self._writer.cursor()
+            if depth == 0 and transaction:
+                cursor.execute('BEGIN IMMEDIATE')
+            self._local.write_depth = depth + 1
+            try:
+                yield cursor
+            except BaseException:
+                if depth == 0 and self._writer.in_transaction:
+                    self._writer.execute('ROLLBACK')
+                raise
+            else:
+                if depth == 0 and self._writer.in_transaction:
+                    self._writer.execute('COMMIT')
+            finally:
+                self._local.write_depth = depth
+                cursor.close()
+    
+    def close(self):
+        """Close every reader and the writer."""
+        with self._write_lock:
+            self._closed = True
+            with self._readers_lock:
+                for conn in self._readers:
+                    conn.close()
+                self._readers.clear()
+            self._writer.close()
+
+
+class WriteBehindWriter:
+    """A dedicated thread that applies queued Database writes in group commits.
+    
+    submit() returns at once with a Future. The thread takes up to
+    WRITE_BATCH_SIZE queued writes, runs each one inside its own savepoint
+    of a single transaction and commits once, so one fsync covers the whole
+    batch. A write that raises is rolled back alone and its Future gets the
+    exception; the others in the batch still commit. Futures resolve only
+    after the commit.
+    """
+    
+    def __init__(self, database, batch_size=WRITE_BATCH_SIZE, batch_wait=WRITE_BATCH_WAIT):
+        self.database = database
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue()
+        self._stopping = False
+        self._thread = threading.Thread(target=self._run, name='WriteBehindWriter', daemon=True)
+        self._thread.start()
+    
+    def submit(self, method, *args, **kwargs):
+        """Queue a call of the named Database write method; returns a Future of its result."""
+        if self._stopping:
+            raise RuntimeError("Write-behind writer is stopped.")
+        future = Future()
+        self._queue.put((future, getattr(self.database, method), args, kwargs))
+        return future
+    
+    def stop(self):
+        """Apply every write already queued, then end the thread."""
+        if not self._stopping:
+            self._stopping = True
+            self._queue.put(None)
+        self._thread.join()
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            if batch[0] is None:
+                return
+            
+            # Gather whatever else arrives within the batch window
+            deadline = time.perf_counter() + self.batch_wait
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(deadline - time.perf_counter(), 0))
+                except queue.Empty:
+                    break
+                if item is None:
+                    self._queue.put(None)
+                    break
+                batch.append(item)
+            
+            self._apply(batch)
+    
+    def _apply(self, batch):
+        """Run one batch in a single transaction, resolving its futures after the commit."""
+        results = []
+        try:
+            with self.database.write_session() as cursor:
+                for future, method, args, kwargs in batch:
+                    if not future.set_running_or_notify_cancel():
+                        continue
+                    cursor.execute('SAVEPOINT write_behind')
+                    try:
+                        result = method(*args, **kwargs)
+                    except Exception as e:
+                        cursor.execute('ROLLBACK TO write_behind')
+                        cursor.execute('RELEASE write_behind')
+                        results.append((future, None, e))
+                    else:
+                        cursor.execute('RELEASE write_behind')
+                        results.append((future, result, None))
+        except Exception as e:
+            # The commit itself failed: nothing in the batch was written, and
+            # the availability index may have seen rows that never landed
+            self.database.availability.clear()
+            for future, _, _, _ in batch:
+                if not future.done() and (future.running() or future.set_running_or_notify_cancel()):
+                    future.set_exception(e)
+            return
+        
+        for future, result, error in results:
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
 
 class Database:
-    def __init__(self, db_path='data/bookings.db'):
-        """Initialize database connection."""
+    def __init__(self, db_path='data/bookings.db', durability=DEFAULT_DURABILITY, tracer=None,
+                 progress=None):
+        """Initialize database connection.
+        
+        Pass an SQLTracer, or set WEARECARS_SQL_TRACE to a slow-query
+        threshold in ms, to time every statement and public method.
+        progress(message) is called before each schema migration.
+        """
+        if durability not in DURABILITY_PROFILES:
+            raise ValueError(f"Unknown durability profile: {durability}")
         self.db_path = db_path
-        self.conn = None
-        self.cursor = None
+        self.durability = durability
+        self.tracer = tracer if tracer is not None else tracer_from_environment(db_path)
+        if self.tracer:
+            self._trace_methods()
+        self.pool = None
+        self.availability = AvailabilityIndex()
+        self.fleet_sizes = {}
+        # Serializes syncs, so two threads never add the same new bookings
+        self._availability_lock = threading.Lock()
+        self.car_types = CategoryCodes(CAR_TYPE_CODES)
+        self.fuel_types = CategoryCodes(FUEL_TYPE_CODES)
+        self.statuses = CategoryCodes(STATUS_CODES)
+        self.pricing = None
+        self.writer = None
         self.connect()
-        self.create_tables()
-        self.insert_sample_data()
+        # Fast path: a file already at the current version needs no DDL
+        if self.get_schema_version() < SCHEMA_VERSION:
+            self.create_tables()
+            self.migrate(progress)
+        self.load_categories()
     
     def connect(self):
         """Connect to SQLite database."""
         os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
-        self.conn = sqlite3.connect(self.db_path)
-        self.cursor = self.conn.cursor()
+        self.pool = ConnectionPool(self.db_path, DURABILITY_PROFILES[self.durability], self.tracer)
+    
+    def _trace_methods(self):
+        """Time every public method through the tracer (see UNTRACED_METHODS)."""
+        for name, member in vars(Database).items():
+            if name.startswith('_') or name in UNTRACED_METHODS or not callable(member):
+                continue
+            setattr(self, name, self.tracer.wrap(name, getattr(self, name)))
+    
+    def trace_report(self):
+        """Return the SQL tracer's report (see SQLTracer.report), or None when tracing is off."""
+        return self.tracer.report() if self.tracer else None
+    
+    def format_trace_report(self, limit=20):
+        """Return the SQL tracer's report as text, or None when tracing is off."""
+        return self.tracer.format_report(limit) if self.tracer else None
+    
+    def read_session(self, cancel=None):
+        """Context manager yielding a cursor over a consistent read snapshot.
+        
+        Safe to use from any thread; each thread gets its own connection.
+        Setting the optional cancel event interrupts the session's query
+        with QueryCancelledError.
+        """
+        return self.pool.read(cancel)
+    
+    def write_session(self):
+        """Context manager yielding a cursor inside a serialized write transaction.
+        
+        Commits when the block exits normally and rolls back on error.
+        """
+        return self.pool.write()
+    
+    def submit_write(self, method, *args, **kwargs):
+        """Queue a write (e.g. 'create_booking') on the write-behind thread.
+        
+        Returns a concurrent.futures.Future of the method's result, set once
+        the write has committed. Safe to call from any thread; the UI thread
+        can poll future.done() with after() instead of blocking.
+        """
+        if self.writer is None:
+            self.writer = WriteBehindWriter(self)
+        return self.writer.submit(method, *args, **kwargs)
+    
+    def checkpoint(self, mode='PASSIVE'):
+        """Copy committed WAL pages back into the main database file."""
+        if mode not in ('PASSIVE', 'FULL', 'RESTART', 'TRUNCATE'):
+            raise ValueError(f"Unknown checkpoint mode: {mode}")
+        with self.pool.write(transaction=False) as cursor:
+            cursor.execute(f'PRAGMA wal_checkpoint({mode})')
+            return cursor.fetchone()
     
     def create_tables(self):
         """Create necessary database tables."""
-        # Customers table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS customers (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                first_name TEXT NOT NULL,
-                surname TEXT NOT NULL,
-                address TEXT NOT NULL,
-                age INTEGER NOT NULL,
-                license_valid INTEGER NOT NULL,
-                created_date TEXT NOT NULL
-            )
-        ''')
+        with self.write_session() as cursor:
+            # Customers table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS customers (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    first_name TEXT NOT NULL,
+                    surname TEXT NOT NULL,
+                    address TEXT NOT NULL,
+                    age INTEGER NOT NULL,
+                    license_valid INTEGER NOT NULL,
+                    created_date TEXT NOT NULL
+                )
+            ''')
+            
+            # Bookings table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS bookings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    customer_id INTEGER NOT NULL,
+                    customer_name TEXT NOT NULL,
+                    car_type TEXT NOT NULL,
+                    fuel_type TEXT NOT NULL,
+                    days INTEGER NOT NULL,
+                    unlimited_mileage INTEGER DEFAULT 0,
+                    breakdown_cover INTEGER DEFAULT 0,
+                    base_cost REAL NOT NULL,
+                    car_surcharge REAL NOT NULL,
+                    fuel_surcharge REAL NOT NULL,
+                    extras_cost REAL NOT NULL,
+                    total_cost REAL NOT NULL,
+                    booking_date TEXT NOT NULL,
+                    start_date TEXT NOT NULL,
+                    end_date TEXT NOT NULL,
+                    status TEXT DEFAULT 'Active',
+                    FOREIGN KEY (customer_id) REFERENCES customers (id)
+                )
+            ''')
+            
+            # Cars inventory table
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS cars (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    car_type TEXT NOT NULL,
+                    daily_rate REAL NOT NULL,
+                    surcharge REAL NOT NULL,
+                    available INTEGER DEFAULT 1,
+                    description TEXT
+                )
+            ''')
+    
+    def get_schema_version(self):
+        """Return the schema version stored in the database file."""
+        with self.read_session() as cursor:
+            cursor.execute('PRAGMA user_version')
+            return cursor.fetchone()[0]
+    
+    def migrate(self, progress=None):
+        """Apply pending schema migrations, upgrading existing files in place.
         
-        # Bookings table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS bookings (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                customer_id INTEGER NOT NULL,
-                customer_name TEXT NOT NULL,
-                car_type TEXT NOT NULL,
-                fuel_type TEXT NOT NULL,
-                days INTEGER NOT NULL,
-                unlimited_mileage INTEGER DEFAULT 0,
-                breakdown_cover INTEGER DEFAULT 0,
-                base_cost REAL NOT NULL,
-                car_surcharge REAL NOT NULL,
-                fuel_surcharge REAL NOT NULL,
-                extras_cost REAL NOT NULL,
-                total_cost REAL NOT NULL,
-                booking_date TEXT NOT NULL,
-                start_date TEXT NOT NULL,
-                end_date TEXT NOT NULL,
-                status TEXT DEFAULT 'Active',
-                FOREIGN KEY (customer_id) REFERENCES customers (id)
-            )
-        ''')
+        progress(message) is called before each migration is applied.
+        """
+        current = self.get_schema_version()
+        applied = False
         
-        # Cars inventory table
-        self.cursor.execute('''
-            CREATE TABLE IF NOT EXISTS cars (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                car_type TEXT NOT NULL,
-                daily_rate REAL NOT NULL,
-                surcharge REAL NOT NULL,
-                available INTEGER DEFAULT 1,
-                description TEXT
-            )
-        ''')
+        for version, description, steps in MIGRATIONS:
+            if version <= current:
+                continue
+            
+            if progress:
+                progress(f"Upgrading database: {description}")
+            # Each migration and its version bump commit together or not at all
+            try:
+                with self.write_session() as cursor:
+                    for step in steps:
+                        if callable(step):
+                            step(cursor)
+                        else:
+                            cursor.execute(step)
+                    cursor.execute(f'PRAGMA user_version = {int(version)}')
+            except sqlite3.Error as e:
+                raise sqlite3.DatabaseError(
+                    f"Migration {version} ({description}) failed: {e}"
+                ) from e
+            applied = True
         
-        self.conn.commit()
-    
-    def insert_sample_data(self):
-        """Insert sample data for testing."""
-        # Check if cars already exist
-        self.cursor.execute('SELECT COUNT(*) FROM cars')
-        if self.cursor.fetchone()[0] == 0:
-            cars = [
-                ('City Car', 25.0, 0.0, 1, 'Perfect for urban driving'),
-                ('Family Car', 25.0, 50.0, 1, 'Spacious and comfortable'),
-                ('Sports Car', 25.0, 75.0, 1, 'High performance vehicle'),
-                ('SUV', 25.0, 65.0, 1, 'All-terrain capability'),
-            ]
-            self.cursor.executemany(
-                'INSERT INTO cars (car_type, daily_rate, surcharge, available, description) VALUES (?, ?, ?, ?, ?)',
-                cars
-            )
+        if applied:
+            # Refresh planner statistics so the new indexes get used
+            with self.pool.write(transaction=False) as cursor:
+                cursor.execute('PRAGMA optimize')
+    
+    def load_categories(self):
+        """Load the category code lookup tables used to encode and decode bookings."""
+        with self.read_session() as cursor:
+            for attribute, table in (('car_types', 'car_types'),
+                                     ('fuel_types', 'fuel_types'),
+                                     ('statuses', 'booking_statuses')):
+                cursor.execute(f'SELECT name, code FROM {table}')
+                setattr(self, attribute, CategoryCodes(cursor.fetchall()))
+    
+    def get_pricing(self, refresh=False):
+        """Return the pricing engine, loading the rate tables on first use.
+        
+        Pass refresh=True after changing rates to reload them.
+        """
+        if self.pricing is None or refresh:
+            with self.read_session() as cursor:
+                self.pricing = PricingEngine.load(cursor, self.car_types, self.fuel_types)
+        return self.pricing
+    
+    def decode_rows(self, rows):
+        """Decode stored booking list rows into their display form."""
+        return [decode_booking_row(row, self.car_types, self.fuel_types, self.statuses) for row in rows]
+    
+    def seed_demo_data(self, seed=None):
+        """Add three demo customers with one booking each to an empty database.
+        
+        Opt-in only (see the seed-demo command); returns how many bookings
+        were added, which is 0 when bookings already exist.
+        """
+        rng = random.Random(seed)
+        pricing = self.get_pricing()
         
-        # Check if sample bookings exist
-        self.cursor.execute('SELECT COUNT(*) FROM bookings')
-        if self.cursor.fetchone()[0] == 0:
+        with self.write_session() as cursor:
+            cursor.execute('SELECT EXISTS (SELECT 1 FROM bookings)')
+            if cursor.fetchone()[0]:
+                return 0
+            
             # Sample customers
             customers = [
                 ('John', 'Smith', '123 Main St, London', 35, 1),
@@ -104,145 +1322,1212 @@ class Database:
             ]
             
             for first, last, addr, age, lic in customers:
-                self.cursor.execute(
-                    'INSERT INTO customers (first_name, surname, address, age, license_valid, created_date) VALUES (?, ?, ?, ?, ?, ?)',
-                    (first, last, addr, age, lic, datetime.now().strftime('%Y-%m-%d %H:%M:%S'))
-                )
-                customer_id = self.cursor.lastrowid
+                customer_id = self._insert_customer(cursor, first, last, addr, age, lic)
                 
                 # Create a booking for this customer
                 car_types = ['City Car', 'Family Car', 'Sports Car', 'SUV']
                 fuel_types = ['Petrol', 'Diesel', 'Hybrid', 'Electric']
-                car_type = random.choice(car_types)
-                fuel_type = random.choice(fuel_types)
-                days = random.randint(3, 14)
-                
-                # Calculate costs
-                base_cost = 25.0 * days
-                car_surcharges = {'City Car': 0, 'Family Car': 50, 'Sports Car': 75, 'SUV': 65}
-                fuel_surcharges = {'Petrol': 0, 'Diesel': 0, 'Hybrid': 30, 'Electric': 50}
+                car_type = rng.choice(car_types)
+                fuel_type = rng.choice(fuel_types)
+                days = rng.randint(3, 14)
+                unlimited_mileage, breakdown_cover = rng.choice([(0, 0), (1, 0), (0, 1)])
+                quote = pricing.quote(car_type, fuel_type, days, unlimited_mileage, breakdown_cover)
                 
-                car_surcharge = car_surcharges[car_type]
-                fuel_surcharge = fuel_surcharges[fuel_type]
-                extras_cost = random.choice([0, 10 * days, 2 * days])
-                total = base_cost + car_surcharge + fuel_surcharge + extras_cost
+                start_date = datetime.now() - timedelta(days=rng.randint(1, 10))
                 
-                start_date = datetime.now() - timedelta(days=random.randint(1, 10))
-                end_date = start_date + timedelta(days=days)
-                
-                self.cursor.execute('''
-                    INSERT INTO bookings (customer_id, customer_name, car_type, fuel_type, days,
-                                        unlimited_mileage, breakdown_cover, base_cost, car_surcharge,
-                                        fuel_surcharge, extras_cost, total_cost, booking_date,
-                                        start_date, end_date, status)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
+                self._insert_booking(
+                    cursor,
                     customer_id,
                     f"{first} {last}",
                     car_type,
                     fuel_type,
                     days,
-                    1 if extras_cost == 10 * days else 0,
-                    1 if extras_cost == 2 * days else 0,
-                    base_cost,
-                    car_surcharge,
-                    fuel_surcharge,
-                    extras_cost,
-                    total,
-                    datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-                    start_date.strftime('%Y-%m-%d'),
-                    end_date.strftime('%Y-%m-%d'),
-                    'Active'
-                ))
-        
-        self.conn.commit()
+                    unlimited_mileage,
+                    breakdown_cover,
+                    quote['base_cost'],
+                    quote['car_surcharge'],
+                    quote['fuel_surcharge'],
+                    quote['extras_cost'],
+                    quote['total_cost'],
+                    start_date.strftime('%Y-%m-%d')
+                )
+            
+            return len(customers)
     
     def add_customer(self, first_name, surname, address, age, license_valid):
-        """Add a new customer to the database."""
-        self.cursor.execute('''
-            INSERT INTO customers (first_name, surname, address, age, license_valid, created_date)
-            VALUES (?, ?, ?, ?, ?, ?)
-        ''', (first_name, surname, address, age, license_valid, 
-              datetime.now().strftime('%Y-%m-%d %H:%M:%S')))
-        self.conn.commit()
-        return self.cursor.lastrowid
+        """Add a customer, or update and reuse the existing one with the same identity."""
+        with self.write_session() as cursor:
+            return self._insert_customer(cursor, first_name, surname, address, age, license_valid)
+    
+    def find_customer(self, first_name, surname, address):
+        """Return the ID of the customer with this name and address, or None."""
+        with self.read_session() as cursor:
+            cursor.execute('SELECT id FROM customers WHERE identity_key = ?',
+                           (customer_identity_key(first_name, surname, address),))
+            row = cursor.fetchone()
+            return row[0] if row else None
+    
+    def merge_duplicate_customers(self):
+        """Merge customers that share an identity key; returns how many were merged."""
+        with self.write_session() as cursor:
+            return merge_duplicate_customers(cursor)
     
     def add_booking(self, customer_id, customer_name, car_type, fuel_type, days,
                    unlimited_mileage, breakdown_cover, base_cost, car_surcharge,
                    fuel_surcharge, extras_cost, total_cost, start_date):
         """Add a new booking to the database."""
-        end_date = datetime.strptime(start_date, '%Y-%m-%d') + timedelta(days=days)
+        with self.write_session() as cursor:
+            self._check_availability(car_type, start_date, days)
+            return self._insert_booking(
+                cursor, customer_id, customer_name, car_type, fuel_type, days,
+                unlimited_mileage, breakdown_cover, base_cost, car_surcharge,
+                fuel_surcharge, extras_cost, total_cost, start_date
+            )
+    
+    def create_booking(self, first_name, surname, address, age, license_valid,
+                       car_type, fuel_type, days, unlimited_mileage, breakdown_cover,
+                       base_cost, car_surcharge, fuel_surcharge, extras_cost,
+                       total_cost, start_date):
+        """Add a customer and their booking in a single transaction.
+        
+        Either both rows are written or neither is. Returns (customer_id, booking_id).
+        """
+        with self.write_session() as cursor:
+            self._check_availability(car_type, start_date, days)
+            customer_id = self._insert_customer(cursor, first_name, surname, address, age, license_valid)
+            booking_id = self._insert_booking(
+                cursor, customer_id, f"{first_name} {surname}", car_type, fuel_type, days,
+                unlimited_mileage, breakdown_cover, base_cost, car_surcharge,
+                fuel_surcharge, extras_cost, total_cost, start_date
+            )
+        return customer_id, booking_id
+    
+    def _insert_customer(self, cursor, first_name, surname, address, age, license_valid):
+        """Insert a customer row without committing, reusing a matching customer.
+        
+        A customer with the same identity key keeps their ID and has age
+        and licence status brought up to date. Returns the customer ID.
+        """
+        key = customer_identity_key(first_name, surname, address)
+        cursor.execute('SELECT id FROM customers WHERE identity_key = ?', (key,))
+        row = cursor.fetchone()
+        if row:
+            cursor.execute('UPDATE customers SET age = ?, license_valid = ? WHERE id = ?',
+                           (age, license_valid, row[0]))
+            return row[0]
         
-        self.cursor.execute('''
-            INSERT INTO bookings (customer_id, customer_name, car_type, fuel_type, days,
-                                unlimited_mileage, breakdown_cover, base_cost, car_surcharge,
-                                fuel_surcharge, extras_cost, total_cost, booking_date,
-                                start_date, end_date, status)
+        cursor.execute('''
+            INSERT INTO customers (first_name, surname, address, age, license_valid, created_date, identity_key)
+            VALUES (?, ?, ?, ?, ?, ?, ?)
+        ''', (first_name, surname, address, age, license_valid,
+              datetime.now().strftime('%Y-%m-%d %H:%M:%S'), key))
+        return cursor.lastrowid
+    
+    def _insert_booking(self, cursor, customer_id, customer_name, car_type, fuel_type, days,
+                        unlimited_mileage, breakdown_cover, base_cost, car_surcharge,
+                        fuel_surcharge, extras_cost, total_cost, start_date):
+        """Insert a booking row without committing."""
+        start_day = text_to_day(start_date)
+        
+        cursor.execute('''
+            INSERT INTO bookings (customer_id, customer_name, car_type_code, fuel_type_code, days,
+                                unlimited_mileage, breakdown_cover, base_pence, car_surcharge_pence,
+                                fuel_surcharge_pence, extras_pence, total_pence, booked_at,
+                                start_day, end_day, status_code)
             VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
         ''', (
-            customer_id, customer_name, car_type, fuel_type, days,
-            unlimited_mileage, breakdown_cover, base_cost, car_surcharge,
-            fuel_surcharge, extras_cost, total_cost,
-            datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
-            start_date,
-            end_date.strftime('%Y-%m-%d'),
-            'Active'
+            customer_id, customer_name,
+            self.car_types.encode(car_type),
+            self.fuel_types.encode(fuel_type),
+            days, unlimited_mileage, breakdown_cover,
+            to_pence(base_cost), to_pence(car_surcharge), to_pence(fuel_surcharge),
+            to_pence(extras_cost), to_pence(total_cost),
+            text_to_seconds(datetime.now().strftime('%Y-%m-%d %H:%M:%S')),
+            start_day,
+            start_day + days,
+            ACTIVE
         ))
-        self.conn.commit()
-        return self.cursor.lastrowid
+        return cursor.lastrowid
+    
+    def import_bookings_csv(self, source, progress=None, bad_rows_path=None,
+                            batch_size=IMPORT_BATCH_SIZE, defer_indexes=False):
+        """Bulk import historical customers and bookings from a CSV file.
+        
+        source is a path or an open text file with a header row naming at
+        least IMPORT_COLUMNS; the rows are loaded with import_bookings().
+        Rejected rows are written to bad_rows_path with their line number and
+        the reasons. Returns a dict of counts and elapsed seconds.
+        """
+        owns_file = isinstance(source, (str, bytes, os.PathLike))
+        infile = open(source, newline='', encoding='utf-8') if owns_file else source
+        report_file = None
+        
+        try:
+            reader = csv.DictReader(infile)
+            missing = [c for c in IMPORT_COLUMNS if c not in (reader.fieldnames or ())]
+            if missing:
+                raise ValueError(f"Import file is missing columns: {', '.join(missing)}")
+            
+            reject = None
+            if bad_rows_path:
+                report_file = open(bad_rows_path, 'w', newline='', encoding='utf-8')
+                report = csv.writer(report_file)
+                report.writerow(['line', 'error'] + list(reader.fieldnames))
+                
+                def reject(number, error, row):
+                    # Line 1 is the header
+                    report.writerow([number + 1, error] + [row.get(c, '') for c in reader.fieldnames])
+            
+            return self.import_bookings(reader, progress, reject, batch_size, defer_indexes)
+        finally:
+            if owns_file:
+                infile.close()
+            if report_file:
+                report_file.close()
+    
+    def import_bookings(self, rows, progress=None, reject=None,
+                        batch_size=IMPORT_BATCH_SIZE, defer_indexes=False):
+        """Bulk import customers and bookings from dicts keyed like the CSV columns.
+        
+        Rows are validated with the booking wizard's rules and written with
+        executemany in batches. The whole import is one transaction, so a
+        failure leaves the database untouched.
+        
+        With defer_indexes, the secondary indexes and insert triggers on
+        bookings are dropped for the load and rebuilt once at the end. It is
+        off by default: rebuilding costs time in proportion to the whole
+        table, so it only pays when the import is a large share of it (a
+        50-row import into 1M bookings takes 14.5s deferred, 0.14s not).
+        
+        progress(rows_read, imported, rejected) is called after every batch,
+        and reject(row_number, reason, row) for every invalid row. Returns a
+        dict of counts and elapsed seconds.
+        """
+        started = time.perf_counter()
+        rows_read = imported = rejected = 0
+        
+        with self.write_session() as cursor:
+            cursor.execute('PRAGMA cache_size')
+            cache_size = cursor.fetchone()[0]
+            cursor.execute('PRAGMA cache_size = -262144')
+            
+            cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = 'bookings'")
+            row = cursor.fetchone()
+            last_booking_id = row[0] if row else 0
+            cursor.execute('''
+                SELECT MAX(COALESCE((SELECT seq FROM sqlite_sequence WHERE name = 'customers'), 0),
+                           COALESCE((SELECT MAX(id) FROM customers), 0))
+            ''')
+            next_customer_id = cursor.fetchone()[0] + 1
+            
+            deferred = []
+            if defer_indexes:
+                cursor.execute('''
+                    SELECT type, name, sql FROM sqlite_master
+                    WHERE tbl_name = 'bookings' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+                ''')
+                deferred = cursor.fetchall()
+                for kind, name, _ in deferred:
+                    cursor.execute(f'DROP {kind.upper()} "{name}"')
+            
+            pricing = self.get_pricing()
+            customers = []
+            bookings = []
+            # Customer IDs by identity key for the batch not yet written
+            pending = {}
+            for number, row in enumerate(rows, start=1):
+                rows_read += 1
+                try:
+                    customer, booking = parse_import_row(row, self.car_types, self.fuel_types, self.statuses)
+                except ValueError as e:
+                    rejected += 1
+                    if reject:
+                        reject(number, str(e), row)
+                    continue
+                
+                # Returning customers reuse their existing row
+                key = customer_identity_key(*customer[:3])
+                customer_id = pending.get(key)
+                if customer_id is None:
+                    cursor.execute('SELECT id FROM customers WHERE identity_key = ?', (key,))
+                    existing = cursor.fetchone()
+                    if existing:
+                        customer_id = existing[0]
+                    else:
+                        customer_id = next_customer_id
+                        next_customer_id += 1
+                        customers.append((customer_id,) + customer + (key,))
+                    pending[key] = customer_id
+                bookings.append((customer_id,) + booking)
+                
+                if len(bookings) >= batch_size:
+                    imported += self._write_import_batch(cursor, customers, bookings, pricing)
+                    pending.clear()
+                    if progress:
+                        progress(rows_read, imported, rejected)
+            
+            imported += self._write_import_batch(cursor, customers, bookings, pricing)
+            
+            if deferred:
+                for _, _, sql in deferred:
+                    cursor.execute(sql)
+                self._backfill_imported(cursor, last_booking_id)
+            
+            cursor.execute(f'PRAGMA cache_size = {int(cache_size)}')
+        
+        if progress:
+            progress(rows_read, imported, rejected)
+        
+        return {
+            'rows_read': rows_read,
+            'imported': imported,
+            'rejected': rejected,
+            'elapsed': time.perf_counter() - started,
+        }
+    
+    def _write_import_batch(self, cursor, customers, bookings, pricing):
+        """Insert and clear one batch of parsed import rows; returns the row count."""
+        count = len(bookings)
+        if count:
+            self._price_import_batch(bookings, pricing)
+            cursor.executemany('''
+                INSERT INTO customers (id, first_name, surname, address, age, license_valid, created_date,
+                                       identity_key)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', customers)
+            cursor.executemany('''
+                INSERT INTO bookings (customer_id, customer_name, car_type_code, fuel_type_code, days,
+                                    unlimited_mileage, breakdown_cover, base_pence, car_surcharge_pence,
+                                    fuel_surcharge_pence, extras_pence, total_pence, booked_at,
+                                    start_day, end_day, status_code)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', bookings)
+            customers.clear()
+            bookings.clear()
+        return count
+    
+    def _price_import_batch(self, bookings, pricing):
+        """Fill in the costs of parsed bookings that arrived without any."""
+        unpriced = [i for i, booking in enumerate(bookings) if booking[11] is None]
+        if not unpriced:
+            return
+        
+        rows = [bookings[i] for i in unpriced]
+        # (customer_id, name, car, fuel, days, mileage, breakdown, 5 costs, ...)
+        quotes = pricing.quote_batch(
+            [row[4] for row in rows], [row[2] for row in rows], [row[3] for row in rows],
+            [row[5] for row in rows], [row[6] for row in rows]
+        )
+        columns = [quotes[name] for name in ('base_pence', 'car_surcharge_pence',
+                                             'fuel_surcharge_pence', 'extras_pence', 'total_pence')]
+        for n, i in enumerate(unpriced):
+            booking = bookings[i]
+            bookings[i] = booking[:7] + tuple(int(column[n]) for column in columns) + booking[12:]
+    
+    def _backfill_imported(self, cursor, last_booking_id):
+        """Bring trigger-maintained tables up to date after a deferred-trigger load."""
+        cursor.execute('''
+            INSERT INTO bookings_fts (rowid, customer_name, address, car_type, fuel_type)
+            SELECT b.id, b.customer_name, COALESCE(c.address, ''), ct.name, ft.name
+            FROM bookings b
+            LEFT JOIN customers c ON c.id = b.customer_id
+            LEFT JOIN car_types ct ON ct.code = b.car_type_code
+            LEFT JOIN fuel_types ft ON ft.code = b.fuel_type_code
+            WHERE b.id > ?
+        ''', (last_booking_id,))
+        recompute_booking_stats(cursor)
+    
+    def sync_availability(self):
+        """Bring the in-memory availability index up to date with the file.
+        
+        New bookings are picked up incrementally by ID; a newer revision in
+        the booking change log (an update or delete by any connection or
+        process) triggers a reload. Reads go through a read session, so
+        the UI never queues behind the writer's commits, while inside a
+        write session the writer's own uncommitted bookings are seen.
+        """
+        index = self.availability
+        with self._availability_lock, self.read_session() as cursor:
+            cursor.execute('SELECT car_type, fleet_size FROM cars WHERE available = 1')
+            self.fleet_sizes = dict(cursor.fetchall())
+            cursor.execute('SELECT COALESCE(MAX(revision), 0) FROM booking_changes')
+            revision = cursor.fetchone()[0]
+            
+            if index.change_revision is None or revision > index.change_revision:
+                cursor.execute('SELECT COALESCE(MAX(id), 0) FROM bookings')
+                last_booking_id = cursor.fetchone()[0]
+                cursor.execute(f'''
+                    SELECT car_type_code, start_day, end_day
+                    FROM bookings
+                    WHERE status_code = {ACTIVE} AND id <= ?
+                ''', (last_booking_id,))
+                names = self.car_types.names
+                index.load((names.get(code), start, end) for code, start, end in cursor)
+                index.last_booking_id = last_booking_id
+                index.change_revision = revision
+                return
+            if revision < index.change_revision:
+                # This snapshot predates the index, e.g. a reader racing the writer
+                return
+            
+            cursor.execute('''
+                SELECT id, car_type_code, start_day, end_day, status_code
+                FROM bookings
+                WHERE id > ?
+                ORDER BY id
+            ''', (index.last_booking_id,))
+            for booking_id, code, start, end, status_code in cursor.fetchall():
+                if status_code == ACTIVE:
+                    index.add(self.car_types.decode(code), start, end)
+                index.last_booking_id = booking_id
+    
+    def count_available(self, car_type, start_date, end_date):
+        """Return how many cars of car_type are free on every day from start_date to end_date."""
+        self.sync_availability()
+        fleet_size = self.fleet_sizes.get(car_type, 0)
+        peak = self.availability.peak(car_type, to_day(start_date), to_day(end_date))
+        return max(fleet_size - peak, 0)
+    
+    def first_available_date(self, car_type, days, from_date=None, horizon=AVAILABILITY_HORIZON):
+        """Return the first start date on or after from_date with a car_type free for days.
+        
+        Returns None when nothing is free within horizon days.
+        """
+        self.sync_availability()
+        fleet_size = self.fleet_sizes.get(car_type, 0)
+        if fleet_size <= 0:
+            return None
+        start = to_day(from_date or date.today())
+        day = self.availability.first_free_day(car_type, fleet_size, days, start, horizon)
+        return from_day(day) if day is not None else None
+    
+    def set_fleet_size(self, car_type, size):
+        """Set how many cars of car_type the fleet holds."""
+        if size < 0:
+            raise ValueError(f"Fleet size must not be negative: {size}")
+        with self.write_session() as cursor:
+            cursor.execute('UPDATE cars SET fleet_size = ? WHERE car_type = ?', (size, car_type))
+            if cursor.rowcount == 0:
+                raise ValueError(f"Unknown car type: {car_type}")
+    
+    def fit_fleet_sizes(self):
+        """Raise each fleet to the most cars of its type out on any one day.
+        
+        Imported or seeded history can overlap more Active rentals than the
+        default fleet holds, which would leave nothing bookable. Fleets are
+        never shrunk. Returns {car_type: (old size, new size)} for each
+        fleet raised.
+        """
+        raised = {}
+        with self.write_session() as cursor:
+            self.sync_availability()
+            cursor.execute('SELECT car_type, fleet_size FROM cars')
+            for car_type, size in cursor.fetchall():
+                busiest = self.availability.busiest(car_type)
+                if busiest > size:
+                    cursor.execute('UPDATE cars SET fleet_size = ? WHERE car_type = ?', (busiest, car_type))
+                    raised[car_type] = (size, busiest)
+        return raised
+    
+    def _check_availability(self, car_type, start_date, days):
+        """Raise VehicleUnavailableError unless a car_type is free for the whole rental."""
+        start = to_day(start_date)
+        end_date = from_day(start + days)
+        if self.count_available(car_type, start_date, end_date) <= 0:
+            raise VehicleUnavailableError(
+                car_type, start_date, end_date,
+                self.first_available_date(car_type, days, start_date)
+            )
     
     def get_all_bookings(self):
         """Retrieve all bookings from the database."""
-        self.cursor.execute('''
-            SELECT id, customer_name, car_type, fuel_type, days, total_cost,
-                   booking_date, start_date, end_date, status
-            FROM bookings
-            ORDER BY id DESC
-        ''')
-        return self.cursor.fetchall()
+        with self.read_session() as cursor:
+            cursor.execute('''
+                SELECT id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+                       booked_at, start_day, end_day, status_code
+                FROM bookings
+                ORDER BY id DESC
+            ''')
+            return self.decode_rows(cursor.fetchall())
     
-    def search_bookings(self, search_term):
-        """Search bookings by customer name or booking ID."""
-        self.cursor.execute('''
-            SELECT id, customer_name, car_type, fuel_type, days, total_cost,
-                   booking_date, start_date, end_date, status
-            FROM bookings
-            WHERE customer_name LIKE ? OR CAST(id AS TEXT) LIKE ?
-            ORDER BY id DESC
-        ''', (f'%{search_term}%', f'%{search_term}%'))
-        return self.cursor.fetchall()
+    def get_bookings_page(self, before_id=None, page_size=BOOKING_PAGE_SIZE):
+        """Retrieve one page of bookings, newest first, with ID below before_id.
+        
+        Keyset pagination on the primary key keeps every page an index seek,
+        however deep into the history it starts.
+        """
+        with self.read_session() as cursor:
+            cursor.execute('''
+                SELECT id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+                       booked_at, start_day, end_day, status_code
+                FROM bookings
+                WHERE id < ?
+                ORDER BY id DESC
+                LIMIT ?
+            ''', (MAX_ROWID if before_id is None else before_id, page_size))
+            return self.decode_rows(cursor.fetchall())
+    
+    def iter_bookings(self, page_size=BOOKING_PAGE_SIZE):
+        """Yield all bookings, newest first, in chunks of up to page_size rows."""
+        before_id = None
+        while True:
+            page = self.get_bookings_page(before_id, page_size)
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            before_id = page[-1][0]
+    
+    def iter_export_bookings(self, columns=DEFAULT_EXPORT_COLUMNS, chunk_size=EXPORT_CHUNK_SIZE,
+                             progress=None, cancel=None, after_id=None, booked_since=None,
+                             oldest_first=False, as_json=False):
+        """Yield bookings, newest first unless oldest_first, as tuples of the chosen EXPORT_COLUMNS.
+        
+        Every chunk comes from one read snapshot held until the generator
+        finishes, so bookings written during a long export are left out
+        rather than half included. progress(done, total) is called after
+        each chunk; setting cancel stops with QueryCancelledError.
+        
+        after_id and booked_since ('YYYY-MM-DD[ HH:MM:SS]') limit the
+        export to later bookings. IDs are handed out by the single writer in
+        commit order, so the last ID exported marks exactly where the next
+        incremental export starts.
+        
+        With as_json, SQLite renders each booking as a line of JSON keyed by
+        column name, and rows are (line, booking ID).
+        """
+        unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+        if unknown or not columns:
+            raise ValueError(f"Unknown export columns: {', '.join(unknown) or '(none chosen)'}")
+        if as_json:
+            fields = []
+            for column in columns:
+                _, sql, decoder = EXPORT_COLUMNS[column]
+                fields.append(f"'{column}', {EXPORT_SQL_DECODERS[decoder].format(sql) if decoder else sql}")
+            select = f"json_object({', '.join(fields)}) || char(10), b.id"
+        else:
+            select = ', '.join(EXPORT_COLUMNS[column][1] for column in columns)
+        decoders = {
+            'day': day_to_text,
+            'pence': pence_to_text,
+            'car_type': self.car_types.names.get,
+            'fuel_type': self.fuel_types.names.get,
+            'status': self.statuses.names.get,
+        }
+        decode = [] if as_json else [decoders.get(EXPORT_COLUMNS[column][2]) for column in columns]
+        
+        conditions = []
+        params = []
+        if after_id is not None:
+            conditions.append('b.id > ?')
+            params.append(int(after_id))
+        if booked_since is not None:
+            conditions.append('b.booked_at >= ?')
+            params.append(text_to_seconds(booked_since))
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+        
+        with self.read_session(cancel) as cursor:
+            if where:
+                cursor.execute(f'SELECT COUNT(*) FROM bookings b {where}', params)
+            else:
+                cursor.execute('SELECT total_bookings FROM booking_stats WHERE id = 1')
+            row = cursor.fetchone()
+            total = row[0] if row else 0
+            # The customers join is left out by SQLite when no customer column is chosen
+            cursor.execute(f'''
+                SELECT {select}
+                FROM bookings b
+                LEFT JOIN customers c ON c.id = b.customer_id
+                {where}
+                ORDER BY b.id {'ASC' if oldest_first else 'DESC'}
+            ''', params)
+            done = 0
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise QueryCancelledError("Export cancelled")
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    return
+                done += len(chunk)
+                if any(decode):
+                    # Decoded a column at a time; day and pence texts are cached
+                    chunk = list(zip(*[values if decoder is None else map(decoder, values)
+                                       for decoder, values in zip(decode, zip(*chunk))]))
+                yield chunk
+                if progress is not None:
+                    progress(done, total)
+    
+    def count_bookings(self, filters=None):
+        """Return the number of bookings matching filters (see booking_filter_clause).
+        
+        Unfiltered, the count comes from the trigger-maintained summary.
+        """
+        where, params = booking_filter_clause(filters, self.car_types, self.fuel_types)
+        with self.read_session() as cursor:
+            if where:
+                cursor.execute(f'SELECT COUNT(*) FROM bookings {where}', params)
+                return cursor.fetchone()[0]
+            cursor.execute('SELECT total_bookings FROM booking_stats WHERE id = 1')
+            row = cursor.fetchone()
+            return row[0] if row else 0
+    
+    def get_bookings_slice(self, offset, limit=BOOKING_PAGE_SIZE):
+        """Retrieve up to limit bookings, newest first, skipping the offset newest.
+        
+        While booking IDs have no gaps the booking at offset k has ID
+        MAX(id) - k, so any slice is one index seek however deep it starts.
+        Otherwise this falls back to OFFSET, which steps over the skipped rows.
+        """
+        with self.read_session() as cursor:
+            cursor.execute('''
+                SELECT (SELECT MAX(id) FROM bookings), (SELECT MIN(id) FROM bookings),
+                       (SELECT total_bookings FROM booking_stats WHERE id = 1)
+            ''')
+            max_id, min_id, count = cursor.fetchone()
+            if max_id is None or offset >= count:
+                return []
+            
+            if max_id - min_id + 1 == count:
+                cursor.execute('''
+                    SELECT id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+                           booked_at, start_day, end_day, status_code
+                    FROM bookings
+                    WHERE id <= ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                ''', (max_id - offset, limit))
+            else:
+                cursor.execute('''
+                    SELECT id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+                           booked_at, start_day, end_day, status_code
+                    FROM bookings
+                    ORDER BY id DESC
+                    LIMIT ? OFFSET ?
+                ''', (limit, offset))
+            return self.decode_rows(cursor.fetchall())
+    
+    def get_bookings_sorted(self, offset=0, limit=BOOKING_PAGE_SIZE, sort='id', descending=True,
+                            filters=None, anchor_id=None, matches=None):
+        """Retrieve up to limit bookings matching filters in sort order, skipping offset.
+        
+        sort is a key of BOOKING_SORT_COLUMNS, so the ORDER BY is never
+        built from caller text. With anchor_id, offset counts from that
+        booking's position instead of the top and may be negative: nearby
+        slices then start with an index seek to the anchor rather than a
+        walk from the first row. Returns [] if the anchor no longer exists.
+        
+        A filter matching many rows is first tested while walking the sort
+        index (at most SORT_WALK_ROWS rows); otherwise, or if that walk
+        comes up short, the filter's own index finds the matches and they
+        are sorted. matches is count_bookings(filters) if already known.
+        """
+        if sort not in BOOKING_SORT_COLUMNS:
+            raise ValueError(f"Unknown sort: {sort}")
+        filters = {key: value for key, value in (filters or {}).items() if value}
+        # Every row shares a filtered category, so its ties in id order are the whole sort
+        column = 'id' if sort in filters else BOOKING_SORT_COLUMNS[sort]
+        where, params = booking_filter_clause(filters, self.car_types, self.fuel_types)
+        
+        walk_share = 0
+        if filters and not any(sort in CORRELATED_SORTS.get(key, (sort,)) for key in filters):
+            total = self.count_bookings()
+            if matches is None:
+                matches = self.count_bookings(filters)
+            walk_share = matches / total if total else 0
+        
+        def page_ids(condition, condition_params, backwards, skip, count):
+            direction = 'DESC' if descending != backwards else 'ASC'
+            order = f'{column} {direction}, id {direction}' if column != 'id' else f'id {direction}'
+            
+            # Expected rows walked to fill the page: (skip + count) / share of rows matching
+            if walk_share and (skip + count) <= walk_share * SORT_WALK_ROWS:
+                cursor.execute(f'''
+                    SELECT id FROM (
+                        SELECT id, {where[len('WHERE '):]} AS hit
+                        FROM bookings
+                        {'WHERE ' + condition if condition else ''}
+                        ORDER BY {order}
+                        LIMIT ?
+                    )
+                    WHERE hit
+                    LIMIT ? OFFSET ?
+                ''', params + condition_params + [SORT_WALK_ROWS, count, skip])
+                ids = [row[0] for row in cursor.fetchall()]
+                if len(ids) == count:
+                    return ids
+            
+                # The walk came up short: +column keeps the planner off the sort index
+                order = f'+{column} {direction}, id {direction}' if column != 'id' else f'+id {direction}'
+            
+            clauses = [clause for clause in (where[len('WHERE '):], condition) if clause]
+            cursor.execute(f'''
+                SELECT id FROM bookings
+                {'WHERE ' + ' AND '.join(clauses) if clauses else ''}
+                ORDER BY {order}
+                LIMIT ? OFFSET ?
+            ''', params + condition_params + [count, skip])
+            return [row[0] for row in cursor.fetchall()]
+        
+        def select(condition, condition_params, backwards, skip, count):
+            # Pick the page's ids from the indexes first, then read just those rows
+            ids = page_ids(condition, condition_params, backwards, skip, count)
+            if not ids:
+                return []
+            direction = 'DESC' if descending else 'ASC'
+            order = f'{column} {direction}, id {direction}' if column != 'id' else f'id {direction}'
+            cursor.execute(f'''
+                SELECT id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+                       booked_at, start_day, end_day, status_code
+                FROM bookings
+                WHERE id IN ({', '.join('?' * len(ids))})
+                ORDER BY {order}
+            ''', ids)
+            return cursor.fetchall()
+        
+        def seek(operator):
+            # Row value comparison against the anchor, matching (column, id) index order
+            if column == 'id':
+                return f'id {operator} ?', [anchor_id]
+            return f'({column}, id) {operator} (SELECT {column}, id FROM bookings WHERE id = ?)', [anchor_id]
+        
+        with self.read_session() as cursor:
+            if anchor_id is None:
+                return self.decode_rows(select('', [], False, max(offset, 0), limit))
+            
+            rows = []
+            end = offset + limit
+            if offset < 0:
+                # Rows before the anchor, read backwards from it
+                condition, condition_params = seek('>' if descending else '<')
+                rows += select(condition, condition_params, True, max(-end, 0), min(end, 0) - offset)
+            if end > 0:
+                condition, condition_params = seek('<=' if descending else '>=')
+                rows += select(condition, condition_params, False, max(offset, 0), end - max(offset, 0))
+            return self.decode_rows(rows)
+    
+    def get_change_watermark(self):
+        """Return the (data_version, last booking ID, last change revision) seen now.
+        
+        PRAGMA data_version belongs to the calling thread's connection, so
+        pass the watermark back to get_booking_changes on the same thread.
+        """
+        with self.read_session() as cursor:
+            # Read the version first: a commit landing in between is then seen again, never missed
+            cursor.execute('PRAGMA data_version')
+            version = cursor.fetchone()[0]
+            cursor.execute('''
+                SELECT COALESCE((SELECT MAX(id) FROM bookings), 0),
+                       COALESCE((SELECT MAX(revision) FROM booking_changes), 0)
+            ''')
+            return (version,) + cursor.fetchone()
+    
+    def get_booking_changes(self, watermark, limit=BOOKING_PAGE_SIZE):
+        """Return the bookings inserted, updated and deleted since watermark.
+        
+        The result is a dict with the new 'watermark', 'inserted' and
+        'updated' rows (newest first), 'deleted' IDs, and 'complete', which
+        is False when more than limit rows changed or the change log no
+        longer reaches back that far; reload everything then. When no
+        connection has committed since the watermark this costs one PRAGMA.
+        """
+        version, last_booking_id, last_revision = watermark
+        changes = {'watermark': watermark, 'inserted': [], 'updated': [], 'deleted': [], 'complete': True}
+        with self.read_session() as cursor:
+            cursor.execute('PRAGMA data_version')
+            current = cursor.fetchone()[0]
+            if current == version:
+                return changes
+            
+            cursor.execute('''
+                SELECT COALESCE((SELECT MAX(id) FROM bookings), 0),
+                       COALESCE((SELECT MAX(revision) FROM booking_changes), 0),
+                       (SELECT MIN(revision) FROM booking_changes)
+            ''')
+            max_id, max_revision, min_revision = cursor.fetchone()
+            changes['watermark'] = (current, max_id, max_revision)
+            
+            if max_id > last_booking_id:
+                cursor.execute('''
+                    SELECT id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+                           booked_at, start_day, end_day, status_code
+                    FROM bookings
+                    WHERE id > ?
+                    ORDER BY id DESC
+                    LIMIT ?
+                ''', (last_booking_id, limit + 1))
+                changes['inserted'] = self.decode_rows(cursor.fetchall())
+                if len(changes['inserted']) > limit:
+                    changes['inserted'] = changes['inserted'][:limit]
+                    changes['complete'] = False
+            
+            if max_revision > last_revision:
+                # Rows inserted since the watermark are already in 'inserted'
+                cursor.execute('''
+                    SELECT DISTINCT booking_id FROM booking_changes
+                    WHERE revision > ? AND booking_id <= ?
+                    LIMIT ?
+                ''', (last_revision, last_booking_id, limit + 1))
+                changed_ids = {row[0] for row in cursor.fetchall()}
+                # Pruned log entries would have been changes we cannot see
+                if min_revision > last_revision + 1 or len(changed_ids) > limit:
+                    changes['complete'] = False
+                    return changes
+                cursor.execute('''
+                    SELECT id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+                           booked_at, start_day, end_day, status_code
+                    FROM bookings
+                    WHERE id IN (SELECT booking_id FROM booking_changes WHERE revision > ? AND booking_id <= ?)
+                    ORDER BY id DESC
+                ''', (last_revision, last_booking_id))
+                changes['updated'] = self.decode_rows(cursor.fetchall())
+                changes['deleted'] = sorted(changed_ids - {row[0] for row in changes['updated']}, reverse=True)
+            
+            return changes
+    
+    def search_bookings_page(self, search_term, before_id=None, page_size=BOOKING_PAGE_SIZE, cancel=None,
+                             after_id=0):
+        """Retrieve one page of search matches, newest first, with ID below before_id.
+        
+        Only matches with ID above after_id are considered, e.g. the new
+        bookings since a search was shown. Setting the optional cancel
+        event abandons the search with QueryCancelledError.
+        """
+        with self.read_session(cancel) as cursor:
+            search_term = search_term.strip()
+            upper = MAX_ROWID if before_id is None else before_id
+            match_query = build_match_query(search_term)
+            
+            if not match_query:
+                return []
+            
+            # An exact booking ID match is included in whichever page it falls into
+            booking_id = search_booking_id(search_term)
+            if booking_id is None:
+                booking_id = -1
+            cursor.execute('''
+                SELECT id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+                       booked_at, start_day, end_day, status_code
+                FROM bookings
+                WHERE id IN (
+                    SELECT id FROM (
+                        SELECT rowid AS id FROM bookings_fts
+                        WHERE bookings_fts MATCH ? AND rowid < ? AND rowid > ?
+                        ORDER BY rowid DESC
+                        LIMIT ?
+                    )
+                    UNION
+                    SELECT id FROM bookings WHERE id = ? AND id < ? AND id > ?
+                )
+                ORDER BY id DESC
+                LIMIT ?
+            ''', (match_query, upper, after_id, page_size, booking_id, upper, after_id, page_size))
+            return self.decode_rows(cursor.fetchall())
+    
+    def iter_search_bookings(self, search_term, page_size=BOOKING_PAGE_SIZE, cancel=None):
+        """Yield all search matches, newest first, in chunks of up to page_size rows.
+        
+        Setting the optional cancel event stops the search with QueryCancelledError.
+        """
+        before_id = None
+        while True:
+            if cancel is not None and cancel.is_set():
+                raise QueryCancelledError("Query cancelled")
+            page = self.search_bookings_page(search_term, before_id, page_size, cancel)
+            if not page:
+                return
+            yield page
+            if len(page) < page_size:
+                return
+            before_id = page[-1][0]
+    
+    def search_bookings(self, search_term, limit=BOOKING_PAGE_SIZE, cancel=None):
+        """Search bookings by booking ID or by name, address, car and fuel text.
+        
+        An exact booking ID match comes first, followed by full-text matches
+        ordered by relevance. Each word is matched as a token prefix.
+        Only the newest SEARCH_RANK_CANDIDATES matches (or limit, if more)
+        are ranked; pass limit=None to rank every match.
+        Setting the optional cancel event abandons the search with
+        QueryCancelledError.
+        """
+        with self.read_session(cancel) as cursor:
+            search_term = search_term.strip()
+            results = []
+            
+            booking_id = search_booking_id(search_term)
+            if booking_id is not None:
+                cursor.execute('''
+                    SELECT id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+                           booked_at, start_day, end_day, status_code
+                    FROM bookings
+                    WHERE id = ?
+                ''', (booking_id,))
+                results.extend(cursor.fetchall())
+            
+            match_query = build_match_query(search_term)
+            if not match_query:
+                return self.decode_rows(results)
+            
+            cursor.execute('''
+                SELECT b.id, b.customer_name, b.car_type_code, b.fuel_type_code, b.days, b.total_pence,
+                       b.booked_at, b.start_day, b.end_day, b.status_code
+                FROM (SELECT rowid, rank FROM bookings_fts
+                      WHERE bookings_fts MATCH ?
+                      ORDER BY rowid DESC
+                      LIMIT ?) f
+                JOIN bookings b ON b.id = f.rowid
+                ORDER BY f.rank, b.id DESC
+                LIMIT ?
+            ''', (match_query,
+                  -1 if limit is None else max(limit, SEARCH_RANK_CANDIDATES),
+                  -1 if limit is None else limit))
+            
+            seen = {row[0] for row in results}
+            results.extend(row for row in cursor.fetchall() if row[0] not in seen)
+            return self.decode_rows(results[:limit] if limit is not None else results)
     
     def get_booking_stats(self):
-        """Get statistics for dashboard."""
-        stats = {}
+        """Get statistics for dashboard from the trigger-maintained summary."""
+        with self.read_session() as cursor:
+            cursor.execute('''
+                SELECT total_bookings, total_revenue_pence, active_bookings,
+                       (SELECT t.name FROM car_type_stats s
+                        JOIN car_types t ON t.code = s.car_type_code
+                        WHERE s.bookings > 0
+                        ORDER BY s.bookings DESC, t.name
+                        LIMIT 1)
+                FROM booking_stats
+                WHERE id = 1
+            ''')
+            total_bookings, total_revenue_pence, active_bookings, popular_car = cursor.fetchone()
+            
+            return {
+                'total_bookings': total_bookings,
+                'total_revenue': total_revenue_pence / 100,
+                'active_bookings': active_bookings,
+                'popular_car': popular_car if popular_car else 'N/A',
+            }
+    
+    def rebuild_booking_stats(self):
+        """Rebuild the statistics summary from scratch.
         
-        # Total bookings
-        self.cursor.execute('SELECT COUNT(*) FROM bookings')
-        stats['total_bookings'] = self.cursor.fetchone()[0]
+        Returns True if the maintained counters already matched the rebuilt ones.
+        """
+        with self.write_session() as cursor:
+            before = self.get_booking_stats()
+            cursor.execute('SELECT car_type_code, bookings FROM car_type_stats WHERE bookings != 0')
+            before_cars = set(cursor.fetchall())
+            
+            recompute_booking_stats(cursor)
+            
+            after = self.get_booking_stats()
+            cursor.execute('SELECT car_type_code, bookings FROM car_type_stats WHERE bookings != 0')
+            after_cars = set(cursor.fetchall())
         
-        # Total revenue
-        self.cursor.execute('SELECT SUM(total_cost) FROM bookings')
-        total = self.cursor.fetchone()[0]
-        stats['total_revenue'] = total if total else 0.0
+        return before == after and before_cars == after_cars
+    
+    def storage_report(self):
+        """Measure the on-disk size of bookings and how fast it aggregates.
         
-        # Active bookings
-        self.cursor.execute("SELECT COUNT(*) FROM bookings WHERE status = 'Active'")
-        stats['active_bookings'] = self.cursor.fetchone()[0]
+        cache_coverage is the share of the bookings table that fits in the
+        page cache, which bounds the cache hit rate of a full scan.
+        """
+        report = {'file_bytes': os.path.getsize(self.db_path)}
         
-        # Most popular car type
-        self.cursor.execute('''
-            SELECT car_type, COUNT(*) as count
-            FROM bookings
-            GROUP BY car_type
-            ORDER BY count DESC
-            LIMIT 1
-        ''')
-        result = self.cursor.fetchone()
-        stats['popular_car'] = result[0] if result else 'N/A'
+        with self.read_session() as cursor:
+            cursor.execute('PRAGMA page_size')
+            page_size = cursor.fetchone()[0]
+            cursor.execute('PRAGMA cache_size')
+            cache_size = cursor.fetchone()[0]
+            cache_pages = -cache_size * 1024 // page_size if cache_size < 0 else cache_size
+            
+            try:
+                cursor.execute('''
+                    SELECT name, SUM(pgsize), COUNT(*) FROM dbstat
+                    WHERE name = 'bookings' OR name LIKE 'idx_bookings%'
+                    GROUP BY name
+                ''')
+                sizes = {name: (size, pages) for name, size, pages in cursor.fetchall()}
+            except sqlite3.OperationalError:
+                # SQLite built without the dbstat virtual table
+                sizes = {}
+            
+            table_bytes, table_pages = sizes.pop('bookings', (None, None))
+            report['table_bytes'] = table_bytes
+            report['index_bytes'] = sum(size for size, _ in sizes.values()) if sizes else None
+            report['cache_coverage'] = min(1.0, cache_pages / table_pages) if table_pages else None
+            
+            timings = {}
+            for label, sql in (
+                ('sum_revenue', 'SELECT COUNT(*), SUM(total_pence) FROM bookings'),
+                ('revenue_by_car_type', '''
+                    SELECT car_type_code, COUNT(*), SUM(total_pence)
+                    FROM bookings
+                    GROUP BY car_type_code
+                '''),
+                ('days_by_month', '''
+                    SELECT start_day / 30, SUM(days)
+                    FROM bookings
+                    GROUP BY start_day / 30
+                '''),
+            ):
+                started = time.perf_counter()
+                cursor.execute(sql)
+                cursor.fetchall()
+                timings[label] = time.perf_counter() - started
+            report['aggregate_seconds'] = timings
         
-        return stats
+        return report
     
     def close(self):
         """Close database connection."""
-        if self.conn:
-            self.conn.close()
+        if self.writer:
+            self.writer.stop()
+            self.writer = None
+        if self.tracer and self.tracer.slow_log_path and self.pool:
+            with open(self.tracer.slow_log_path, 'a', encoding='utf-8') as log:
+                log.write(self.tracer.format_report() + '\n\n')
+        if self.pool:
+            try:
+                self.checkpoint(DURABILITY_PROFILES[self.durability]['checkpoint_on_close'])
+            except sqlite3.Error:
+                # Another process is still reading; its close will checkpoint
+                pass
+            self.pool.close()
+            self.pool = None
+
+
+def measure_durability(profile, bookings=200, db_dir=None):
+    """Time single-booking transactions under a durability profile.
+    
+    Runs against a scratch database and returns commit latency percentiles
+    in milliseconds and overall bookings per second.
+    """
+    with tempfile.TemporaryDirectory(dir=db_dir) as scratch:
+        db = Database(os.path.join(scratch, 'bookings.db'), durability=profile)
+        try:
+            latencies = []
+            started = time.perf_counter()
+            for i in range(bookings):
+                t0 = time.perf_counter()
+                db.create_booking(
+                    'Bench', f'Customer{i}', '1 Test Street', 30, 1,
+                    'City Car', 'Petrol', 3, 0, 0, 75.0, 0.0, 0.0, 0.0, 75.0,
+                    (date.today() + timedelta(days=3 * i)).isoformat()
+                )
+                latencies.append((time.perf_counter() - t0) * 1000)
+            elapsed = time.perf_counter() - started
+        finally:
+            db.close()
+    
+    latencies.sort()
+    return {
+        'profile': profile,
+        'bookings': bookings,
+        'bookings_per_second': bookings / elapsed if elapsed else 0.0,
+        'p50_ms': latencies[len(latencies) // 2],
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        'max_ms': latencies[-1],
+    }
+
+
+def measure_write_behind(bookings=2000, clients=8, profile=DEFAULT_DURABILITY, db_dir=None):
+    """Compare confirming bookings directly with confirming them write-behind.
+    
+    clients threads each confirm their share of bookings as fast as they
+    can, once calling create_booking directly and once through
+    submit_write and waiting on the future. Returns throughput and latency
+    percentiles (ms, from call to committed booking id) for each mode.
+    """
+    def percentile(values, fraction):
+        return values[min(len(values) - 1, int(len(values) * fraction))]
+    
+    results = {}
+    for mode in ('direct', 'write_behind'):
+        with tempfile.TemporaryDirectory(dir=db_dir) as scratch:
+            db = Database(os.path.join(scratch, 'bookings.db'), durability=profile)
+            latencies = []
+            latencies_lock = threading.Lock()
+            
+            def client(first):
+                mine = []
+                for i in range(first, bookings, clients):
+                    booking = (
+                        'Bench', f'Customer{i}', '1 Test Street', 30, 1,
+                        'City Car', 'Petrol', 3, 0, 0, 75.0, 0.0, 0.0, 0.0, 75.0,
+                        (date.today() + timedelta(days=3 * i)).isoformat()
+                    )
+                    t0 = time.perf_counter()
+                    if mode == 'direct':
+                        db.create_booking(*booking)
+                    else:
+                        db.submit_write('create_booking', *booking).result()
+                    mine.append((time.perf_counter() - t0) * 1000)
+                with latencies_lock:
+                    latencies.extend(mine)
+            
+            try:
+                threads = [threading.Thread(target=client, args=(n,)) for n in range(clients)]
+                started = time.perf_counter()
+                for thread in threads:
+                    thread.start()
+                for thread in threads:
+                    thread.join()
+                elapsed = time.perf_counter() - started
+            finally:
+                db.close()
+        
+        latencies.sort()
+        results[mode] = {
+            'bookings': len(latencies),
+            'bookings_per_second': len(latencies) / elapsed if elapsed else 0.0,
+            'p50_ms': percentile(latencies, 0.5),
+            'p99_ms': percentile(latencies, 0.99),
+            'max_ms': latencies[-1],
+        }
+    return results
+
+
+def measure_startup(db_path, runs=5):
+    """Time opening an existing database the way the application does.
+    
+    Each run constructs a Database and loads the first bookings page and the
+    statistics the dashboard shows. Returns the per-run totals in milliseconds.
+    """
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        db = Database(db_path)
+        try:
+            opened = time.perf_counter()
+            db.get_bookings_page()
+            db.get_booking_stats()
+            ready = time.perf_counter()
+        finally:
+            db.close()
+        timings.append({
+            'open_ms': (opened - started) * 1000,
+            'first_page_ms': (ready - opened) * 1000,
+            'total_ms': (ready - started) * 1000,
+        })
+    return timings
+
+
+if __name__ == "__main__":
+    import argparse
+    import json
+    from modules.rate_simulator import simulate_tariffs
+    
+    parser = argparse.ArgumentParser(description="WeAreCars database maintenance")
+    parser.add_argument('--db', default='data/bookings.db', help="path to bookings.db")
+    parser.add_argument('--trace', nargs='?', type=float, const=SLOW_QUERY_MS, default=None, metavar='SLOW_MS',
+                        help="time every statement and print a report; statements slower than SLOW_MS are explained")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    subparsers.add_parser('rebuild-stats', help="recompute the statistics summary and verify it")
+    bench = subparsers.add_parser('bench-durability', help="measure commit latency for each durability profile")
+    bench.add_argument('--bookings', type=int, default=200, help="bookings to create per profile")
+    bench.add_argument('--dir', default=None, help="directory for scratch databases (defaults to the system temp dir)")
+    behind = subparsers.add_parser('bench-write-behind', help="compare direct and write-behind booking confirmation")
+    behind.add_argument('--bookings', type=int, default=2000, help="bookings to confirm per mode")
+    behind.add_argument('--clients', type=int, default=8, help="threads confirming bookings at once")
+    behind.add_argument('--durability', default=DEFAULT_DURABILITY, choices=sorted(DURABILITY_PROFILES))
+    behind.add_argument('--dir', default=None, help="directory for scratch databases (defaults to the system temp dir)")
+    subparsers.add_parser('storage-report', help="report bookings file size and aggregate speed")
+    subparsers.add_parser('merge-customers', help="merge customers with the same name and address")
+    fleet = subparsers.add_parser('set-fleet', help="set how many cars of a type the fleet holds")
+    fleet.add_argument('car_type', help="car type, e.g. 'City Car'")
+    fleet.add_argument('size', type=int, help="number of cars")
+    demo = subparsers.add_parser('seed-demo', help="add demo customers and bookings to an empty database")
+    demo.add_argument('--seed', type=int, default=None, help="random seed for reproducible demo data")
+    startup = subparsers.add_parser('bench-startup', help="time opening the database against the startup budget")
+    startup.add_argument('--runs', type=int, default=5, help="number of timed launches")
+    startup.add_argument('--budget-ms', type=float, default=STARTUP_BUDGET_MS, help="allowed launch time in ms")
+    simulate = subparsers.add_parser('simulate-rates', help="re-price booking history under candidate tariffs")
+    simulate.add_argument('scenarios', help="JSON file mapping scenario names to rate changes "
+                                            "(daily_rates, car_surcharges, fuel_surcharges, extra_rates)")
+    simulate.add_argument('--from', dest='start_date', default=None, help="first start date to include (YYYY-MM-DD)")
+    simulate.add_argument('--to', dest='end_date', default=None, help="start date to stop before (YYYY-MM-DD)")
+    importer = subparsers.add_parser('import-csv', help="bulk import historical bookings from a CSV file")
+    importer.add_argument('csv_file', help="CSV file with a header row")
+    importer.add_argument('--bad-rows', default=None, help="write rejected rows and reasons to this CSV file")
+    importer.add_argument('--batch-size', type=int, default=IMPORT_BATCH_SIZE, help="rows per insert batch")
+    importer.add_argument('--defer-indexes', action='store_true',
+                          help="drop the booking indexes for the load and rebuild them at the end; "
+                               "faster for imports that are large next to the existing table")
+    args = parser.parse_args()
+    
+    if args.command == 'bench-durability':
+        for name in DURABILITY_PROFILES:
+            result = measure_durability(name, args.bookings, args.dir)
+            print(f"{name:<10} {result['bookings_per_second']:>10.1f} bookings/s  "
+                  f"p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms  max {result['max_ms']:.3f} ms")
+        raise SystemExit(0)
+    
+    if args.command == 'bench-write-behind':
+        results = measure_write_behind(args.bookings, args.clients, args.durability, args.dir)
+        for mode, result in results.items():
+            print(f"{mode:<13} {result['bookings_per_second']:>10.1f} bookings/s  "
+                  f"p50 {result['p50_ms']:.3f} ms  p99 {result['p99_ms']:.3f} ms  max {result['max_ms']:.3f} ms")
+        raise SystemExit(0)
+    
+    if args.command == 'bench-startup':
+        # The first launch upgrades the file if needed; only warm launches count
+        Database(args.db).close()
+        timings = measure_startup(args.db, args.runs)
+        for run, timing in enumerate(timings, 1):
+            print(f"run {run}: open {timing['open_ms']:.1f} ms  first page {timing['first_page_ms']:.1f} ms  "
+                  f"total {timing['total_ms']:.1f} ms")
+        slowest = max(timing['total_ms'] for timing in timings)
+        within = slowest <= args.budget_ms
+        print(f"Slowest launch {slowest:.1f} ms, budget {args.budget_ms:.0f} ms: {'OK' if within else 'OVER BUDGET'}")
+        raise SystemExit(0 if within else 1)
+    
+    def report_fleets(raised):
+        for car_type, (old, new) in raised.items():
+            print(f"Raised the {car_type} fleet from {old} to {new} cars to cover its busiest day")
+    
+    db = Database(args.db, tracer=SQLTracer(args.trace) if args.trace is not None else None)
+    try:
+        if args.command == 'rebuild-stats':
+            consistent = db.rebuild_booking_stats()
+            print(db.get_booking_stats())
+            print("Summary was consistent" if consistent else "Summary was out of date and has been rebuilt")
+        elif args.command == 'storage-report':
+            for key, value in db.storage_report().items():
+                print(f"{key}: {value}")
+        elif args.command == 'merge-customers':
+            print(f"Merged {db.merge_duplicate_customers()} duplicate customers")
+        elif args.command == 'seed-demo':
+            added = db.seed_demo_data(args.seed)
+            print(f"Added {added} demo bookings" if added else "Bookings already exist; nothing added")
+            report_fleets(db.fit_fleet_sizes())
+        elif args.command == 'set-fleet':
+            try:
+                db.set_fleet_size(args.car_type, args.size)
+            except ValueError as e:
+                parser.error(str(e))
+            print(f"{args.car_type} fleet set to {args.size} cars")
+        elif args.command == 'simulate-rates':
+            with open(args.scenarios, encoding='utf-8') as f:
+                specs = json.load(f)
+            pricing = db.get_pricing()
+            scenarios = {name: pricing.revised(**spec) for name, spec in specs.items()}
+            print(json.dumps(simulate_tariffs(db, scenarios, args.start_date, args.end_date), indent=2))
+        elif args.command == 'import-csv':
+            result = db.import_bookings_csv(
+                args.csv_file,
+                progress=lambda read, done, bad: print(f"\r{read} rows read, {done} imported, {bad} rejected", end='', flush=True),
+                bad_rows_path=args.bad_rows,
+                batch_size=args.batch_size,
+                defer_indexes=args.defer_indexes
+            )
+            print()
+            print(f"Imported {result['imported']} of {result['rows_read']} rows in {result['elapsed']:.1f}s "
+                  f"({result['rejected']} rejected)")
+            report_fleets(db.fit_fleet_sizes())
+        if args.trace is not None:
+            print()
+            print(db.format_trace_report())
+    finally:
+        db.close()
@@ -0,0 +1,203 @@
+"""
+Export Module - Streaming Booking Exports
+WeAreCars Car Rental System
+
+Bookings are read in fetchmany chunks from one read snapshot and written
+as each chunk arrives, so memory use stays flat however many bookings
+there are. Nothing here touches Tk: exports can run on a worker thread,
+reporting progress through a callback and stopping when a
+threading.Event is set.
+
+Run as a module for headless exports to a file or stdout, as CSV or
+newline-delimited JSON, optionally gzipped. With --checkpoint each run
+carries on from the last booking the previous run exported, so nightly
+jobs move only the new bookings.
+"""
+
+import csv
+import gzip
+import io
+import json
+import os
+import sys
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+from modules.database import DEFAULT_EXPORT_COLUMNS, EXPORT_CHUNK_SIZE, EXPORT_COLUMNS
+
+# Output formats: CSV with a heading row, or one JSON object per line
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+# gzip compression level; 3 keeps up with the export, where 6 is a fifth
+# smaller but takes nearly twice as long
+GZIP_LEVEL = 3
+
+
+def write_bookings(database, stream, format='csv', columns=DEFAULT_EXPORT_COLUMNS, progress=None,
+                   cancel=None, chunk_size=EXPORT_CHUNK_SIZE, **query):
+    """Write bookings to a text stream; returns (rows written, ID of the last row or None).
+
+    NDJSON lines are rendered by SQLite, keyed by column name; money
+    stays exact as two-decimal text. query takes the after_id,
+    booked_since and oldest_first options of Database.iter_export_bookings.
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unknown export format: {format}")
+    unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+    if unknown:
+        raise ValueError(f"Unknown export columns: {', '.join(unknown)}")
+
+    if format == 'csv':
+        writer = csv.writer(stream)
+        writer.writerow([EXPORT_COLUMNS[column][0] for column in columns])
+        write = writer.writerows
+        id_index = columns.index('id') if 'id' in columns else None
+    else:
+        def write(chunk):
+            stream.write(''.join([line for line, _ in chunk]))
+        id_index = 1
+
+    count = 0
+    last_id = None
+    for chunk in database.iter_export_bookings(columns, chunk_size, progress, cancel,
+                                               as_json=format == 'ndjson', **query):
+        write(chunk)
+        count += len(chunk)
+        if id_index is not None:
+            last_id = chunk[-1][id_index]
+    return count, last_id
+
+
+@contextmanager
+def export_output(filename, compress=False):
+    """Open filename, or '-' for stdout, as a UTF-8 text stream, gzipped if compress.
+
+    A file is written under a temporary name and renamed once the block
+    completes, so a cancelled or failed export never leaves a truncated
+    file behind.
+    """
+    if filename == '-':
+        binary = sys.stdout.buffer
+        sys.stdout.flush()
+        gzipped = gzip.GzipFile(fileobj=binary, mode='wb', compresslevel=GZIP_LEVEL) if compress else None
+        stream = io.TextIOWrapper(gzipped or binary, encoding='utf-8', newline='')
+        try:
+            yield stream
+            stream.flush()
+        finally:
+            # Leave stdout itself open
+            stream.detach()
+            if gzipped is not None:
+                gzipped.close()
+            binary.flush()
+        return
+
+    partial = filename + '.partial'
+    try:
+        if compress:
+            stream = gzip.open(partial, 'wt', compresslevel=GZIP_LEVEL, encoding='utf-8', newline='')
+        else:
+            stream = open(partial, 'w', newline='', encoding='utf-8')
+        with stream:
+            yield stream
+        os.replace(partial, filename)
+    except BaseException:
+        if os.path.exists(partial):
+            os.remove(partial)
+        raise
+
+
+def export_bookings_csv(database, filename, columns=DEFAULT_EXPORT_COLUMNS,
+                        progress=None, cancel=None, chunk_size=EXPORT_CHUNK_SIZE):
+    """Write bookings to a CSV file with the chosen columns; returns the row count.
+
+    See Database.iter_export_bookings for progress and cancel.
+    """
+    with export_output(filename) as stream:
+        count, _ = write_bookings(database, stream, 'csv', columns, progress, cancel, chunk_size)
+    return count
+
+
+def read_checkpoint(path):
+    """Return the last booking ID recorded in a checkpoint file, or None if there is none yet."""
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as f:
+        return int(json.load(f)['last_id'])
+
+
+def write_checkpoint(path, last_id, rows):
+    """Record the last booking ID exported, replacing the checkpoint file atomically."""
+    partial = path + '.partial'
+    with open(partial, 'w', encoding='utf-8') as f:
+        json.dump({
+            'last_id': last_id,
+            'rows': rows,
+            'exported_at': datetime.now(timezone.utc).strftime('%Y-%m-%d %H:%M:%S'),
+        }, f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(partial, path)
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+
+    from modules.database import MAX_ROWID, Database
+    from modules.storage import text_to_seconds
+
+    parser = argparse.ArgumentParser(description="Export WeAreCars bookings with their customers, oldest first")
+    parser.add_argument('--db', default='data/bookings.db', help="path to bookings.db")
+    parser.add_argument('--format', default='ndjson', choices=EXPORT_FORMATS, help="output format")
+    parser.add_argument('--out', default='-', help="output file, or - for stdout")
+    parser.add_argument('--gzip', action='store_true', help="gzip the output (implied by an --out ending in .gz)")
+    parser.add_argument('--columns', default=None,
+                        help=f"comma-separated columns to export (default all): {', '.join(EXPORT_COLUMNS)}")
+    parser.add_argument('--since-id', type=int, default=None, help="export only bookings with a higher ID")
+    parser.add_argument('--since', default=None, metavar='TIMESTAMP',
+                        help="export only bookings made at or after 'YYYY-MM-DD[ HH:MM:SS]' (local time)")
+    parser.add_argument('--checkpoint', default=None,
+                        help="file recording the last booking exported; runs carry on from it and update it")
+    parser.add_argument('--chunk-size', type=int, default=EXPORT_CHUNK_SIZE, help="rows per fetch")
+    args = parser.parse_args()
+
+    columns = tuple(args.columns.split(',')) if args.columns else tuple(EXPORT_COLUMNS)
+    unknown = [column for column in columns if column not in EXPORT_COLUMNS]
+    if unknown:
+        parser.error(f"unknown columns: {', '.join(unknown)}")
+    if args.checkpoint and args.format == 'csv' and 'id' not in columns:
+        parser.error("--checkpoint with --format csv needs the id column")
+    if args.since_id is not None and not 0 <= args.since_id <= MAX_ROWID:
+        parser.error(f"--since-id must be between 0 and {MAX_ROWID}")
+    if args.since is not None:
+        try:
+            text_to_seconds(args.since)
+        except ValueError:
+            parser.error(f"--since is not a 'YYYY-MM-DD[ HH:MM:SS]' timestamp: {args.since}")
+
+    after_id = args.since_id
+    if args.checkpoint:
+        checkpoint_id = read_checkpoint(args.checkpoint)
+        if checkpoint_id is not None:
+            after_id = max(after_id or 0, checkpoint_id)
+
+    db = Database(args.db)
+    try:
+        started = time.perf_counter()
+        with export_output(args.out, args.gzip or args.out.endswith('.gz')) as stream:
+            count, last_id = write_bookings(
+                db, stream, args.format, columns, chunk_size=args.chunk_size,
+                after_id=after_id, booked_since=args.since, oldest_first=True
+            )
+        # Only once the output is complete, so a failed run is simply repeated
+        if args.checkpoint and last_id is not None:
+            write_checkpoint(args.checkpoint, last_id, count)
+        print(f"Exported {count} bookings in {time.perf_counter() - started:.1f}s"
+              + (f", up to booking {last_id}" if last_id is not None else ""), file=sys.stderr)
+    except BrokenPipeError:
+        # The reader stopped early (e.g. piped into head); the checkpoint is left as it was
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        raise SystemExit(1)
+    finally:
+        db.close()
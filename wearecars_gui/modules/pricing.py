@@ -0,0 +1,216 @@
+"""
+Pricing Module - Table-Driven Rental Quotes
+WeAreCars Car Rental System
+
+Rates come from the cars, fuel_types and extras tables and are held in
+pence, so every quote adds up exactly. quote() prices one rental for the
+booking screens; quote_batch() prices whole columns of rentals at once for
+imports and reports, using NumPy when it is installed.
+"""
+
+from modules.storage import from_pence, to_pence
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# Per-day extras, in the order they appear on a booking
+EXTRAS = ('unlimited_mileage', 'breakdown_cover')
+
+
+class PricingEngine:
+    """Rate tables for quoting rentals, keyed by car and fuel type."""
+
+    def __init__(self, car_rates, fuel_surcharges, extra_rates, car_types, fuel_types):
+        """Build an engine from rates in pounds.
+
+        car_rates maps car type to (daily_rate, surcharge), fuel_surcharges
+        maps fuel type to its surcharge and extra_rates maps each name in
+        EXTRAS to its daily rate. car_types and fuel_types are the
+        CategoryCodes used to store bookings.
+        """
+        self.car_types = car_types
+        self.fuel_types = fuel_types
+        self.car_rates = {name: (to_pence(rate), to_pence(surcharge))
+                          for name, (rate, surcharge) in car_rates.items()}
+        self.fuel_surcharges = {name: to_pence(surcharge) for name, surcharge in fuel_surcharges.items()}
+        self.extra_rates = {name: to_pence(extra_rates.get(name, 0)) for name in EXTRAS}
+
+        # Rate columns indexed by category code; -1 marks a code with no rate
+        car_size = max(car_types.names, default=0) + 1
+        fuel_size = max(fuel_types.names, default=0) + 1
+        self._daily_rate = [-1] * car_size
+        self._car_surcharge = [-1] * car_size
+        self._fuel_surcharge = [-1] * fuel_size
+        for name, (rate, surcharge) in self.car_rates.items():
+            code = car_types.codes.get(name)
+            if code is not None:
+                self._daily_rate[code] = rate
+                self._car_surcharge[code] = surcharge
+        for name, surcharge in self.fuel_surcharges.items():
+            code = fuel_types.codes.get(name)
+            if code is not None:
+                self._fuel_surcharge[code] = surcharge
+
+    @classmethod
+    def load(cls, cursor, car_types, fuel_types):
+        """Read the rate tables through an open database cursor."""
+        cursor.execute('SELECT car_type, daily_rate, surcharge FROM cars ORDER BY id DESC')
+        # Descending id, so the first row of each car type wins
+        car_rates = {car_type: (rate, surcharge) for car_type, rate, surcharge in cursor.fetchall()}
+        cursor.execute('SELECT name, surcharge FROM fuel_types')
+        fuel_surcharges = dict(cursor.fetchall())
+        cursor.execute('SELECT name, daily_rate FROM extras')
+        extra_rates = dict(cursor.fetchall())
+        return cls(car_rates, fuel_surcharges, extra_rates, car_types, fuel_types)
+
+    def revised(self, daily_rates=None, car_surcharges=None, fuel_surcharges=None, extra_rates=None):
+        """Return a copy of this engine with some rates replaced, in pounds.
+
+        daily_rates is either one rate for every car type or a dict by car
+        type; the other arguments are dicts. Rates not given are kept.
+        """
+        car_rates = {name: [from_pence(rate), from_pence(surcharge)]
+                     for name, (rate, surcharge) in self.car_rates.items()}
+        if daily_rates is not None:
+            if not isinstance(daily_rates, dict):
+                daily_rates = dict.fromkeys(car_rates, daily_rates)
+            for name, rate in daily_rates.items():
+                car_rates.setdefault(name, [0.0, 0.0])[0] = rate
+        for name, surcharge in (car_surcharges or {}).items():
+            car_rates.setdefault(name, [0.0, 0.0])[1] = surcharge
+
+        fuel = {name: from_pence(surcharge) for name, surcharge in self.fuel_surcharges.items()}
+        fuel.update(fuel_surcharges or {})
+        extras = {name: from_pence(rate) for name, rate in self.extra_rates.items()}
+        extras.update(extra_rates or {})
+
+        return PricingEngine(
+            {name: tuple(rates) for name, rates in car_rates.items()},
+            fuel, extras, self.car_types, self.fuel_types
+        )
+
+    def daily_rate(self, car_type):
+        """Return the daily rate for a car type in pounds."""
+        return from_pence(self._car_rate(car_type)[0])
+
+    def extra_rate(self, extra):
+        """Return the daily rate of an extra in pounds."""
+        return from_pence(self.extra_rates[extra])
+
+    def _car_rate(self, car_type):
+        try:
+            return self.car_rates[car_type]
+        except KeyError:
+            raise ValueError(f"No rate for car type: {car_type}") from None
+
+    def quote(self, car_type, fuel_type, days, unlimited_mileage=False, breakdown_cover=False):
+        """Price one rental.
+
+        Returns a dict of the cost breakdown in pounds, with the same names
+        the bookings table uses plus the per-extra costs.
+        """
+        rate, car_surcharge = self._car_rate(car_type)
+        try:
+            fuel_surcharge = self.fuel_surcharges[fuel_type]
+        except KeyError:
+            raise ValueError(f"No surcharge for fuel type: {fuel_type}") from None
+
+        base = rate * days
+        mileage = self.extra_rates['unlimited_mileage'] * days if unlimited_mileage else 0
+        breakdown = self.extra_rates['breakdown_cover'] * days if breakdown_cover else 0
+        total = base + car_surcharge + fuel_surcharge + mileage + breakdown
+
+        return {
+            'daily_rate': from_pence(rate),
+            'base_cost': from_pence(base),
+            'car_surcharge': from_pence(car_surcharge),
+            'fuel_surcharge': from_pence(fuel_surcharge),
+            'mileage_cost': from_pence(mileage),
+            'breakdown_cost': from_pence(breakdown),
+            'extras_cost': from_pence(mileage + breakdown),
+            'total_cost': from_pence(total),
+        }
+
+    def quote_batch(self, days, car_codes, fuel_codes, unlimited_mileage, breakdown_cover):
+        """Price many rentals given as equal-length columns.
+
+        Car and fuel types are given as stored category codes and the extras
+        as 0/1 flags. Returns a dict of pence columns: base_pence,
+        car_surcharge_pence, fuel_surcharge_pence, extras_pence and
+        total_pence. The columns are NumPy int64 arrays when NumPy is
+        installed and lists of ints otherwise.
+        """
+        if len({len(days), len(car_codes), len(fuel_codes), len(unlimited_mileage), len(breakdown_cover)}) > 1:
+            raise ValueError("Batch columns must all be the same length")
+        if np is not None:
+            return self._quote_arrays(days, car_codes, fuel_codes, unlimited_mileage, breakdown_cover)
+        return self._quote_lists(days, car_codes, fuel_codes, unlimited_mileage, breakdown_cover)
+
+    def _quote_arrays(self, days, car_codes, fuel_codes, unlimited_mileage, breakdown_cover):
+        days = np.asarray(days, dtype=np.int64)
+        car_codes = np.asarray(car_codes, dtype=np.intp)
+        fuel_codes = np.asarray(fuel_codes, dtype=np.intp)
+        try:
+            rate = np.asarray(self._daily_rate, dtype=np.int64)[car_codes]
+            car_surcharge = np.asarray(self._car_surcharge, dtype=np.int64)[car_codes]
+            fuel_surcharge = np.asarray(self._fuel_surcharge, dtype=np.int64)[fuel_codes]
+        except IndexError:
+            raise ValueError("Unknown car or fuel type code in batch") from None
+        # Negative codes would index from the end of the rate tables
+        if (car_codes < 0).any() or (fuel_codes < 0).any() or (rate < 0).any() or (fuel_surcharge < 0).any():
+            raise ValueError("Unknown car or fuel type code in batch")
+
+        base = rate * days
+        extras_rate = (np.asarray(unlimited_mileage, dtype=np.int64) * self.extra_rates['unlimited_mileage']
+                       + np.asarray(breakdown_cover, dtype=np.int64) * self.extra_rates['breakdown_cover'])
+        extras = extras_rate * days
+        return {
+            'base_pence': base,
+            'car_surcharge_pence': car_surcharge,
+            'fuel_surcharge_pence': fuel_surcharge,
+            'extras_pence': extras,
+            'total_pence': base + car_surcharge + fuel_surcharge + extras,
+        }
+
+    def _quote_lists(self, days, car_codes, fuel_codes, unlimited_mileage, breakdown_cover):
+        daily_rate = self._daily_rate
+        car_surcharges = self._car_surcharge
+        fuel_surcharges = self._fuel_surcharge
+        mileage_rate = self.extra_rates['unlimited_mileage']
+        breakdown_rate = self.extra_rates['breakdown_cover']
+
+        base = []
+        car_column = []
+        fuel_column = []
+        extras = []
+        total = []
+        try:
+            for n, car, fuel, mileage, breakdown in zip(days, car_codes, fuel_codes,
+                                                        unlimited_mileage, breakdown_cover):
+                # Negative codes would index from the end of the rate lists
+                if car < 0 or fuel < 0:
+                    raise IndexError(car)
+                rate = daily_rate[car]
+                car_surcharge = car_surcharges[car]
+                fuel_surcharge = fuel_surcharges[fuel]
+                if rate < 0 or fuel_surcharge < 0:
+                    raise IndexError(car)
+                cost = rate * n
+                extra = (mileage_rate * mileage + breakdown_rate * breakdown) * n
+                base.append(cost)
+                car_column.append(car_surcharge)
+                fuel_column.append(fuel_surcharge)
+                extras.append(extra)
+                total.append(cost + car_surcharge + fuel_surcharge + extra)
+        except (IndexError, TypeError):
+            raise ValueError("Unknown car or fuel type code in batch") from None
+
+        return {
+            'base_pence': base,
+            'car_surcharge_pence': car_column,
+            'fuel_surcharge_pence': fuel_column,
+            'extras_pence': extras,
+            'total_pence': total,
+        }
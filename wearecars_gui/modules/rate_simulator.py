@@ -0,0 +1,157 @@
+"""
+Rate Simulator Module - What-If Revenue under Candidate Tariffs
+WeAreCars Car Rental System
+
+Loads the booking history into columns once, re-prices every booking under
+one or more candidate rate tables with PricingEngine.quote_batch(), and
+compares the result with the revenue actually recorded.
+"""
+
+from array import array
+from datetime import date
+
+from modules.availability import to_day
+from modules.pricing import np
+from modules.storage import EPOCH_ORDINAL
+
+# Rows fetched from SQLite per chunk while loading columns
+LOAD_CHUNK_SIZE = 50000
+
+
+class BookingColumns:
+    """The priced fields of a set of bookings, one array per field."""
+
+    FIELDS = ('days', 'car_codes', 'fuel_codes', 'unlimited_mileage', 'breakdown_cover',
+              'months', 'total_pence')
+
+    def __init__(self):
+        for field in self.FIELDS:
+            setattr(self, field, array('q'))
+
+    def __len__(self):
+        return len(self.days)
+
+
+def month_key(day):
+    """Return year * 12 + month - 1 for a day since the epoch."""
+    d = date.fromordinal(day + EPOCH_ORDINAL)
+    return d.year * 12 + d.month - 1
+
+
+def month_label(key):
+    """Return 'YYYY-MM' for a month_key value."""
+    return f"{key // 12:04d}-{key % 12 + 1:02d}"
+
+
+def load_booking_columns(database, start_date=None, end_date=None):
+    """Load bookings starting in [start_date, end_date) into BookingColumns.
+
+    Either bound may be None to leave that side open.
+    """
+    columns = BookingColumns()
+    conditions = []
+    params = []
+    if start_date is not None:
+        conditions.append('start_day >= ?')
+        params.append(to_day(start_date))
+    if end_date is not None:
+        conditions.append('start_day < ?')
+        params.append(to_day(end_date))
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ''
+
+    months = {}
+    with database.read_session() as cursor:
+        cursor.execute(f'''
+            SELECT days, car_type_code, fuel_type_code, unlimited_mileage, breakdown_cover,
+                   start_day, total_pence
+            FROM bookings
+            {where}
+        ''', params)
+        while True:
+            rows = cursor.fetchmany(LOAD_CHUNK_SIZE)
+            if not rows:
+                break
+            days, cars, fuels, mileage, breakdown, start_days, totals = zip(*rows)
+            columns.days.extend(days)
+            columns.car_codes.extend(cars)
+            columns.fuel_codes.extend(fuels)
+            columns.unlimited_mileage.extend(mileage)
+            columns.breakdown_cover.extend(breakdown)
+            columns.total_pence.extend(totals)
+            for day in start_days:
+                key = months.get(day)
+                if key is None:
+                    key = months[day] = month_key(day)
+                columns.months.append(key)
+    return columns
+
+
+def group_totals(keys, values):
+    """Sum values by key; returns {key: total}."""
+    if np is not None and len(keys):
+        keys = np.asarray(keys, dtype=np.int64)
+        values = np.asarray(values, dtype=np.int64)
+        offset = int(keys.min())
+        # Float weights stay exact for sums below 2**53 pence
+        sums = np.bincount(keys - offset, weights=values)
+        present = np.bincount(keys - offset) > 0
+        return {int(i) + offset: int(sums[i]) for i in np.flatnonzero(present)}
+
+    totals = {}
+    for key, value in zip(keys, values):
+        totals[key] = totals.get(key, 0) + value
+    return totals
+
+
+def revenue_breakdown(columns, totals, car_types, fuel_types):
+    """Summarise a pence column as revenue in total and by car, fuel and month."""
+    by_car = group_totals(columns.car_codes, totals)
+    by_fuel = group_totals(columns.fuel_codes, totals)
+    by_month = group_totals(columns.months, totals)
+    return {
+        'total': sum(by_car.values()),
+        'by_car_type': {car_types.decode(code): value for code, value in sorted(by_car.items())},
+        'by_fuel_type': {fuel_types.decode(code): value for code, value in sorted(by_fuel.items())},
+        'by_month': {month_label(key): value for key, value in sorted(by_month.items())},
+    }
+
+
+def compare(actual, candidate):
+    """Pair each candidate revenue with its change from the actual revenue, in pounds."""
+    def pair(before, after):
+        return {'revenue': after / 100, 'delta': (after - before) / 100}
+
+    result = pair(actual['total'], candidate['total'])
+    for group in ('by_car_type', 'by_fuel_type', 'by_month'):
+        result[group] = {key: pair(actual[group].get(key, 0), value)
+                         for key, value in candidate[group].items()}
+    return result
+
+
+def simulate_tariffs(database, scenarios, start_date=None, end_date=None, columns=None):
+    """Re-price the booking history under each candidate tariff.
+
+    scenarios maps a name to a PricingEngine (see PricingEngine.revised).
+    Pass columns to reuse a history already loaded with
+    load_booking_columns. Returns the recorded revenue and, for each
+    scenario, its revenue and change by car type, fuel type and month,
+    all in pounds.
+    """
+    if columns is None:
+        columns = load_booking_columns(database, start_date, end_date)
+    car_types = database.car_types
+    fuel_types = database.fuel_types
+
+    actual = revenue_breakdown(columns, columns.total_pence, car_types, fuel_types)
+    results = {}
+    for name, engine in scenarios.items():
+        quotes = engine.quote_batch(columns.days, columns.car_codes, columns.fuel_codes,
+                                    columns.unlimited_mileage, columns.breakdown_cover)
+        candidate = revenue_breakdown(columns, quotes['total_pence'], car_types, fuel_types)
+        results[name] = compare(actual, candidate)
+
+    return {
+        'bookings': len(columns),
+        'actual': compare(actual, actual),
+        'scenarios': results,
+    }
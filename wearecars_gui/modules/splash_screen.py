@@ -7,11 +7,19 @@ import tkinter as tk
 from tkinter import ttk
 from modules.styling import COLORS, FONTS, PADDING
 
+# How often the splash screen checks on background loading (ms)
+STARTUP_POLL_MS = 50
+
 class SplashScreen:
-    def __init__(self, parent, on_continue):
-        """Initialize the splash screen."""
+    def __init__(self, parent, on_continue, loader=None):
+        """Initialize the splash screen.
+        
+        With a StartupLoader, loading starts once the splash has painted,
+        its progress is shown, and Start stays disabled until it is done.
+        """
         self.parent = parent
         self.on_continue = on_continue
+        self.loader = loader
         self.window = tk.Toplevel(parent)
         self.window.title("WeAreCars - Welcome")
         self.window.geometry("500x400")
@@ -34,9 +42,47 @@ class SplashScreen:
         self.window.protocol("WM_DELETE_WINDOW", self.on_closing)
         
         self.setup_ui()
+        
+        if self.loader:
+            # Idle callbacks run after the pending redraws, so this follows the first paint
+            self.window.after_idle(self.start_loading)
+    
+    def start_loading(self):
+        """Record first paint, start background loading and begin polling it."""
+        self.loader.mark('first_paint')
+        self.loader.start()
+        self.check_loading()
+    
+    def check_loading(self):
+        """Show queued loading progress; enable Start once loading has finished."""
+        if not self.window.winfo_exists():
+            return
+        for message, fraction in self.loader.poll():
+            if message:
+                self.status_var.set(message)
+            if fraction is not None:
+                self.progress['value'] = fraction * 100
+        
+        if not self.loader.finished.is_set():
+            self.window.after(STARTUP_POLL_MS, self.check_loading)
+        elif self.loader.error is not None:
+            self.status_label.config(fg=COLORS['error'])
+        else:
+            self.start_btn.config(state='normal', cursor='hand2')
+            self.loader.mark('interactive')
+            self.status_var.set(f"Ready in {self.loader.timings['interactive_ms'] / 1000:.1f}s")
+    
+    def is_ready(self):
+        """True when there is no background loading or it has finished successfully."""
+        return self.loader is None or self.loader.ready
     
     def on_closing(self):
         """Handle window close event."""
+        if not self.is_ready():
+            # Still loading; a failed load leaves nothing to continue to
+            if self.loader.error is not None:
+                self.exit_application()
+            return
         self.window.destroy()
         self.on_continue()
     
@@ -118,6 +164,20 @@ class SplashScreen:
             )
             feature_label.pack(anchor='w', pady=2)
         
+        # Loading progress
+        if self.loader:
+            self.status_var = tk.StringVar(value="Starting...")
+            self.progress = ttk.Progressbar(content_frame, mode='determinate', maximum=100, length=300)
+            self.progress.pack(pady=(PADDING['medium'], 0))
+            self.status_label = tk.Label(
+                content_frame,
+                textvariable=self.status_var,
+                font=FONTS['small'],
+                bg=COLORS['background'],
+                fg=COLORS['disabled']
+            )
+            self.status_label.pack(pady=(2, 0))
+        
         # Button Frame
         button_frame = tk.Frame(content_frame, bg=COLORS['background'])
         button_frame.pack(side='bottom', pady=PADDING['large'])
@@ -137,7 +197,7 @@ class SplashScreen:
         )
         instructions_btn.pack(side='left', padx=5)
         
-        # Start Button
+        # Start Button, enabled once background loading is done
         start_btn = tk.Button(
             button_frame,
             text="Start Application →",
@@ -146,11 +206,13 @@ class SplashScreen:
             fg=COLORS['text_light'],
             font=FONTS['button'],
             relief='flat',
-            cursor='hand2',
+            cursor='hand2' if self.is_ready() else 'watch',
+            state='normal' if self.is_ready() else 'disabled',
             padx=20,
             pady=8
         )
         start_btn.pack(side='left', padx=5)
+        self.start_btn = start_btn
 
         # Exit Button
         exit_btn = tk.Button(
@@ -266,6 +328,8 @@ For assistance, contact support."""
     
     def continue_to_login(self):
         """Close splash and continue to login."""
+        if not self.is_ready():
+            return
         self.window.destroy()
         self.on_continue()
 
@@ -278,7 +342,16 @@ For assistance, contact support."""
 
 # Example usage
 if __name__ == "__main__":
+    import time
+    from modules.startup import StartupLoader
+    
+    launched = time.perf_counter()
     root = tk.Tk()
     root.withdraw()  # Hide the root window
-    splash = SplashScreen(root, lambda: print("Continue to login"))
+    loader = StartupLoader(started=launched)
+    
+    def continue_to_login():
+        print(f"Continue to login; startup timings (ms): {loader.timings}")
+    
+    splash = SplashScreen(root, continue_to_login, loader)
     root.mainloop()
\ No newline at end of file
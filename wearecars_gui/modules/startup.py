@@ -0,0 +1,125 @@
+"""
+Startup Module - Background Initialisation Behind the Splash Screen
+WeAreCars Car Rental System
+
+StartupLoader opens and migrates the database and warms its caches on a
+worker thread while the splash screen is already on screen. Tk is never
+touched from the worker: progress goes through a queue that the splash
+screen drains with after().
+
+Timings are kept in milliseconds from the moment the loader was created
+(or from the started value passed in): each loading step, first paint
+and time to interactive.
+"""
+
+import queue
+import threading
+import time
+
+from modules.database import Database
+
+
+class StartupLoader:
+    """Prepares the Database for the first screens on a background thread."""
+
+    def __init__(self, db_path='data/bookings.db', started=None):
+        """Create a loader; started is a time.perf_counter() value to measure from."""
+        self.db_path = db_path
+        self.started = time.perf_counter() if started is None else started
+        self.database = None
+        self.error = None
+        self.timings = {}
+        self.messages = queue.Queue()
+        self.finished = threading.Event()
+        self._thread = None
+
+    def elapsed_ms(self):
+        """Return milliseconds since the loader's start time."""
+        return (time.perf_counter() - self.started) * 1000
+
+    def mark(self, name):
+        """Record the time of a startup milestone such as 'first_paint' or 'interactive'."""
+        self.timings.setdefault(f'{name}_ms', self.elapsed_ms())
+
+    def start(self):
+        """Start loading on a daemon thread; later calls do nothing."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='startup', daemon=True)
+            self._thread.start()
+
+    def steps(self):
+        """Return the (message, progress when done, function) loading steps in order.
+
+        Warming on this thread fills the rate table, category and
+        availability caches the booking screens share, and pulls the
+        pages behind the dashboard and first bookings page into the OS
+        file cache.
+        """
+        return [
+            ("Opening database...", 0.4, self._open),
+            ("Loading rates...", 0.5, lambda: self.database.get_pricing()),
+            ("Checking fleet availability...", 0.8, lambda: self.database.sync_availability()),
+            ("Loading statistics...", 0.9, lambda: self.database.get_booking_stats()),
+            ("Loading recent bookings...", 1.0, lambda: self.database.get_bookings_page()),
+        ]
+
+    def _open(self):
+        self.database = Database(self.db_path, progress=lambda message: self._report(message, None))
+
+    def _report(self, message, fraction):
+        self.messages.put((message, fraction))
+
+    def _run(self):
+        try:
+            for message, fraction, step in self.steps():
+                self._report(message, None)
+                started = time.perf_counter()
+                step()
+                name = message.rstrip('.').lower().replace(' ', '_')
+                self.timings[f'{name}_ms'] = (time.perf_counter() - started) * 1000
+                self._report(None, fraction)
+            self.mark('ready')
+            self._report("Ready", 1.0)
+        except Exception as e:
+            self.error = e
+            self._report(f"Could not open the database: {e}", None)
+        finally:
+            self.finished.set()
+
+    def poll(self):
+        """Return the (message or None, fraction or None) updates queued since the last poll."""
+        updates = []
+        while True:
+            try:
+                updates.append(self.messages.get_nowait())
+            except queue.Empty:
+                return updates
+
+    def wait(self, timeout=None):
+        """Block until loading finishes; returns the Database or raises the load error."""
+        self.finished.wait(timeout)
+        if self.error is not None:
+            raise self.error
+        return self.database
+
+    @property
+    def ready(self):
+        """True once loading finished successfully."""
+        return self.finished.is_set() and self.error is None
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Time the WeAreCars startup loading steps without the GUI")
+    parser.add_argument('--db', default='data/bookings.db', help="path to bookings.db")
+    args = parser.parse_args()
+
+    loader = StartupLoader(args.db)
+    loader.start()
+    database = loader.wait()
+    try:
+        for name, ms in loader.timings.items():
+            print(f"{name:<40} {ms:>9.1f}")
+    finally:
+        database.close()
@@ -0,0 +1,99 @@
+"""
+Storage Module - Compact Column Encoding for Bookings
+WeAreCars Car Rental System
+
+Bookings are stored as integers: dates as days since 1970-01-01, timestamps
+as seconds since 1970-01-01, money as pence and categories as small codes.
+These helpers convert between that layout and the strings and floats the
+rest of the application works with.
+"""
+
+import calendar
+from datetime import date, datetime, timezone
+from functools import lru_cache
+
+# Canonical category codes; the lookup tables are seeded from these
+CAR_TYPE_CODES = {'City Car': 1, 'Family Car': 2, 'Sports Car': 3, 'SUV': 4}
+FUEL_TYPE_CODES = {'Petrol': 1, 'Diesel': 2, 'Hybrid': 3, 'Electric': 4}
+STATUS_CODES = {'Active': 1, 'Returned': 2, 'Cancelled': 3}
+
+# Code of the 'Active' status, used in partial indexes and triggers
+ACTIVE = STATUS_CODES['Active']
+
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+@lru_cache(maxsize=8192)
+def day_to_text(day):
+    """Convert days since the epoch into 'YYYY-MM-DD'."""
+    return date.fromordinal(day + EPOCH_ORDINAL).isoformat()
+
+
+def text_to_day(text):
+    """Convert 'YYYY-MM-DD' (or a longer timestamp) into days since the epoch."""
+    return date.fromisoformat(text[:10]).toordinal() - EPOCH_ORDINAL
+
+
+def seconds_to_text(seconds):
+    """Convert seconds since the epoch into 'YYYY-MM-DD HH:MM:SS'."""
+    return datetime.fromtimestamp(seconds, timezone.utc).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def text_to_seconds(text):
+    """Convert 'YYYY-MM-DD HH:MM:SS' (or 'YYYY-MM-DD') into seconds since the epoch."""
+    return calendar.timegm(datetime.fromisoformat(text).timetuple())
+
+
+def to_pence(amount):
+    """Convert an amount in pounds into whole pence."""
+    return int(round(amount * 100))
+
+
+def from_pence(pence):
+    """Convert whole pence into an amount in pounds."""
+    return pence / 100
+
+
+@lru_cache(maxsize=8192)
+def pence_to_text(pence):
+    """Convert whole pence into pounds with two decimals, e.g. '243.00'."""
+    return f'{pence / 100:.2f}'
+
+
+class CategoryCodes:
+    """Two-way mapping between category names and their stored codes."""
+
+    def __init__(self, codes):
+        self.codes = dict(codes)
+        self.names = {code: name for name, code in self.codes.items()}
+
+    def encode(self, name):
+        """Return the code for a category name."""
+        try:
+            return self.codes[name]
+        except KeyError:
+            raise ValueError(f"Unknown category: {name}") from None
+
+    def decode(self, code):
+        """Return the category name for a code."""
+        return self.names.get(code, '')
+
+
+def decode_booking_row(row, car_types, fuel_types, statuses):
+    """Decode a stored booking list row into its display form.
+
+    row: (id, customer_name, car_type_code, fuel_type_code, days, total_pence,
+          booked_at, start_day, end_day, status_code)
+    """
+    return (
+        row[0],
+        row[1],
+        car_types.names.get(row[2], ''),
+        fuel_types.names.get(row[3], ''),
+        row[4],
+        row[5] / 100,
+        seconds_to_text(row[6]),
+        day_to_text(row[7]),
+        day_to_text(row[8]),
+        statuses.names.get(row[9], ''),
+    )
@@ -0,0 +1,410 @@
+"""
+Tracing Module - Opt-In SQL Timing and Slow-Query Log
+WeAreCars Car Rental System
+
+When a Database is given an SQLTracer, its connections are opened as
+TracedConnection: every statement is timed from execute until its last
+row is fetched, and counted with its rows in a latency histogram keyed
+by the SQL text. The sqlite3 trace callback counts every statement
+SQLite starts, including trigger programs, against the public Database
+method that caused it, and each of those methods is timed as a whole.
+
+Statements slower than the threshold are written to the slow-query log
+with their EXPLAIN QUERY PLAN. report() and format_report() summarise
+everything recorded so far.
+"""
+
+import sqlite3
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from functools import wraps
+from inspect import isgeneratorfunction
+
+# Upper bounds of the latency histogram buckets (ms); slower calls fall in a final overflow bucket
+LATENCY_BUCKETS_MS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# Statements at least this slow go to the slow-query log (ms)
+SLOW_QUERY_MS = 50.0
+
+# Slow statements kept in memory for the report
+SLOW_QUERY_HISTORY = 100
+
+# Statements EXPLAIN QUERY PLAN can describe
+EXPLAINABLE = ('SELECT', 'WITH', 'INSERT', 'UPDATE', 'DELETE', 'REPLACE')
+
+
+def normalise_sql(sql):
+    """Collapse whitespace so one statement always has the same key."""
+    return ' '.join(sql.split())
+
+
+class LatencyHistogram:
+    """Call count, total, extremes and bucketed latencies in milliseconds."""
+
+    def __init__(self):
+        self.counts = [0] * (len(LATENCY_BUCKETS_MS) + 1)
+        self.calls = 0
+        self.total_ms = 0.0
+        self.min_ms = None
+        self.max_ms = 0.0
+
+    def add(self, ms):
+        low, high = 0, len(LATENCY_BUCKETS_MS)
+        while low < high:
+            mid = (low + high) // 2
+            if ms <= LATENCY_BUCKETS_MS[mid]:
+                high = mid
+            else:
+                low = mid + 1
+        self.counts[low] += 1
+        self.calls += 1
+        self.total_ms += ms
+        if self.min_ms is None or ms < self.min_ms:
+            self.min_ms = ms
+        if ms > self.max_ms:
+            self.max_ms = ms
+
+    def percentile(self, fraction):
+        """Return the upper bound of the bucket holding the given fraction of calls."""
+        if not self.calls:
+            return None
+        target = fraction * self.calls
+        seen = 0
+        for i, count in enumerate(self.counts):
+            seen += count
+            if count and seen >= target:
+                return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else self.max_ms
+        return self.max_ms
+
+    def summary(self):
+        return {
+            'calls': self.calls,
+            'total_ms': self.total_ms,
+            'mean_ms': self.total_ms / self.calls if self.calls else None,
+            'min_ms': self.min_ms,
+            'max_ms': self.max_ms,
+            'p50_ms': self.percentile(0.5),
+            'p95_ms': self.percentile(0.95),
+            'p99_ms': self.percentile(0.99),
+            'buckets': {
+                (f"<={bound}" if i < len(LATENCY_BUCKETS_MS) else f">{LATENCY_BUCKETS_MS[-1]}"): count
+                for i, (bound, count) in enumerate(zip(LATENCY_BUCKETS_MS + (None,), self.counts))
+                if count
+            },
+        }
+
+
+class SQLTracer:
+    """Collects statement and method timings from traced connections.
+
+    Safe to share between threads; every Database method and statement is
+    attributed to the thread that ran it.
+    """
+
+    def __init__(self, slow_ms=SLOW_QUERY_MS, slow_log_path=None):
+        self.slow_ms = slow_ms
+        self.slow_log_path = slow_log_path
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._plans = {}
+        self.reset()
+
+    def reset(self):
+        """Forget everything recorded so far."""
+        with self._lock:
+            self.started = time.time()
+            self.statements = {}
+            self.methods = {}
+            self.slow_queries = deque(maxlen=SLOW_QUERY_HISTORY)
+
+    def _state(self):
+        local = self._local
+        if not hasattr(local, 'methods'):
+            local.methods = []
+            local.started = 0
+        return local
+
+    def trace_callback(self, sql):
+        """sqlite3 trace callback: count a statement SQLite is starting."""
+        self._state().started += 1
+
+    def record_statement(self, connection, sql, parameters, elapsed, rows, error=None):
+        """Record one finished statement; logs it with its plan when slow."""
+        ms = elapsed * 1000
+        key = normalise_sql(sql)
+        stack = self._state().methods
+        method = stack[-1] if stack else None
+        with self._lock:
+            stats = self.statements.get(key)
+            if stats is None:
+                stats = self.statements[key] = {'histogram': LatencyHistogram(), 'rows': 0,
+                                                'errors': 0, 'methods': set()}
+            stats['histogram'].add(ms)
+            stats['rows'] += rows
+            if error is not None:
+                stats['errors'] += 1
+            if method:
+                stats['methods'].add(method)
+
+        if ms >= self.slow_ms:
+            self._log_slow(connection, key, sql, parameters, ms, rows, method)
+
+    def explain(self, connection, sql, parameters):
+        """Return the EXPLAIN QUERY PLAN lines for a statement, or a reason there are none."""
+        if parameters is None:
+            return ['(not explained: executemany)']
+        if not sql.lstrip().upper().startswith(EXPLAINABLE):
+            return []
+        try:
+            # The base class execute is not traced
+            rows = sqlite3.Connection.execute(connection, f'EXPLAIN QUERY PLAN {sql}', parameters).fetchall()
+        except sqlite3.Error as e:
+            return [f'(not explained: {e})']
+
+        depth = {0: 0}
+        lines = []
+        for node, parent, _, detail in rows:
+            depth[node] = depth.get(parent, 0) + 1
+            lines.append('  ' * (depth[node] - 1) + detail)
+        return lines
+
+    def _log_slow(self, connection, key, sql, parameters, ms, rows, method):
+        plan = self._plans.get(key)
+        if plan is None:
+            plan = self._plans[key] = self.explain(connection, sql, parameters)
+        entry = {
+            'time': datetime.now().isoformat(timespec='milliseconds'),
+            'ms': ms,
+            'rows': rows,
+            'method': method,
+            'thread': threading.current_thread().name,
+            'sql': key,
+            'plan': plan,
+        }
+        with self._lock:
+            self.slow_queries.append(entry)
+            if self.slow_log_path:
+                with open(self.slow_log_path, 'a', encoding='utf-8') as log:
+                    log.write(f"{entry['time']} {ms:.1f} ms {rows} rows "
+                              f"[{method or '-'} on {entry['thread']}]\n  {key}\n")
+                    for line in plan:
+                        log.write(f"    {line}\n")
+
+    def wrap(self, name, method):
+        """Return method timed as a whole under name; generators are timed across iteration."""
+        if isgeneratorfunction(method):
+            @wraps(method)
+            def traced_generator(*args, **kwargs):
+                iterator = method(*args, **kwargs)
+                elapsed = 0.0
+                statements = 0
+                try:
+                    while True:
+                        state = self._enter(name)
+                        started = time.perf_counter()
+                        try:
+                            item = next(iterator)
+                        except StopIteration:
+                            return
+                        finally:
+                            elapsed += time.perf_counter() - started
+                            statements += self._exit(state)
+                        yield item
+                finally:
+                    self._record_method(name, elapsed, statements)
+            return traced_generator
+
+        @wraps(method)
+        def traced(*args, **kwargs):
+            state = self._enter(name)
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                elapsed = time.perf_counter() - started
+                self._record_method(name, elapsed, self._exit(state))
+        return traced
+
+    def _enter(self, name):
+        state = self._state()
+        state.methods.append(name)
+        return state.started
+
+    def _exit(self, started_before):
+        state = self._state()
+        state.methods.pop()
+        return state.started - started_before
+
+    def _record_method(self, name, elapsed, statements):
+        with self._lock:
+            stats = self.methods.get(name)
+            if stats is None:
+                stats = self.methods[name] = {'histogram': LatencyHistogram(), 'statements': 0}
+            stats['histogram'].add(elapsed * 1000)
+            stats['statements'] += statements
+
+    def report(self):
+        """Return everything recorded since the last reset as plain data.
+
+        methods and statements are ordered by total time, slowest first.
+        """
+        with self._lock:
+            methods = [
+                dict(stats['histogram'].summary(), method=name, statements=stats['statements'])
+                for name, stats in self.methods.items()
+            ]
+            statements = [
+                dict(stats['histogram'].summary(), sql=sql, rows=stats['rows'],
+                     errors=stats['errors'], methods=sorted(stats['methods']))
+                for sql, stats in self.statements.items()
+            ]
+            slow = list(self.slow_queries)
+            started = self.started
+
+        methods.sort(key=lambda m: m['total_ms'], reverse=True)
+        statements.sort(key=lambda s: s['total_ms'], reverse=True)
+        return {
+            'since': datetime.fromtimestamp(started).isoformat(timespec='seconds'),
+            'slow_ms': self.slow_ms,
+            'methods': methods,
+            'statements': statements,
+            'slow_queries': slow,
+        }
+
+    def format_report(self, limit=20):
+        """Return the report as text, showing the limit most expensive methods and statements."""
+        report = self.report()
+        lines = [f"SQL trace since {report['since']} (slow threshold {report['slow_ms']:g} ms)", '',
+                 f"{'method':<32} {'calls':>8} {'total ms':>11} {'mean ms':>9} {'p95 ms':>9} "
+                 f"{'max ms':>9} {'stmts':>8}"]
+        for m in report['methods'][:limit]:
+            lines.append(f"{m['method']:<32} {m['calls']:>8} {m['total_ms']:>11.1f} {m['mean_ms']:>9.3f} "
+                         f"{m['p95_ms']:>9g} {m['max_ms']:>9.3f} {m['statements']:>8}")
+
+        lines += ['', f"{'calls':>8} {'rows':>10} {'total ms':>11} {'mean ms':>9} {'p95 ms':>9} "
+                      f"{'max ms':>9}  statement"]
+        for s in report['statements'][:limit]:
+            sql = s['sql'] if len(s['sql']) <= 100 else s['sql'][:97] + '...'
+            lines.append(f"{s['calls']:>8} {s['rows']:>10} {s['total_ms']:>11.1f} {s['mean_ms']:>9.3f} "
+                         f"{s['p95_ms']:>9g} {s['max_ms']:>9.3f}  {sql}")
+
+        if report['slow_queries']:
+            lines += ['', f"Slowest recent statements over {report['slow_ms']:g} ms:"]
+            for entry in sorted(report['slow_queries'], key=lambda e: e['ms'], reverse=True)[:limit]:
+                lines.append(f"{entry['ms']:>9.1f} ms {entry['rows']:>8} rows  "
+                             f"[{entry['method'] or '-'}]  {entry['sql'][:100]}")
+                lines.extend(f"{'':>14}{line}" for line in entry['plan'])
+        return '\n'.join(lines)
+
+
+class TracedCursor(sqlite3.Cursor):
+    """A cursor that reports each statement's time and rows to its connection's tracer.
+
+    A statement's time runs from execute until its rows are exhausted, the
+    next execute or close, so fetching is included.
+    """
+
+    def __init__(self, connection):
+        super().__init__(connection)
+        self._pending = None
+
+    def _started(self, sql, parameters, elapsed, error=None):
+        if error is None and self.description is not None:
+            # Rows still to fetch; finished by _finish
+            self._pending = [sql, parameters, elapsed, 0]
+            return
+        rows = self.rowcount if self.rowcount > 0 else 0
+        self.connection.tracer.record_statement(self.connection, sql, parameters, elapsed, rows, error)
+
+    def _fetched(self, elapsed, rows, exhausted):
+        pending = self._pending
+        if pending is None:
+            return
+        pending[2] += elapsed
+        pending[3] += rows
+        if exhausted:
+            self._finish()
+
+    def _finish(self):
+        pending = self._pending
+        if pending is not None:
+            self._pending = None
+            sql, parameters, elapsed, rows = pending
+            self.connection.tracer.record_statement(self.connection, sql, parameters, elapsed, rows)
+
+    def execute(self, sql, parameters=()):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            super().execute(sql, parameters)
+        except sqlite3.Error as e:
+            self._started(sql, parameters, time.perf_counter() - started, e)
+            raise
+        self._started(sql, parameters, time.perf_counter() - started)
+        return self
+
+    def executemany(self, sql, seq_of_parameters):
+        self._finish()
+        started = time.perf_counter()
+        try:
+            super().executemany(sql, seq_of_parameters)
+        except sqlite3.Error as e:
+            self._started(sql, None, time.perf_counter() - started, e)
+            raise
+        self._started(sql, None, time.perf_counter() - started)
+        return self
+
+    def fetchone(self):
+        started = time.perf_counter()
+        row = super().fetchone()
+        self._fetched(time.perf_counter() - started, row is not None, row is None)
+        return row
+
+    def fetchmany(self, size=None):
+        size = self.arraysize if size is None else size
+        started = time.perf_counter()
+        rows = super().fetchmany(size)
+        self._fetched(time.perf_counter() - started, len(rows), len(rows) < size)
+        return rows
+
+    def fetchall(self):
+        started = time.perf_counter()
+        rows = super().fetchall()
+        self._fetched(time.perf_counter() - started, len(rows), True)
+        return rows
+
+    def __next__(self):
+        started = time.perf_counter()
+        try:
+            row = super().__next__()
+        except StopIteration:
+            self._fetched(time.perf_counter() - started, 0, True)
+            raise
+        self._fetched(time.perf_counter() - started, 1, False)
+        return row
+
+    def close(self):
+        self._finish()
+        super().close()
+
+    def __del__(self):
+        # Statements whose cursor was dropped without close
+        if getattr(self, '_pending', None) is not None:
+            self._finish()
+
+
+class TracedConnection(sqlite3.Connection):
+    """A connection whose cursors are traced; pass as sqlite3.connect(factory=...)."""
+
+    tracer = None
+
+    def cursor(self, factory=TracedCursor):
+        return super().cursor(factory)
+
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
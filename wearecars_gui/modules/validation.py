@@ -0,0 +1,68 @@
+"""
+Validation Module - Customer and Booking Rules
+WeAreCars Car Rental System
+"""
+
+from datetime import date
+
+# Allowed customer ages (years)
+MIN_AGE = 18
+MAX_AGE = 100
+
+# Allowed rental period (days)
+MIN_DAYS = 1
+MAX_DAYS = 28
+
+CAR_TYPES = ('City Car', 'Family Car', 'Sports Car', 'SUV')
+FUEL_TYPES = ('Petrol', 'Diesel', 'Hybrid', 'Electric')
+
+
+def validate_customer_details(first_name, surname, address, age, license_valid):
+    """Check customer details against the booking rules.
+
+    Returns a list of (field, message) pairs, in form order; empty when valid.
+    """
+    errors = []
+
+    if not (first_name or '').strip():
+        errors.append(('first_name', "Please enter first name."))
+
+    if not (surname or '').strip():
+        errors.append(('surname', "Please enter surname."))
+
+    if not (address or '').strip():
+        errors.append(('address', "Please enter address."))
+
+    if age is None or not MIN_AGE <= age <= MAX_AGE:
+        errors.append(('age', f"Age must be between {MIN_AGE} and {MAX_AGE} years."))
+
+    if not license_valid:
+        errors.append(('license_valid', "Customer must have a valid driving license."))
+
+    return errors
+
+
+def validate_rental_details(car_type, fuel_type, days, start_date):
+    """Check rental details against the booking rules.
+
+    Returns a list of (field, message) pairs; empty when valid.
+    """
+    errors = []
+
+    if car_type not in CAR_TYPES:
+        errors.append(('car_type', f"Unknown car type: {car_type}"))
+
+    if fuel_type not in FUEL_TYPES:
+        errors.append(('fuel_type', f"Unknown fuel type: {fuel_type}"))
+
+    if days is None or not MIN_DAYS <= days <= MAX_DAYS:
+        errors.append(('days', f"Rental period must be between {MIN_DAYS} and {MAX_DAYS} days."))
+
+    try:
+        if len(start_date) != 10:
+            raise ValueError(start_date)
+        date.fromisoformat(start_date)
+    except (TypeError, ValueError):
+        errors.append(('start_date', "Start date must be in YYYY-MM-DD format."))
+
+    return errors
@@ -5,14 +5,166 @@ WeAreCars Car Rental System
 
 import tkinter as tk
 from tkinter import ttk, messagebox
-import csv
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from modules.database import (BOOKING_PAGE_SIZE, DEFAULT_EXPORT_COLUMNS, EXPORT_COLUMNS, QueryCancelledError,
+                               booking_filter_clause)
+from modules.export import export_bookings_csv
+from modules.storage import day_to_text, text_to_day
 from modules.styling import COLORS, FONTS, PADDING
+from modules.virtual_table import ListRowSource, VirtualTable
+
+# Delay after the last keystroke before searching (ms)
+SEARCH_DEBOUNCE_MS = 250
+
+# How often a running search is checked for results (ms)
+SEARCH_POLL_MS = 20
+
+# How often a running export's progress is shown (ms)
+EXPORT_POLL_MS = 100
+
+# How often auto-refresh checks the database for changes (ms)
+AUTO_REFRESH_MS = 2000
+
+# Sort key behind each column heading (see Database.get_bookings_sorted)
+COLUMN_SORTS = {
+    'ID': 'id',
+    'Customer': 'customer',
+    'Car Type': 'car_type',
+    'Fuel': 'fuel_type',
+    'Days': 'days',
+    'Total': 'total',
+    'Booking Date': 'booking_date',
+    'Start Date': 'start_date',
+    'End Date': 'end_date',
+    'Status': 'status',
+}
+
+class BookingRowSource:
+    """Row source reading only the visible slice of bookings from the database.
+    
+    Sorted or filtered slices are read relative to the previous slice's
+    first row, so scrolling seeks from where the view already is instead
+    of counting rows from the top.
+    """
+    
+    def __init__(self, database, sort='id', descending=True, filters=None):
+        self.database = database
+        self.sort = sort
+        self.descending = descending
+        self.filters = filters or {}
+        self.total = None
+        # (offset, booking id) of the last slice's first row
+        self.anchor = None
+    
+    @property
+    def newest_first(self):
+        """True when every booking is listed by ID, newest first."""
+        return self.sort == 'id' and self.descending and not self.filters
+    
+    def count(self):
+        self.anchor = None
+        self.total = self.database.count_bookings(self.filters)
+        return self.total
+    
+    def fetch(self, offset, limit):
+        if self.newest_first:
+            return self.database.get_bookings_slice(offset, limit)
+        
+        query = dict(sort=self.sort, descending=self.descending, filters=self.filters, matches=self.total)
+        if self.anchor and abs(offset - self.anchor[0]) < offset:
+            rows = self.database.get_bookings_sorted(offset - self.anchor[0], limit,
+                                                     anchor_id=self.anchor[1], **query)
+        else:
+            rows = self.database.get_bookings_sorted(offset, limit, **query)
+        self.anchor = (offset, rows[0][0]) if rows else None
+        return rows
+
+def booking_matches_filters(booking, filters):
+    """Return True if a booking row passes the filter bar's car, fuel and start date filters."""
+    return (booking[2] == filters.get('car_type', booking[2])
+            and booking[3] == filters.get('fuel_type', booking[3])
+            and filters.get('start_from', booking[7]) <= booking[7] <= filters.get('start_to', booking[7]))
+
+class SearchRowSource:
+    """Row source paging through search matches, newest first, as the view scrolls.
+    
+    Pages are read with search_bookings_page below the oldest match read so
+    far, so a broad search shows its first page at once and never reads
+    matches nobody scrolls to. Until the last page is read the count is
+    the rows read so far plus one more page.
+    """
+    
+    def __init__(self, database, search_term, filters=None):
+        self.database = database
+        self.search_term = search_term
+        self.filters = filters or {}
+        # Every match read so far, newest first, and those passing the filters
+        self.matches = []
+        self.rows = []
+        self.complete = False
+        # Called after each page is read, e.g. to update a match count
+        self.on_page = None
+    
+    def read_page(self, cancel=None):
+        """Read the next page of matches."""
+        before_id = self.matches[-1][0] if self.matches else None
+        page = self.database.search_bookings_page(self.search_term, before_id, cancel=cancel)
+        self.complete = len(page) < BOOKING_PAGE_SIZE
+        self.matches.extend(page)
+        self.rows.extend(row for row in page if booking_matches_filters(row, self.filters))
+        if self.on_page is not None:
+            self.on_page()
+    
+    def fill(self, rows, cancel=None):
+        """Read pages until rows filtered matches are in hand or none are left."""
+        while not self.complete and len(self.rows) < rows:
+            self.read_page(cancel)
+    
+    def patch(self, added, updated, deleted, offset):
+        """Apply changed bookings; returns how far the rows from offset on moved down.
+        
+        added are new matches, newest first; updated maps booking ID to its
+        new row and deleted is a set of booking IDs.
+        """
+        known = {row[0] for row in self.matches}
+        added = [row for row in added if row[0] not in known]
+        shift = (sum(1 for row in added if booking_matches_filters(row, self.filters))
+                 - sum(1 for row in self.rows[:offset] if row[0] in deleted))
+        self.matches[:] = added + [updated.get(row[0], row) for row in self.matches if row[0] not in deleted]
+        self.rows = [row for row in self.matches if booking_matches_filters(row, self.filters)]
+        return shift
+    
+    def count(self):
+        return len(self.rows) if self.complete else len(self.rows) + BOOKING_PAGE_SIZE
+    
+    def fetch(self, offset, limit):
+        self.fill(offset + limit)
+        return self.rows[offset:offset + limit]
 
 class ViewBookings:
     def __init__(self, parent, database):
         """Initialize the view bookings window."""
         self.parent = parent
         self.database = database
+        # Searches run one at a time off the Tk thread; only the newest is shown
+        self.search_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='search')
+        self._search_job = None
+        self._search_cancel = None
+        self._search_generation = 0
+        # What the table shows: all bookings (None) or a search, as of watermark
+        self.shown_search = None
+        self.search_results = []
+        self.sort = 'id'
+        self.descending = True
+        self.filters = {}
+        self.watermark = None
+        self._refresh_job = None
+        # Exports stream on their own thread; progress is (rows written, total)
+        self.export_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='export')
+        self.export_columns = DEFAULT_EXPORT_COLUMNS
+        self._export_cancel = None
+        self._export_progress = (0, 0)
         self.window = tk.Toplevel(parent)
         self.window.title("WeAreCars - View Bookings")
         self.window.geometry("1000x600")
@@ -33,10 +185,11 @@ class ViewBookings:
         self.window.update_idletasks()
         
         # Handle window close
-        self.window.protocol("WM_DELETE_WINDOW", self.window.destroy)
+        self.window.protocol("WM_DELETE_WINDOW", self.close)
         
         self.setup_ui()
         self.load_bookings()
+        self.schedule_refresh()
     
     def setup_ui(self):
         """Create the view bookings UI."""
@@ -71,7 +224,7 @@ class ViewBookings:
         ).pack(side='left', padx=(0, 10))
         
         self.search_var = tk.StringVar()
-        self.search_var.trace('w', lambda *args: self.search_bookings())
+        self.search_var.trace('w', lambda *args: self.schedule_search())
         
         search_entry = tk.Entry(
             search_frame,
@@ -87,10 +240,22 @@ class ViewBookings:
         buttons_frame = tk.Frame(toolbar, bg=COLORS['background'])
         buttons_frame.pack(side='right')
         
+        self.auto_refresh_var = tk.BooleanVar(value=True)
+        tk.Checkbutton(
+            buttons_frame,
+            text="Auto-refresh",
+            variable=self.auto_refresh_var,
+            font=FONTS['normal'],
+            bg=COLORS['background'],
+            fg=COLORS['text'],
+            selectcolor=COLORS['background'],
+            activebackground=COLORS['background']
+        ).pack(side='left', padx=5)
+        
         refresh_btn = tk.Button(
             buttons_frame,
             text="🔄 Refresh",
-            command=self.load_bookings,
+            command=self.refresh_bookings,
             bg=COLORS['button'],
             fg=COLORS['text_light'],
             font=FONTS['button'],
@@ -103,7 +268,7 @@ class ViewBookings:
         refresh_btn.bind('<Enter>', lambda e: refresh_btn.config(bg=COLORS['button_hover']))
         refresh_btn.bind('<Leave>', lambda e: refresh_btn.config(bg=COLORS['button']))
         
-        export_btn = tk.Button(
+        self.export_btn = tk.Button(
             buttons_frame,
             text="📥 Export CSV",
             command=self.export_to_csv,
@@ -115,14 +280,16 @@ class ViewBookings:
             padx=15,
             pady=5
         )
-        export_btn.pack(side='left', padx=5)
-        export_btn.bind('<Enter>', lambda e: export_btn.config(bg='#229954'))
-        export_btn.bind('<Leave>', lambda e: export_btn.config(bg=COLORS['success']))
+        self.export_btn.pack(side='left', padx=5)
+        self.export_btn.bind('<Enter>', lambda e: self.export_btn.config(
+            bg=COLORS['danger_hover'] if self._export_cancel else '#229954'))
+        self.export_btn.bind('<Leave>', lambda e: self.export_btn.config(
+            bg=COLORS['danger'] if self._export_cancel else COLORS['success']))
         
         close_btn = tk.Button(
             buttons_frame,
             text="✕ Close",
-            command=self.window.destroy,
+            command=self.close,
             bg=COLORS['error'],
             fg=COLORS['text_light'],
             font=FONTS['button'],
@@ -135,6 +302,51 @@ class ViewBookings:
         close_btn.bind('<Enter>', lambda e: close_btn.config(bg='#c0392b'))
         close_btn.bind('<Leave>', lambda e: close_btn.config(bg=COLORS['error']))
         
+        # Filter Bar
+        filter_bar = tk.Frame(self.window, bg=COLORS['background'])
+        filter_bar.pack(fill='x', padx=PADDING['large'], pady=(0, PADDING['medium']))
+        
+        self.car_filter_var = tk.StringVar(value='All')
+        self.fuel_filter_var = tk.StringVar(value='All')
+        self.start_from_var = tk.StringVar()
+        self.start_to_var = tk.StringVar()
+        
+        for text, variable, names in (("Car:", self.car_filter_var, self.database.car_types.codes),
+                                      ("Fuel:", self.fuel_filter_var, self.database.fuel_types.codes)):
+            tk.Label(filter_bar, text=text, font=FONTS['label'], bg=COLORS['background'],
+                     fg=COLORS['text']).pack(side='left', padx=(0, 5))
+            choice = ttk.Combobox(filter_bar, textvariable=variable, values=['All'] + list(names),
+                                  state='readonly', width=12)
+            choice.pack(side='left', padx=(0, 15))
+            choice.bind('<<ComboboxSelected>>', lambda e: self.apply_filters())
+        
+        for text, variable in (("Start from:", self.start_from_var), ("to:", self.start_to_var)):
+            tk.Label(filter_bar, text=text, font=FONTS['label'], bg=COLORS['background'],
+                     fg=COLORS['text']).pack(side='left', padx=(0, 5))
+            date_entry = tk.Entry(filter_bar, textvariable=variable, font=FONTS['entry'],
+                                  relief='solid', bd=1, width=11)
+            date_entry.pack(side='left', padx=(0, 15), ipady=3)
+            date_entry.bind('<Return>', lambda e: self.apply_filters())
+        
+        tk.Label(filter_bar, text="(YYYY-MM-DD, Enter to apply)", font=FONTS['small'],
+                 bg=COLORS['background'], fg=COLORS['disabled']).pack(side='left')
+        
+        clear_btn = tk.Button(
+            filter_bar,
+            text="✕ Clear Filters",
+            command=self.clear_filters,
+            bg=COLORS['button'],
+            fg=COLORS['text_light'],
+            font=FONTS['button'],
+            relief='flat',
+            cursor='hand2',
+            padx=10,
+            pady=2
+        )
+        clear_btn.pack(side='right')
+        clear_btn.bind('<Enter>', lambda e: clear_btn.config(bg=COLORS['button_hover']))
+        clear_btn.bind('<Leave>', lambda e: clear_btn.config(bg=COLORS['button']))
+        
         # Table Frame
         table_frame = tk.Frame(self.window, bg=COLORS['card'])
         table_frame.pack(fill='both', expand=True, padx=PADDING['large'], pady=(0, PADDING['medium']))
@@ -167,12 +379,10 @@ class ViewBookings:
             table_frame,
             columns=columns,
             show='headings',
-            yscrollcommand=tree_scroll_y.set,
             xscrollcommand=tree_scroll_x.set,
             selectmode='browse'
         )
         
-        tree_scroll_y.config(command=self.tree.yview)
         tree_scroll_x.config(command=self.tree.xview)
         
         # Define Headings
@@ -190,11 +400,14 @@ class ViewBookings:
         }
         
         for col in columns:
-            self.tree.heading(col, text=col, anchor='w')
+            self.tree.heading(col, text=col, anchor='w', command=lambda c=col: self.sort_by(c))
             self.tree.column(col, width=column_widths.get(col, 100), anchor='w')
         
         self.tree.pack(fill='both', expand=True)
         
+        # Only the visible rows exist as tree items; the table drives the vertical scrollbar
+        self.table = VirtualTable(self.tree, tree_scroll_y, self.format_row)
+        
         # Bind double-click event
         self.tree.bind('<Double-1>', self.show_booking_details)
         
@@ -224,80 +437,264 @@ class ViewBookings:
         self.count_label.pack(side='right', padx=PADDING['medium'])
     
     def load_bookings(self):
-        """Load all bookings from database."""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-        
-        # Fetch bookings
-        bookings = self.database.get_all_bookings()
-        
-        # Insert into treeview
-        for booking in bookings:
-            # booking: (id, customer_name, car_type, fuel_type, days, total_cost,
-            #           booking_date, start_date, end_date, status)
-            self.tree.insert('', 'end', values=(
-                booking[0],  # ID
-                booking[1],  # Customer
-                booking[2],  # Car Type
-                booking[3],  # Fuel
-                booking[4],  # Days
-                f"£{booking[5]:.2f}",  # Total
-                booking[6].split()[0] if booking[6] else '',  # Booking Date
-                booking[7],  # Start Date
-                booking[8],  # End Date
-                booking[9]   # Status
-            ))
+        """Show all bookings, reading just the rows in view from the database."""
+        self.watermark = self.database.get_change_watermark()
+        self.shown_search = None
+        self.table.set_source(BookingRowSource(self.database, self.sort, self.descending, self.filters))
         
         # Update status
-        count = len(bookings)
-        self.count_label.config(text=f"Total: {count} booking{'s' if count != 1 else ''}")
+        self.update_count()
         self.status_label.config(text="Bookings loaded successfully")
     
-    def search_bookings(self):
-        """Search bookings based on search term."""
-        search_term = self.search_var.get().strip()
+    def update_count(self):
+        """Show how many bookings the table holds."""
+        label = "Total" if self.shown_search is None and not self.filters else "Found"
+        source = self.table.source
+        if isinstance(source, SearchRowSource):
+            count = len(source.rows)
+            if not source.complete:
+                # Search pages are read as the table scrolls, so the total is not known yet
+                self.count_label.config(text=f"{label}: {count}+ bookings")
+                return
+        else:
+            count = self.table.total
+        self.count_label.config(text=f"{label}: {count} booking{'s' if count != 1 else ''}")
+    
+    def schedule_refresh(self):
+        """Check for changes again after AUTO_REFRESH_MS."""
+        self._refresh_job = self.window.after(AUTO_REFRESH_MS, self.auto_refresh)
+    
+    def auto_refresh(self):
+        """Apply changes made here or by other terminals, if auto-refresh is on."""
+        if self.auto_refresh_var.get():
+            try:
+                self.refresh_bookings()
+            except Exception as e:
+                self.status_label.config(text=f"Refresh failed: {e}")
+        self.schedule_refresh()
+    
+    def refresh_bookings(self):
+        """Patch the table with the bookings added, changed or removed since it was loaded.
+        
+        Unchanged files cost one PRAGMA; otherwise only the changed rows and
+        the visible slice are read. Falls back to a full reload when too
+        much has changed to patch.
+        """
+        # A running search will show fresh results of its own
+        if self.watermark is None or self._search_cancel is not None:
+            return
+        
+        last_booking_id = self.watermark[1]
+        changes = self.database.get_booking_changes(self.watermark)
+        if not changes['complete']:
+            if self.shown_search is None:
+                self.load_bookings()
+            else:
+                self.search_bookings()
+            return
+        
+        self.watermark = changes['watermark']
+        inserted, updated, deleted = changes['inserted'], changes['updated'], set(changes['deleted'])
+        if not (inserted or updated or deleted):
+            return
         
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        # Only newest-first lists know where changes land; keep a scrolled view on the same rows
+        shift = 0
+        if self.shown_search is None:
+            if self.sort == 'id' and self.descending and not self.filters:
+                top_id = self.table.rows[0][0] if self.table.rows else 0
+                shift = len(inserted) - sum(1 for booking_id in deleted if booking_id > top_id)
+        else:
+            added = []
+            if inserted:
+                added = self.database.search_bookings_page(self.shown_search, after_id=last_booking_id)
+            updated = {row[0]: row for row in updated}
+            if isinstance(self.table.source, SearchRowSource):
+                shift = self.table.source.patch(added, updated, deleted, self.table.offset)
+            else:
+                rows = self.search_results
+                known = {row[0] for row in rows}
+                rows[:] = ([row for row in added if row[0] not in known]
+                           + [updated.get(row[0], row) for row in rows if row[0] not in deleted])
+                self.table.source = ListRowSource(self.arrange_rows(rows))
+        
+        self.table.refresh(shift)
+        self.update_count()
+        changed = len(inserted) + len(updated) + len(deleted)
+        self.status_label.config(text=f"Refreshed: {changed} booking{'s' if changed != 1 else ''} changed")
+    
+    def schedule_search(self):
+        """Search once typing pauses, abandoning any search still in progress."""
+        self.cancel_search()
+        self._search_job = self.window.after(SEARCH_DEBOUNCE_MS, self.search_bookings)
+    
+    def cancel_search(self):
+        """Drop the pending search, interrupt the running one and ignore its results."""
+        if self._search_job is not None:
+            self.window.after_cancel(self._search_job)
+            self._search_job = None
+        if self._search_cancel is not None:
+            self._search_cancel.set()
+            self._search_cancel = None
+        self._search_generation += 1
+    
+    def search_bookings(self, search_term=None):
+        """Search bookings for search_term, or the search box's text, on the search thread."""
+        self._search_job = None
+        if search_term is None:
+            search_term = self.search_var.get().strip()
         
         if not search_term:
             self.load_bookings()
             return
         
-        # Fetch matching bookings
-        bookings = self.database.search_bookings(search_term)
-        
-        # Insert into treeview
-        for booking in bookings:
-            self.tree.insert('', 'end', values=(
-                booking[0],
-                booking[1],
-                booking[2],
-                booking[3],
-                booking[4],
-                f"£{booking[5]:.2f}",
-                booking[6].split()[0] if booking[6] else '',
-                booking[7],
-                booking[8],
-                booking[9]
-            ))
+        cancel = threading.Event()
+        self._search_cancel = cancel
+        generation = self._search_generation
+        # Taken before the search runs, so changes it races with are refreshed again
+        watermark = self.database.get_change_watermark()
+        self.status_label.config(text=f"Searching for '{search_term}'...")
+        if self.sort == 'id' and self.descending:
+            source = SearchRowSource(self.database, search_term, dict(self.filters))
+            future = self.search_executor.submit(source.fill, self.table.page_size(), cancel)
+        else:
+            source = None
+            future = self.search_executor.submit(self.run_search, search_term, cancel)
+        self.window.after(SEARCH_POLL_MS, self.check_search, future, search_term, generation, watermark,
+                          source)
+    
+    def run_search(self, search_term, cancel):
+        """Collect every match for search_term to sort; runs on the search thread."""
+        bookings = []
+        for chunk in self.database.iter_search_bookings(search_term, cancel=cancel):
+            bookings.extend(chunk)
+        return bookings
+    
+    def check_search(self, future, search_term, generation, watermark, source=None):
+        """Poll a running search and show its results if it is still the newest.
+        
+        Newest first, source holds the first screenful of matches and reads
+        the rest as the table scrolls; other orders sort every match.
+        """
+        if generation != self._search_generation:
+            return
+        if not future.done():
+            self.window.after(SEARCH_POLL_MS, self.check_search, future, search_term, generation, watermark,
+                              source)
+            return
+        
+        self._search_cancel = None
+        try:
+            bookings = future.result()
+        except QueryCancelledError:
+            return
+        except Exception as e:
+            self.status_label.config(text=f"Search failed: {e}")
+            return
+        
+        self.watermark = watermark
+        self.shown_search = search_term
+        if source is not None:
+            self.search_results = []
+            source.on_page = self.update_count
+            self.table.set_source(source)
+        else:
+            self.search_results = bookings
+            self.table.set_source(ListRowSource(self.arrange_rows(bookings)))
         
         # Update status
-        count = len(bookings)
-        self.count_label.config(text=f"Found: {count} booking{'s' if count != 1 else ''}")
+        self.update_count()
         self.status_label.config(text=f"Search results for '{search_term}'")
     
+    def sort_by(self, column):
+        """Sort by a column heading; clicking the sorted column again reverses it."""
+        sort = COLUMN_SORTS[column]
+        self.descending = not self.descending if sort == self.sort else False
+        self.sort = sort
+        for heading, key in COLUMN_SORTS.items():
+            arrow = (' ▼' if self.descending else ' ▲') if key == self.sort else ''
+            self.tree.heading(heading, text=heading + arrow)
+        self.show_bookings()
+    
+    def apply_filters(self):
+        """Filter by the car type, fuel and start date range chosen in the filter bar."""
+        filters = {
+            'car_type': self.car_filter_var.get(),
+            'fuel_type': self.fuel_filter_var.get(),
+            'start_from': self.start_from_var.get().strip(),
+            'start_to': self.start_to_var.get().strip(),
+        }
+        filters = {key: value for key, value in filters.items() if value and value != 'All'}
+        try:
+            booking_filter_clause(filters, self.database.car_types, self.database.fuel_types)
+        except ValueError as e:
+            self.status_label.config(text=f"Invalid filter: {e}")
+            return
+        for key in ('start_from', 'start_to'):
+            if key in filters:
+                filters[key] = day_to_text(text_to_day(filters[key]))
+        
+        self.filters = filters
+        self.show_bookings()
+    
+    def clear_filters(self):
+        """Remove every filter."""
+        self.car_filter_var.set('All')
+        self.fuel_filter_var.set('All')
+        self.start_from_var.set('')
+        self.start_to_var.set('')
+        self.apply_filters()
+    
+    def show_bookings(self):
+        """Show all bookings or the current search results with the current sort and filters."""
+        if self.shown_search is None:
+            self.load_bookings()
+        else:
+            self.cancel_search()
+            self.search_bookings(self.shown_search)
+    
+    def arrange_rows(self, bookings):
+        """Filter and sort search results in memory the way the database sorts bookings."""
+        rows = [booking for booking in bookings if booking_matches_filters(booking, self.filters)]
+        
+        # Categories sort in catalogue (code) order, as in the database
+        index = list(COLUMN_SORTS.values()).index(self.sort)
+        codes = {
+            'car_type': self.database.car_types.codes,
+            'fuel_type': self.database.fuel_types.codes,
+            'status': self.database.statuses.codes,
+        }.get(self.sort)
+        if codes:
+            rows.sort(key=lambda booking: (codes.get(booking[index], 0), booking[0]), reverse=self.descending)
+        else:
+            rows.sort(key=lambda booking: (booking[index], booking[0]), reverse=self.descending)
+        return rows
+    
+    def format_row(self, booking):
+        """Return the treeview values for a booking row."""
+        # booking: (id, customer_name, car_type, fuel_type, days, total_cost,
+        #           booking_date, start_date, end_date, status)
+        return (
+            booking[0],  # ID
+            booking[1],  # Customer
+            booking[2],  # Car Type
+            booking[3],  # Fuel
+            booking[4],  # Days
+            f"£{booking[5]:.2f}",  # Total
+            booking[6].split()[0] if booking[6] else '',  # Booking Date
+            booking[7],  # Start Date
+            booking[8],  # End Date
+            booking[9]   # Status
+        )
+    
     def show_booking_details(self, event):
         """Show detailed view of selected booking."""
-        selection = self.tree.selection()
-        if not selection:
+        booking = self.table.selected_row()
+        if booking is None:
             return
         
         # Get booking data
-        item = self.tree.item(selection[0])
-        values = item['values']
+        values = self.format_row(booking)
         
         # Create details window
         details = tk.Toplevel(self.window)
@@ -381,47 +778,154 @@ class ViewBookings:
         close_btn.bind('<Enter>', lambda e: close_btn.config(bg=COLORS['button_hover']))
         close_btn.bind('<Leave>', lambda e: close_btn.config(bg=COLORS['button']))
     
+    def close(self):
+        """Stop any search, export and auto-refresh, and close the window."""
+        if self._refresh_job is not None:
+            self.window.after_cancel(self._refresh_job)
+            self._refresh_job = None
+        self.cancel_search()
+        self.search_executor.shutdown(wait=False)
+        self.cancel_export()
+        self.export_executor.shutdown(wait=False)
+        self.window.destroy()
+    
     def export_to_csv(self):
-        """Export bookings to CSV file."""
+        """Export bookings to a CSV file on the export thread, or cancel the running export."""
+        if self._export_cancel is not None:
+            self.cancel_export()
+            return
+        
+        columns = self.choose_export_columns()
+        if not columns:
+            return
+        
+        from tkinter import filedialog
+        
+        # Ask for file location
+        filename = filedialog.asksaveasfilename(
+            parent=self.window,
+            defaultextension='.csv',
+            filetypes=[('CSV files', '*.csv'), ('All files', '*.*')],
+            initialfile='wearecars_bookings.csv'
+        )
+        
+        if not filename:
+            return
+        
+        self.export_columns = columns
+        cancel = threading.Event()
+        self._export_cancel = cancel
+        self._export_progress = (0, 0)
+        self.export_btn.config(text="✕ Cancel Export", bg=COLORS['danger'])
+        self.status_label.config(text="Exporting bookings...")
+        future = self.export_executor.submit(
+            export_bookings_csv, self.database, filename, columns,
+            progress=self.record_export_progress, cancel=cancel
+        )
+        self.window.after(EXPORT_POLL_MS, self.check_export, future, filename)
+    
+    def record_export_progress(self, done, total):
+        """Progress callback; runs on the export thread, so only stores the figures."""
+        self._export_progress = (done, total)
+    
+    def cancel_export(self):
+        """Interrupt the running export; its partial file is removed."""
+        if self._export_cancel is not None:
+            self._export_cancel.set()
+    
+    def check_export(self, future, filename):
+        """Show a running export's progress, then its outcome once it finishes."""
+        if not self.window.winfo_exists():
+            return
+        if not future.done():
+            done, total = self._export_progress
+            percent = min(100, done * 100 // total) if total else 0
+            self.status_label.config(text=f"Exporting bookings... {done:,} of {total:,} ({percent}%)")
+            self.window.after(EXPORT_POLL_MS, self.check_export, future, filename)
+            return
+        
+        self._export_cancel = None
+        self.export_btn.config(text="📥 Export CSV", bg=COLORS['success'])
         try:
-            from tkinter import filedialog
-            
-            # Ask for file location
-            filename = filedialog.asksaveasfilename(
-                parent=self.window,
-                defaultextension='.csv',
-                filetypes=[('CSV files', '*.csv'), ('All files', '*.*')],
-                initialfile='wearecars_bookings.csv'
-            )
-            
-            if not filename:
-                return
-            
-            # Get all bookings
-            bookings = self.database.get_all_bookings()
-            
-            # Write to CSV
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                
-                # Write header
-                writer.writerow(['ID', 'Customer Name', 'Car Type', 'Fuel Type', 'Days', 
-                               'Total Cost', 'Booking Date', 'Start Date', 'End Date', 'Status'])
-                
-                # Write data
-                for booking in bookings:
-                    writer.writerow(booking)
-            
-            messagebox.showinfo(
-                "Export Successful",
-                f"Bookings exported successfully to:\n{filename}",
-                parent=self.window
-            )
-            self.status_label.config(text=f"Exported {len(bookings)} bookings to CSV")
-            
+            count = future.result()
+        except QueryCancelledError:
+            self.status_label.config(text="Export cancelled")
+            return
         except Exception as e:
+            self.status_label.config(text="Export failed")
             messagebox.showerror(
                 "Export Failed",
                 f"Failed to export bookings:\n{str(e)}",
                 parent=self.window
             )
+            return
+        
+        self.status_label.config(text=f"Exported {count:,} bookings to CSV")
+        messagebox.showinfo(
+            "Export Successful",
+            f"Bookings exported successfully to:\n{filename}",
+            parent=self.window
+        )
+    
+    def choose_export_columns(self):
+        """Ask which columns to export; returns their keys in order, or None if cancelled."""
+        dialog = tk.Toplevel(self.window)
+        dialog.title("Export Columns")
+        dialog.configure(bg=COLORS['background'])
+        dialog.transient(self.window)
+        dialog.grab_set()
+        
+        tk.Label(
+            dialog,
+            text="Columns to export",
+            font=FONTS['subheader'],
+            bg=COLORS['background'],
+            fg=COLORS['text_light']
+        ).pack(padx=PADDING['large'], pady=(PADDING['large'], PADDING['medium']))
+        
+        checks = tk.Frame(dialog, bg=COLORS['background'])
+        checks.pack(padx=PADDING['large'])
+        
+        chosen = {}
+        for index, (column, (heading, _sql, _decoder)) in enumerate(EXPORT_COLUMNS.items()):
+            chosen[column] = tk.BooleanVar(value=column in self.export_columns)
+            tk.Checkbutton(
+                checks,
+                text=heading,
+                variable=chosen[column],
+                font=FONTS['normal'],
+                bg=COLORS['background'],
+                fg=COLORS['text'],
+                selectcolor=COLORS['background'],
+                activebackground=COLORS['background'],
+                anchor='w'
+            ).grid(row=index % 9, column=index // 9, sticky='w', padx=5)
+        
+        result = []
+        
+        def confirm():
+            result.extend(column for column in EXPORT_COLUMNS if chosen[column].get())
+            if not result:
+                messagebox.showwarning("Export Columns", "Choose at least one column.", parent=dialog)
+                return
+            dialog.destroy()
+        
+        buttons = tk.Frame(dialog, bg=COLORS['background'])
+        buttons.pack(pady=PADDING['large'])
+        for text, command, color in (("Export", confirm, COLORS['success']),
+                                     ("Cancel", dialog.destroy, COLORS['secondary'])):
+            tk.Button(
+                buttons,
+                text=text,
+                command=command,
+                bg=color,
+                fg=COLORS['text_light'],
+                font=FONTS['button'],
+                relief='flat',
+                cursor='hand2',
+                padx=15,
+                pady=5
+            ).pack(side='left', padx=5)
+        
+        self.window.wait_window(dialog)
+        return tuple(result) or None
@@ -0,0 +1,201 @@
+"""
+Virtual Table Module - Treeview Showing Only the Visible Rows
+WeAreCars Car Rental System
+
+A ttk.Treeview holds one item per row it shows, so filling it with every
+booking costs time and memory in proportion to the table. VirtualTable
+keeps a fixed pool of items, just enough to fill the widget, and a row
+offset driven by its own scrollbar. Each time the offset or size changes
+it asks its row source for that slice only, formats it and writes it
+into the pool.
+
+A row source provides count() and fetch(offset, limit); ListRowSource
+serves rows already in memory. A source that learns its count only as it
+is read, e.g. search matches read a page at a time, sets complete to
+False until it has read everything; the table then re-reads count()
+after each fetch.
+"""
+
+# Height of one tree row in pixels; matches the Treeview style
+ROW_HEIGHT = 25
+
+# Allowance for the column headings (pixels)
+HEADING_HEIGHT = 28
+
+# Rows moved per mouse wheel notch
+WHEEL_ROWS = 3
+
+
+class ListRowSource:
+    """Row source over a list already in memory, e.g. search results."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def count(self):
+        return len(self.rows)
+
+    def fetch(self, offset, limit):
+        return self.rows[offset:offset + limit]
+
+
+class VirtualTable:
+    """Drives a Treeview and vertical Scrollbar as a window onto a row source.
+
+    format_row(row) turns a source row into the tree's column values and
+    row_key(row) identifies it, so the selection follows the row rather
+    than the pool item while scrolling.
+    """
+
+    def __init__(self, tree, scrollbar, format_row, row_key=lambda row: row[0]):
+        self.tree = tree
+        self.scrollbar = scrollbar
+        self.format_row = format_row
+        self.row_key = row_key
+        self.source = ListRowSource([])
+        self.total = 0
+        self.offset = 0
+        self.rows = []
+        self.items = []
+        # Items 0..attached-1 are in the tree; the rest are detached until needed
+        self.attached = 0
+        self.selected_key = None
+
+        scrollbar.config(command=self.on_scrollbar)
+        tree.bind('<Configure>', lambda e: self.resize())
+        tree.bind('<<TreeviewSelect>>', self.on_select)
+        tree.bind('<MouseWheel>', lambda e: self.scroll_rows(-WHEEL_ROWS if e.delta > 0 else WHEEL_ROWS))
+        tree.bind('<Button-4>', lambda e: self.scroll_rows(-WHEEL_ROWS))
+        tree.bind('<Button-5>', lambda e: self.scroll_rows(WHEEL_ROWS))
+        tree.bind('<Prior>', lambda e: self.scroll_rows(-self.page_size()))
+        tree.bind('<Next>', lambda e: self.scroll_rows(self.page_size()))
+        tree.bind('<Home>', lambda e: self.scroll_to(0))
+        tree.bind('<End>', lambda e: self.scroll_to(self.total))
+        tree.bind('<Up>', lambda e: self.step_selection(-1))
+        tree.bind('<Down>', lambda e: self.step_selection(1))
+
+    def page_size(self):
+        """Return how many rows fit in the tree."""
+        height = self.tree.winfo_height()
+        if height <= 1:
+            # Not laid out yet; use the requested height
+            height = self.tree.winfo_reqheight()
+        return max(1, (height - HEADING_HEIGHT) // ROW_HEIGHT)
+
+    def set_source(self, source, keep_position=False):
+        """Show a new row source, from the top unless keep_position."""
+        self.source = source
+        if not keep_position:
+            self.offset = 0
+            self.selected_key = None
+        self.refresh()
+
+    def refresh(self, shift=0):
+        """Re-read the row count and the visible slice from the source.
+        
+        shift moves a scrolled-down window by that many rows, e.g. the rows
+        added above it, so it keeps showing the same rows.
+        """
+        if self.offset:
+            self.offset += shift
+        self.total = self.source.count()
+        self.render()
+
+    def resize(self):
+        """Grow or shrink the item pool to fit the tree, then redraw."""
+        size = self.page_size()
+        while len(self.items) < size:
+            item = self.tree.insert('', 'end', values=())
+            self.tree.detach(item)
+            self.items.append(item)
+        while len(self.items) > size:
+            self.tree.delete(self.items.pop())
+        self.attached = min(self.attached, size)
+        self.render()
+
+    def render(self):
+        """Fetch the visible slice and write it into the item pool."""
+        size = len(self.items)
+        self.offset = max(0, min(self.offset, self.total - size))
+        growing = not getattr(self.source, 'complete', True)
+        self.rows = self.source.fetch(self.offset, size) if size and self.total else []
+        if growing:
+            self.total = self.source.count()
+            # The last page can hold fewer rows than were allowed for
+            if self.offset > max(0, self.total - size):
+                self.offset = max(0, self.total - size)
+                self.rows = self.source.fetch(self.offset, size)
+
+        shown = len(self.rows)
+        for index in range(self.attached, shown):
+            self.tree.move(self.items[index], '', index)
+        for index in range(shown, self.attached):
+            self.tree.detach(self.items[index])
+        self.attached = shown
+
+        selected = None
+        for item, row in zip(self.items, self.rows):
+            self.tree.item(item, values=self.format_row(row))
+            if self.selected_key is not None and self.row_key(row) == self.selected_key:
+                selected = item
+
+        current = self.tree.selection()
+        if selected is not None:
+            if current != (selected,):
+                self.tree.selection_set(selected)
+        elif current:
+            self.tree.selection_remove(*current)
+
+        if self.total:
+            self.scrollbar.set(self.offset / self.total, min(1.0, (self.offset + size) / self.total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def scroll_to(self, offset):
+        if offset != self.offset:
+            self.offset = offset
+            self.render()
+        return 'break'
+
+    def scroll_rows(self, rows):
+        return self.scroll_to(self.offset + rows)
+
+    def on_scrollbar(self, action, amount, unit=None):
+        """Scrollbar command: 'moveto fraction' or 'scroll n units|pages'."""
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * self.total))
+        elif action == 'scroll':
+            step = self.page_size() if unit == 'pages' else 1
+            self.scroll_rows(int(amount) * step)
+
+    def on_select(self, event):
+        row = self.selected_row()
+        # Renders clear the selection of rows scrolled out; keep the last choice then
+        if row is not None:
+            self.selected_key = self.row_key(row)
+
+    def selected_row(self):
+        """Return the source row of the selected item, or None."""
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self.items:
+            return None
+        index = self.items.index(selection[0])
+        return self.rows[index] if index < len(self.rows) else None
+
+    def step_selection(self, step):
+        """Move the selection by one row, scrolling when it reaches an edge."""
+        if not self.rows:
+            return 'break'
+        selection = self.tree.selection()
+        index = self.items.index(selection[0]) + step if selection and selection[0] in self.items else 0
+        if index < 0:
+            self.scroll_rows(-1)
+            index = 0
+        elif index >= len(self.rows):
+            self.scroll_rows(1)
+            index = len(self.rows) - 1
+        self.selected_key = self.row_key(self.rows[index])
+        self.tree.selection_set(self.items[index])
+        self.tree.focus(self.items[index])
+        return 'break'
+
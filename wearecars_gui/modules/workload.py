@@ -0,0 +1,246 @@
+"""
+Workload Module - Seeded Synthetic Customers and Bookings
+WeAreCars Car Rental System
+
+Generates booking history that looks like the real thing: returning
+customers, a car and fuel mix weighted towards small petrol cars, short
+rentals with weekly peaks, busy summers and weekends, and statuses that
+follow the dates. The same seed always produces the same rows, so a
+database built at 10k, 1M or 10M bookings can be rebuilt exactly.
+"""
+
+import csv
+import random
+from datetime import date, timedelta
+
+from modules.database import IMPORT_COLUMNS
+from modules.validation import MAX_AGE, MAX_DAYS, MIN_AGE, MIN_DAYS
+
+# Sizes the benchmarks are usually run at
+STANDARD_SCALES = {'10k': 10_000, '1m': 1_000_000, '10m': 10_000_000}
+
+# Columns written by the generator, in CSV order
+WORKLOAD_COLUMNS = IMPORT_COLUMNS + ('booking_date', 'status')
+
+FIRST_NAMES = (
+    'Oliver', 'George', 'Harry', 'Noah', 'Jack', 'Leo', 'Arthur', 'Muhammad',
+    'Oscar', 'Charlie', 'Jacob', 'Thomas', 'Henry', 'William', 'James', 'Alfie',
+    'Joshua', 'Freddie', 'Archie', 'Ethan', 'Isaac', 'Daniel', 'Samuel', 'David',
+    'Olivia', 'Amelia', 'Isla', 'Ava', 'Mia', 'Ivy', 'Lily', 'Isabella', 'Rosie',
+    'Sophia', 'Grace', 'Freya', 'Florence', 'Willow', 'Emily', 'Ella', 'Poppy',
+    'Evie', 'Elsie', 'Charlotte', 'Sienna', 'Sophie', 'Emma', 'Hannah', 'Priya',
+    'Aisha', 'Zara', 'Chloe', 'Lucy', 'Sarah', 'Rachel', 'Megan', 'John', 'Michael',
+)
+
+SURNAMES = (
+    'Smith', 'Jones', 'Taylor', 'Brown', 'Williams', 'Wilson', 'Johnson', 'Davies',
+    'Robinson', 'Wright', 'Thompson', 'Evans', 'Walker', 'White', 'Roberts', 'Green',
+    'Hall', 'Wood', 'Jackson', 'Clarke', 'Patel', 'Khan', 'Lewis', 'Harris', 'Martin',
+    'Cooper', 'King', 'Lee', 'Baker', 'Harrison', 'Morgan', 'Allen', 'James', 'Scott',
+    'Phillips', 'Watson', 'Davis', 'Parker', 'Price', 'Bennett', 'Young', 'Griffiths',
+    'Mitchell', 'Kelly', 'Cook', 'Carter', 'Richardson', 'Bailey', 'Collins', 'Bell',
+    'Shaw', 'Murphy', 'Miller', 'Cox', 'Richards', 'Hughes', 'Marshall', 'Anderson',
+)
+
+STREETS = (
+    'High Street', 'Station Road', 'Main Street', 'Park Road', 'Church Road',
+    'Church Street', 'London Road', 'Victoria Road', 'Green Lane', 'Manor Road',
+    'Church Lane', 'Park Avenue', 'The Avenue', 'The Crescent', 'Queens Road',
+    'New Road', 'Grange Road', 'Kings Road', 'Kingsway', 'Windsor Road',
+    'Highfield Road', 'Mill Lane', 'Alexander Road', 'York Road', 'St John\'s Road',
+    'Main Road', 'Broadway', 'King Street', 'The Green', 'Springfield Road',
+)
+
+TOWNS = (
+    'London', 'Manchester', 'Birmingham', 'Leeds', 'Glasgow', 'Liverpool', 'Bristol',
+    'Sheffield', 'Edinburgh', 'Cardiff', 'Leicester', 'Nottingham', 'Newcastle',
+    'Brighton', 'Southampton', 'Plymouth', 'Reading', 'York', 'Oxford', 'Cambridge',
+)
+
+# Relative popularity of each car and fuel type
+CAR_MIX = {'City Car': 40, 'Family Car': 30, 'SUV': 20, 'Sports Car': 10}
+FUEL_MIX = {'Petrol': 45, 'Diesel': 25, 'Hybrid': 20, 'Electric': 10}
+
+# Share of bookings taking each extra
+UNLIMITED_MILEAGE_RATE = 0.25
+BREAKDOWN_COVER_RATE = 0.35
+
+# Relative demand by month (January first) and by weekday (Monday first)
+MONTH_DEMAND = (6, 6, 7, 8, 9, 10, 13, 14, 9, 8, 7, 10)
+WEEKDAY_DEMAND = (8, 7, 7, 8, 13, 14, 10)
+
+# Share of bookings made by a customer who has booked before
+RETURNING_CUSTOMER_RATE = 0.3
+
+# Returning customers are drawn from this many of the most recent customers
+RETURNING_POOL_SIZE = 50_000
+
+# Share of bookings that end up cancelled
+CANCELLATION_RATE = 0.03
+
+# Longest gap between making a booking and the rental starting (days)
+MAX_LEAD_DAYS = 90
+
+
+def rental_length_weights():
+    """Weights for rentals of MIN_DAYS..MAX_DAYS: mostly short, with peaks at one and two weeks."""
+    weights = []
+    for days in range(MIN_DAYS, MAX_DAYS + 1):
+        weight = 12 / days
+        if days % 7 == 0:
+            weight *= 3
+        weights.append(weight)
+    return weights
+
+
+class WorkloadGenerator:
+    """Seeded source of realistic bulk import rows."""
+
+    def __init__(self, seed=0, as_of=None, history_days=3 * 365, future_days=90):
+        """Create a generator.
+
+        Rentals start between history_days before as_of and future_days
+        after it; as_of defaults to today. Rentals over by as_of are
+        Returned, the rest Active, and a few of either kind Cancelled.
+        """
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.as_of = as_of or date.today()
+        self.first_day = self.as_of - timedelta(days=history_days)
+        self.last_day = self.as_of + timedelta(days=future_days)
+        self.customers = []
+        self.returning = 0
+
+        self.cars = list(CAR_MIX)
+        self.car_weights = self._cumulative(CAR_MIX.values())
+        self.fuels = list(FUEL_MIX)
+        self.fuel_weights = self._cumulative(FUEL_MIX.values())
+        self.lengths = list(range(MIN_DAYS, MAX_DAYS + 1))
+        self.length_weights = self._cumulative(rental_length_weights())
+        self.start_days = []
+        demand = []
+        day = self.first_day
+        while day <= self.last_day:
+            self.start_days.append(day)
+            demand.append(MONTH_DEMAND[day.month - 1] * WEEKDAY_DEMAND[day.weekday()])
+            day += timedelta(days=1)
+        self.start_weights = self._cumulative(demand)
+
+    @staticmethod
+    def _cumulative(weights):
+        total = 0
+        cumulative = []
+        for weight in weights:
+            total += weight
+            cumulative.append(total)
+        return cumulative
+
+    def customer(self):
+        """Return (first_name, surname, address, age) for a new or returning customer."""
+        rng = self.rng
+        if self.customers and rng.random() < RETURNING_CUSTOMER_RATE:
+            self.returning += 1
+            return rng.choice(self.customers)
+
+        address = f"{rng.randint(1, 250)} {rng.choice(STREETS)}, {rng.choice(TOWNS)}"
+        age = int(rng.triangular(MIN_AGE, 85, 34))
+        customer = (rng.choice(FIRST_NAMES), rng.choice(SURNAMES), address, min(age, MAX_AGE))
+        if len(self.customers) < RETURNING_POOL_SIZE:
+            self.customers.append(customer)
+        else:
+            self.customers[rng.randrange(RETURNING_POOL_SIZE)] = customer
+        return customer
+
+    def row(self):
+        """Return one booking as a dict of strings keyed by WORKLOAD_COLUMNS, as read from a CSV."""
+        rng = self.rng
+        first_name, surname, address, age = self.customer()
+        car_type = rng.choices(self.cars, cum_weights=self.car_weights)[0]
+        fuel_type = rng.choices(self.fuels, cum_weights=self.fuel_weights)[0]
+        days = rng.choices(self.lengths, cum_weights=self.length_weights)[0]
+        start = rng.choices(self.start_days, cum_weights=self.start_weights)[0]
+
+        # Most bookings are made a few days ahead, some months ahead, none after as_of
+        lead = min(int(rng.expovariate(1 / 12)), MAX_LEAD_DAYS)
+        booked = min(start - timedelta(days=lead), self.as_of)
+        seconds = rng.randrange(8 * 3600, 20 * 3600)
+
+        if rng.random() < CANCELLATION_RATE:
+            status = 'Cancelled'
+        elif start + timedelta(days=days) <= self.as_of:
+            status = 'Returned'
+        else:
+            status = 'Active'
+
+        return {
+            'first_name': first_name,
+            'surname': surname,
+            'address': address,
+            'age': str(age),
+            'license_valid': '1',
+            'car_type': car_type,
+            'fuel_type': fuel_type,
+            'days': str(days),
+            'unlimited_mileage': '1' if rng.random() < UNLIMITED_MILEAGE_RATE else '0',
+            'breakdown_cover': '1' if rng.random() < BREAKDOWN_COVER_RATE else '0',
+            'start_date': start.isoformat(),
+            'booking_date': f"{booked.isoformat()} {seconds // 3600:02d}:{seconds // 60 % 60:02d}:{seconds % 60:02d}",
+            'status': status,
+        }
+
+    def rows(self, count):
+        """Yield count booking rows."""
+        for _ in range(count):
+            yield self.row()
+
+
+def write_workload_csv(path, count, seed=0, as_of=None):
+    """Write count generated bookings to a CSV file that import-csv accepts.
+
+    The cost columns are left out, so the import prices every booking at
+    the current rates. Returns the number of rows written.
+    """
+    generator = WorkloadGenerator(seed, as_of)
+    with open(path, 'w', newline='', encoding='utf-8') as f:
+        writer = csv.DictWriter(f, fieldnames=WORKLOAD_COLUMNS)
+        writer.writeheader()
+        for row in generator.rows(count):
+            writer.writerow(row)
+    return count
+
+
+def populate_database(database, count, seed=0, as_of=None, progress=None):
+    """Import count generated bookings straight into a Database; returns the import summary."""
+    generator = WorkloadGenerator(seed, as_of)
+    return database.import_bookings(generator.rows(count), progress)
+
+
+def parse_scale(text):
+    """Parse a row count such as '10k', '1m', '10M' or '2500'."""
+    text = text.strip().lower()
+    if text in STANDARD_SCALES:
+        return STANDARD_SCALES[text]
+    multiplier = {'k': 1_000, 'm': 1_000_000}.get(text[-1:], 1)
+    number = text[:-1] if multiplier > 1 else text
+    try:
+        count = int(float(number) * multiplier)
+    except ValueError:
+        raise ValueError(f"Not a row count: {text}") from None
+    if count < 1:
+        raise ValueError(f"Not a row count: {text}")
+    return count
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Generate synthetic WeAreCars bookings")
+    parser.add_argument('rows', type=parse_scale, help="number of bookings, e.g. 10k, 1m or 10m")
+    parser.add_argument('output', help="CSV file to write")
+    parser.add_argument('--seed', type=int, default=0, help="random seed")
+    parser.add_argument('--as-of', type=date.fromisoformat, default=None,
+                        help="date separating past and future rentals (YYYY-MM-DD, default today)")
+    args = parser.parse_args()
+
+    write_workload_csv(args.output, args.rows, args.seed, args.as_of)
+    print(f"Wrote {args.rows} bookings to {args.output}")